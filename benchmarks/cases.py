@@ -0,0 +1,370 @@
+"""Benchmark cases for the idle/visual-detection hot paths.
+
+Each suite yields ``(name, fn, repeat)`` tuples or raises ``Skip``. Suites that need Tk (monitor tick,
+lock/unlock, tray) run under Xvfb on headless Linux and are skipped when no display is available.
+"""
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterator
+
+import numpy as np
+from PIL import Image
+
+from benchmarks.frames import SCENES, generate
+from benchmarks.harness import Elapsed, Skip
+from src.capture import CapturePlan, FakeBackend, FrameRing
+from src.config import HOTKEYS, VISUAL_CHANGE_THRESHOLD, VISUAL_PIXEL_DELTA
+from src.exposure import ExposureMap
+from src.hotkeys import HotkeyEngine
+from src.mask import MaskLearner, tile_masks
+from src.monitors import Monitor
+from src.utils import _change_stats_numpy, _change_stats_pil
+from src.visual import TileGrid
+
+Case = tuple[str, Callable[[], object], int]
+
+SAMPLE_SIZE = (320, 180)
+SCREENS = {"1080p": (1920, 1080), "4K": (3840, 2160)}
+
+
+def _cycle(items: list):
+    state = {"index": 0}
+
+    def _next():
+        item = items[state["index"] % len(items)]
+        state["index"] += 1
+        return item
+
+    return _next
+
+
+def _change_ratio_cases(label: str, width: int, height: int, count: int, repeat: int) -> Iterator[Case]:
+    for scene in SCENES:
+        frames = [np.asarray(Image.fromarray(f).convert("L")) for f in generate(scene, width, height, count)]
+        pairs = _cycle(list(zip(frames, frames[1:])))
+        pil_pairs = _cycle([(Image.fromarray(a), Image.fromarray(b)) for a, b in zip(frames, frames[1:])])
+        yield (f"change_ratio[numpy,{label}{scene}]",
+               lambda: _change_stats_numpy(*pairs(), VISUAL_PIXEL_DELTA, None), repeat)
+        yield (f"change_ratio[numpy-early,{label}{scene}]",
+               lambda: _change_stats_numpy(*pairs(), VISUAL_PIXEL_DELTA, VISUAL_CHANGE_THRESHOLD), repeat)
+        yield f"change_ratio[pil,{label}{scene}]", lambda: _change_stats_pil(*pil_pairs(), VISUAL_PIXEL_DELTA), repeat
+
+
+def change_ratio(scale: float) -> Iterator[Case]:
+    """NumPy (full and early-exit) against PIL, on reduced samples and on full-resolution frames."""
+    yield from _change_ratio_cases("", *SAMPLE_SIZE, 8, max(20, int(500 * scale)))
+    for label, (width, height) in SCREENS.items():
+        repeat = max(5, int((50 if width < 3000 else 15) * scale))
+        yield from _change_ratio_cases(f"{label},", width, height, 3, repeat)
+
+
+def capture_sample(scale: float) -> Iterator[Case]:
+    for label, (width, height) in SCREENS.items():
+        repeat = max(5, int((100 if width < 3000 else 30) * scale))
+        for scene in ("static", "video_like"):
+            backend = FakeBackend([Image.fromarray(f) for f in generate(scene, width, height, 4)])
+            box = (width // 20, height // 16, width - width // 10, height - height // 7)
+            plan = CapturePlan(box, CapturePlan.factor_for(box[2]))
+            yield f"capture_sample[{label},{scene}]", lambda: plan.capture(backend), repeat
+
+
+def frame_ring(scale: float) -> Iterator[Case]:
+    repeat = max(20, int(300 * scale))
+    width, height = SAMPLE_SIZE
+    frames = [np.asarray(Image.fromarray(f).convert("L")) for f in generate("video_like", width, height, 8)]
+    for capacity in (4, 8):
+        ring = FrameRing(capacity, height, width)
+        source = _cycle(frames)
+
+        def _push(ring=ring):
+            np.copyto(ring.next_slot(), source())
+
+        for _ in range(capacity):
+            _push()
+        yield f"frame_ring[push,K={capacity}]", _push, repeat
+        yield f"frame_ring[variance,K={capacity}]", ring.variance, repeat
+
+
+def exposure_update(scale: float) -> Iterator[Case]:
+    """Per-sample cost of adding a tile frame to the memory-mapped burn-in exposure map."""
+    repeat = max(50, int(1000 * scale))
+    width, height = SAMPLE_SIZE
+    frame = np.asarray(Image.fromarray(generate("static", width, height, 1)[0]).convert("L"))
+    monitor = Monitor("bench", 0, 0, width * 6, height * 6)
+    directory = Path(tempfile.mkdtemp(prefix="exposure-bench-"))
+    for cols, rows in ((1, 1), (4, 4)):
+        plans = [CapturePlan(box, 6) for box in TileGrid(cols, rows).boxes(monitor.box)]
+        exposure = ExposureMap(directory / f"{cols}x{rows}.npy", monitor, plans)
+        tiles = _cycle([(index, frame[:plan.size[1], :plan.size[0]]) for index, plan in enumerate(plans)])
+        clock = {"now": 0.0}
+
+        def _add(exposure=exposure, tiles=tiles):
+            clock["now"] += 2.0
+            exposure.add(*tiles(), clock["now"])
+
+        yield f"exposure_update[{cols}x{rows} tiles]", _add, repeat
+
+
+def mask_learner(scale: float) -> Iterator[Case]:
+    """Per-sample cost of the visual mask: learning statistics, and zeroing ignored pixels once applied."""
+    repeat = max(50, int(1000 * scale))
+    width, height = SAMPLE_SIZE
+    frames = _cycle([np.asarray(Image.fromarray(f).convert("L")) for f in generate("video_like", width, height, 8)])
+    monitor = Monitor("bench", 0, 0, width * 6, height * 6)
+    plan = CapturePlan(monitor.box, 6)
+    learner = MaskLearner(Path(tempfile.mkdtemp(prefix="mask-bench-")) / "bench.npz", monitor, 6)
+    learner.observe(0, plan, frames())
+    yield "mask_learner[observe]", lambda: learner.observe(0, plan, frames()), repeat
+    ignore = np.zeros((height, width), dtype=bool)
+    ignore[height - 16:, width - 40:] = True  # a tray clock
+    mask = tile_masks(ignore, monitor, [plan])[0]
+    frame = frames().copy()
+
+    def _apply():
+        frame[mask] = 0
+
+    yield "mask_learner[apply]", _apply, repeat
+
+
+def _tk_root():
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        raise Skip(f"Tk unavailable: {e}")
+    root.withdraw()
+    return root
+
+
+def _screen_locker(root, **kwargs):
+    try:
+        from src.ScreenSaver import ScreenLocker
+    except Exception as e:
+        raise Skip(f"ScreenLocker unavailable: {e}")
+    return ScreenLocker(root, **kwargs)
+
+
+def monitor_tick(scale: float) -> Iterator[Case]:
+    root = _tk_root()
+    locker = _screen_locker(root, timeout_seconds=3600, idle_backend="polling")
+    channel = locker._channels[0]
+    locker._capture_backend_name = "fake"
+    frames = [Image.fromarray(f) for f in generate("video_like", 1920, 1080, 4)]
+    channel.use_backend(lambda: FakeBackend(frames))
+    locker._cancel_monitor()
+    repeat = max(20, int(300 * scale))
+
+    def _tick():
+        locker._monitor_mouse()
+        locker._cancel_monitor()
+
+    try:
+        yield "monitor_tick[polling,idle]", _tick, repeat
+        tiles = channel.tiles
+        plans = channel.get_plans()
+        yield (
+            "visual_sample[worker,1x1]",
+            lambda: channel.sample(tiles, plans, 0, True, VISUAL_CHANGE_THRESHOLD, time.time()),
+            max(10, int(100 * scale)),
+        )
+    finally:
+        locker.stop_listeners()
+        root.destroy()
+
+
+def lock_unlock(scale: float) -> Iterator[Case]:
+    root = _tk_root()
+    locker = _screen_locker(root, timeout_seconds=3600)
+    locker._cancel_monitor()
+
+    def _cycle_lock():
+        locker.lock_screen()
+        root.update()
+        locker.unlock()
+        root.update()
+        locker._cancel_monitor()
+
+    def _time_to_black():
+        locker._last_toggle_time = 0.0
+        started = time.perf_counter()
+        locker.toggle_lock()
+        root.update()  # maps the pre-built window
+        elapsed = time.perf_counter() - started
+        locker.unlock()
+        root.update()
+        locker._cancel_monitor()
+        return Elapsed(elapsed)
+
+    try:
+        yield "lock_unlock[cycle]", _cycle_lock, max(5, int(30 * scale))
+        yield "lock_unlock[time_to_black]", _time_to_black, max(5, int(30 * scale))
+    finally:
+        locker.stop_listeners()
+        root.destroy()
+
+
+def tray(scale: float) -> Iterator[Case]:
+    _tk_root().destroy()
+    try:
+        from black import TrayApp
+        app = TrayApp()
+        app._start_icon()
+    except Skip:
+        raise
+    except Exception as e:
+        raise Skip(f"Tray unavailable: {e}")
+    locker = app.locker
+    locker._cancel_monitor()
+    repeat = max(3, int(10 * scale))
+
+    def _unlock_to_idle(on_unlock):
+        def _cycle():
+            locker._on_unlock = on_unlock
+            locker.lock_screen()
+            app.root.update()
+            locker.unlock()
+            app.root.update()
+            locker._cancel_monitor()
+
+        return _cycle
+
+    try:
+        yield "tray_refresh", app._refresh_tray, repeat
+        yield "tray_recreate", app._recreate_icon, repeat
+        # Unlock through the tray callback until Tk is idle again: incremental update vs. the old recreation
+        yield "unlock_to_idle[refresh]", _unlock_to_idle(app._refresh_tray), repeat
+        yield "unlock_to_idle[recreate]", _unlock_to_idle(app._recreate_icon), repeat
+    finally:
+        if app.icon:
+            app.icon.stop()
+        locker.stop_listeners()
+        app.root.destroy()
+
+
+def activity(scale: float) -> Iterator[Case]:
+    """Per-event cost of recording input on the listener thread, alone and during a key-repeat storm.
+
+    The storm runs a keyboard and a mouse thread while the caller plays the Tk side, folding input in as
+    fast as it can; afterwards the newest timestamp either thread wrote must be the recorded activity.
+    """
+    root = _tk_root()
+    locker = _screen_locker(root, timeout_seconds=3600)
+    locker._cancel_monitor()
+    from pynput import keyboard
+    key = keyboard.KeyCode.from_char("a")
+    events = max(5_000, int(50_000 * scale))
+
+    def _storm():
+        written = {}
+
+        def _typist():
+            for _ in range(events):
+                locker._on_press(key)
+            written["key"] = locker._key_input_time
+
+        def _mouse():
+            for _ in range(events):
+                locker._on_mouse_event(0, 0)
+            written["mouse"] = locker._mouse_input_time
+
+        threads = [threading.Thread(target=_typist), threading.Thread(target=_mouse)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            locker._consume_input()
+        elapsed = time.perf_counter() - started
+        locker._consume_input()
+        if locker.last_activity_time != max(written.values()):
+            raise RuntimeError(f"lost update: recorded {locker.last_activity_time}, newest input {written}")
+        return Elapsed(elapsed / (2 * events))
+
+    try:
+        yield "activity[record,key]", lambda: locker._on_press(key), max(1000, int(100_000 * scale))
+        yield "activity[storm,per event]", _storm, max(3, int(10 * scale))
+    finally:
+        locker.stop_listeners()
+        root.destroy()
+
+
+class _Key:
+    """Stand-in for pynput's ``Key`` (``name``) and ``KeyCode`` (``vk``/``char``) so the suite runs headless."""
+
+    def __init__(self, name=None, vk=None, char=None):
+        if name is not None:
+            self.name = name
+        self.vk, self.char = vk, char
+
+
+def hotkeys(scale: float) -> Iterator[Case]:
+    """Per-event cost of hotkey matching, which runs on the listener thread for every keystroke."""
+    repeat = max(1000, int(100_000 * scale))
+    engine = HotkeyEngine({**HOTKEYS, "ctrl+alt+p": "disable_auto_lock_for 30", "cmd+f9": "toggle_auto_lock"})
+    text = _cycle([_Key(vk=ord(c.upper()), char=c) for c in "the quick brown fox"])
+    ctrl, shift, b = _Key(name="ctrl_l"), _Key(name="shift_r"), _Key(vk=0x42, char="\x02")
+
+    def _typing():
+        key = text()
+        engine.press(key)
+        engine.release(key)
+
+    def _combo():
+        engine.press(ctrl)
+        engine.press(shift)
+        engine.press(b)
+        engine.release(b)
+        engine.release(shift)
+        engine.release(ctrl)
+
+    yield "hotkeys[press+release,unbound key]", _typing, repeat
+    yield "hotkeys[ctrl+shift+b,6 events]", _combo, repeat
+
+
+def idle_source(scale: float) -> Iterator[Case]:
+    """One native idle query, what the native backend pays per check (Xvfb provides MIT-SCREEN-SAVER)."""
+    from src.idle import create_idle_source
+
+    source = create_idle_source()
+    if source is None:
+        raise Skip("no native idle source (needs X11 with MIT-SCREEN-SAVER, or Windows)")
+    try:
+        yield f"idle_source[{source.name}]", source.idle_seconds, max(100, int(5000 * scale))
+    finally:
+        source.close()
+
+
+def startup(scale: float) -> Iterator[Case]:
+    """Fresh interpreter importing the entry point; ``python -X importtime -c "import black"`` breaks it down."""
+    root = Path(__file__).resolve().parent.parent
+    repeat = max(3, int(10 * scale))
+
+    def _run(code: str):
+        subprocess.run([sys.executable, "-c", code], cwd=root, check=True, capture_output=True)
+
+    try:
+        _run("import black")
+    except subprocess.CalledProcessError as e:
+        reason = (e.stderr.decode(errors="replace").strip().splitlines() or ["unknown error"])[-1]
+        raise Skip(f"black.py not importable here: {reason}")
+    yield "startup[python]", lambda: _run("pass"), repeat
+    yield "startup[import black]", lambda: _run("import black"), repeat
+
+
+SUITES: dict[str, Callable[[float], Iterator[Case]]] = {
+    "change_ratio": change_ratio,
+    "capture_sample": capture_sample,
+    "frame_ring": frame_ring,
+    "exposure_update": exposure_update,
+    "mask_learner": mask_learner,
+    "monitor_tick": monitor_tick,
+    "lock_unlock": lock_unlock,
+    "tray": tray,
+    "activity": activity,
+    "hotkeys": hotkeys,
+    "idle_source": idle_source,
+    "startup": startup,
+}
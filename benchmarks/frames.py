@@ -0,0 +1,54 @@
+"""Synthetic screen content for benchmarks: deterministic RGB frames as uint8 arrays."""
+import numpy as np
+
+SCENES = ("static", "noise", "moving_rect", "video_like")
+
+
+def generate(scene: str, width: int, height: int, count: int, seed: int = 0) -> list[np.ndarray]:
+    """Returns ``count`` consecutive (height, width, 3) frames of the given scene."""
+    rng = np.random.default_rng(seed)
+    background = _desktop(width, height, rng)
+    if scene == "static":
+        return [background] * count
+    if scene == "noise":
+        return [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+    if scene == "moving_rect":
+        return [_moving_rect(background, index) for index in range(count)]
+    if scene == "video_like":
+        return [_video_like(background, index, rng) for index in range(count)]
+    raise ValueError(f"Unknown scene: {scene}")
+
+
+def _desktop(width: int, height: int, rng) -> np.ndarray:
+    """Flat wallpaper gradient with a taskbar strip, roughly what an idle desktop looks like."""
+    gradient = np.linspace(40, 90, width, dtype=np.float32)
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    frame[...] = gradient[None, :, None].astype(np.uint8)
+    frame[-max(1, height // 24):] = 20
+    frame += rng.integers(0, 3, frame.shape, dtype=np.uint8)
+    return frame
+
+
+def _moving_rect(background: np.ndarray, index: int) -> np.ndarray:
+    height, width = background.shape[:2]
+    rect_w, rect_h = max(1, width // 8), max(1, height // 8)
+    x = (index * max(1, width // 40)) % max(1, width - rect_w)
+    y = (index * max(1, height // 40)) % max(1, height - rect_h)
+    frame = background.copy()
+    frame[y:y + rect_h, x:x + rect_w] = 230
+    return frame
+
+
+def _video_like(background: np.ndarray, index: int, rng) -> np.ndarray:
+    """A 16:9 player window in one corner with smoothly changing content plus a little sensor noise."""
+    height, width = background.shape[:2]
+    win_w, win_h = max(2, width // 3), max(2, height // 3)
+    xs = np.linspace(0, 4 * np.pi, win_w, dtype=np.float32)
+    ys = np.linspace(0, 2 * np.pi, win_h, dtype=np.float32)
+    phase = index * 0.35
+    wave = (np.sin(xs[None, :] + phase) + np.cos(ys[:, None] - phase)) * 60 + 128
+    frame = background.copy()
+    window = frame[height // 10:height // 10 + win_h, width // 10:width // 10 + win_w]
+    window[...] = wave[..., None].astype(np.uint8)
+    window += rng.integers(0, 4, window.shape, dtype=np.uint8)
+    return frame
@@ -0,0 +1,99 @@
+"""Timing, allocation tracking and JSON result storage shared by the benchmark suite."""
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+
+class Skip(Exception):
+    """Raised by a case that cannot run here (no display, missing optional module)."""
+
+
+class Elapsed(float):
+    """Returned by a case that times itself, so untimed setup/teardown inside the call is excluded."""
+
+
+def measure(fn: Callable[[], object], repeat: int, warmup: int = 3) -> dict:
+    """Runs ``fn`` and returns ops/sec, p50/p99 latency (µs) and peak traced allocation per call (KiB).
+
+    If ``fn`` returns an ``Elapsed``, that value (seconds) is used instead of the wall time of the call.
+    """
+    for _ in range(warmup):
+        fn()
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(result if isinstance(result, Elapsed) else time.perf_counter() - started)
+
+    # Separate pass: tracemalloc slows every allocation down and would skew the timings
+    tracemalloc.start()
+    peak = 0
+    for _ in range(min(repeat, 20)):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        fn()
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+
+    timings.sort()
+    total = sum(timings)
+    return {
+        "repeat": repeat,
+        "ops_per_sec": round(repeat / total, 1) if total else 0.0,
+        "p50_us": round(_percentile(timings, 0.50) * 1e6, 1),
+        "p99_us": round(_percentile(timings, 0.99) * 1e6, 1),
+        "alloc_peak_kib": round(peak / 1024, 1),
+    }
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def environment() -> dict:
+    info = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+    }
+    try:
+        import numpy
+        info["numpy"] = numpy.__version__
+    except ImportError:
+        info["numpy"] = None
+    return info
+
+
+def save(path: Path, results: dict, skipped: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as fh:
+        json.dump({"environment": environment(), "results": results, "skipped": skipped}, fh, indent=2)
+
+
+def load(path: Path) -> dict:
+    with path.open("r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def compare(old: dict, new: dict, tolerance: float = 0.10) -> list[str]:
+    """Side-by-side p50 comparison; cases slower than ``tolerance`` are marked as regressions."""
+    lines = [f"{'case':<48} {'old p50 µs':>11} {'new p50 µs':>11} {'change':>8}"]
+    old_results, new_results = old.get("results", {}), new.get("results", {})
+    for name in sorted(set(old_results) | set(new_results)):
+        before, after = old_results.get(name), new_results.get(name)
+        if before is None or after is None:
+            lines.append(f"{name:<48} {'-' if before is None else before['p50_us']:>11} "
+                         f"{'-' if after is None else after['p50_us']:>11} {'n/a':>8}")
+            continue
+        change = (after["p50_us"] - before["p50_us"]) / before["p50_us"] if before["p50_us"] else 0.0
+        flag = "  REGRESSION" if change > tolerance else ""
+        lines.append(f"{name:<48} {before['p50_us']:>11} {after['p50_us']:>11} {change:>+8.1%}{flag}")
+    return lines
@@ -0,0 +1,63 @@
+"""Runs the benchmark suite and stores JSON results.
+
+Run from the repository root (headless Linux: ``xvfb-run -a python -m benchmarks.run``)::
+
+    python -m benchmarks.run --out bench/new.json
+    python -m benchmarks.run --suite change_ratio --quick
+    python -m benchmarks.run --compare bench/old.json bench/new.json
+"""
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Keep benchmark runs away from the user's real settings.json
+os.environ["APPDATA"] = tempfile.mkdtemp(prefix="oled_screensaver_bench_")
+
+from benchmarks.harness import Skip, compare, load, measure, save  # noqa: E402
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suite", action="append", help="suite name to run (repeatable); default: all")
+    parser.add_argument("--quick", action="store_true", help="fewer repetitions for smoke runs")
+    parser.add_argument("--out", type=Path, help="write JSON results here")
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("OLD", "NEW"), help="compare two result files")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        for line in compare(load(args.compare[0]), load(args.compare[1])):
+            print(line)
+        return 0
+
+    from benchmarks.cases import SUITES
+
+    selected = args.suite or list(SUITES)
+    unknown = [name for name in selected if name not in SUITES]
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(unknown)}; choose from {', '.join(SUITES)}")
+
+    scale = 0.2 if args.quick else 1.0
+    results: dict[str, dict] = {}
+    skipped: dict[str, str] = {}
+    print(f"{'case':<48} {'ops/s':>10} {'p50 µs':>10} {'p99 µs':>10} {'alloc KiB':>10}")
+    for suite in selected:
+        try:
+            for name, fn, repeat in SUITES[suite](scale):
+                stats = measure(fn, repeat)
+                results[name] = stats
+                print(f"{name:<48} {stats['ops_per_sec']:>10} {stats['p50_us']:>10} "
+                      f"{stats['p99_us']:>10} {stats['alloc_peak_kib']:>10}")
+        except Skip as e:
+            skipped[suite] = str(e)
+            print(f"{suite:<48} skipped: {e}")
+
+    if args.out:
+        save(args.out, results, skipped)
+        print(f"Results saved to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,57 +1,115 @@
 import logging
 
 logger = logging.getLogger(__name__)
-import os
+import sys
+
+if __name__ == "__main__" and "ctl" in sys.argv[1:]:  # control client: dispatched before any GUI import
+    from src.ctl import main
+
+    sys.exit(main(sys.argv[1:]))
+
 import platform
 import tkinter as tk
-from datetime import datetime
+from copy import deepcopy
+from datetime import date, datetime, timedelta
 from tkinter import ttk, messagebox
 
-import pystray
-from PIL import ImageTk
-from pystray import MenuItem as item, Menu
-
+from src import config, profiling
 from src.ScreenSaver import ScreenLocker
-from src.config import (
-    DEV_MODE,
-    SECONDS_IN_MINUTE,
-    PID_FILE,
-    SettingsStore,
-)
+from src.config import SettingsStore
+from src.control import ControlServer, EventHub
+from src.exposure import export_maps, load_maps, render_heatmap
+from src.instance import SingleInstance, claim_instance
+from src.journal import KINDS, START, STOP, Journal, daily_totals, iter_records
 from src.localization import SUPPORTED_LANGUAGES, Translator
-from src.utils import format_duration, create_tray_image, kill_previous_instance
+from src.profiling import ProfileSession, span
+from src.utils import format_duration, create_tray_image
+from src.watcher import SettingsWatcher
+
+VISUAL_SETTING_KEYS = frozenset({
+    "visual_monitor_enabled", "visual_margins", "visual_threshold",
+    "visual_tile_grid", "visual_tiles_per_check", "visual_monitors", "visual_mask",
+})
 
 
 class TrayApp:
-    def __init__(self):
-        if DEV_MODE:
+    def __init__(self, instance: SingleInstance | None = None):
+        if config.DEV_MODE:
             logger.info("Running in developer mode")
 
+        self.instance = instance
         self.last_delay_minutes: int | None = None
         self.root = tk.Tk()
         self.root.withdraw()
-        self.settings_icon_image: ImageTk.PhotoImage | None = None
+        self.settings_icon_image = None  # ImageTk.PhotoImage, created with the first settings window
         self.settings = SettingsStore()
         self.translator = Translator(self.settings.language)
         self._init_settings_state()
         self.zone_overlay: tk.Toplevel | None = None
+        self.events = EventHub()
+        self.journal = Journal(
+            self.settings.path.parent / "journal.bin",
+            max_bytes=config.JOURNAL_MAX_BYTES,
+            keep=config.JOURNAL_KEEP_FILES,
+            flush_interval=config.JOURNAL_FLUSH_INTERVAL
+        )
+        self.exposure_dir = self.settings.path.parent / "exposure"
+        self.exposure_window: tk.Toplevel | None = None
+        self._exposure_images: list = []  # ImageTk.PhotoImage references the open viewer needs
 
         self.locker = ScreenLocker(
             self.root,
             timeout_seconds=self.settings.timeout_seconds,
-            on_unlock=self._recreate_icon_after_unlock
+            on_unlock=self._refresh_tray,
+            on_event=self._on_locker_event,
+            idle_backend=self.settings.idle_backend,
+            mouse_check_ms=self.settings.mouse_check_ms,
+            cursor_hide_ms=self.settings.cursor_hide_ms,
+            hotkeys=self.settings.hotkeys,
+            on_hotkey=self._on_hotkey,
+            exposure_dir=self.exposure_dir,
+            mask_dir=self.settings.path.parent / "masks"
         )
         self.locker.update_visual_settings(
             self.settings.visual_monitor_enabled,
             self.settings.visual_margins,
-            self.settings.visual_threshold
+            self.settings.visual_threshold,
+            self.settings.visual_tile_grid,
+            self.settings.visual_tiles_per_check,
+            self.settings.visual_monitors,
+            self.settings.visual_mask
         )
 
-        self.icon: pystray.Icon | None = None
+        self.icon = None  # pystray.Icon; pystray is imported when the tray is set up
         self._icon_thread = None
+        self._menu_pause_minutes: list[int] = []
         self.settings_window: tk.Toplevel | None = None
+        self._settings_reload_id = None
+        self.control = ControlServer(
+            lambda fn: self.root.after(0, fn), self._control_commands(), self.events,
+            background={"usage": self._control_usage, "export_exposure": self._control_export_exposure}
+        )
+        self._settings_watcher = SettingsWatcher(
+            self.settings.path,
+            lambda: self.root.after(0, self._schedule_settings_reload),
+            poll_interval=config.SETTINGS_POLL_INTERVAL
+        )
         self._setup_tray()
 
+    def _init_capture_backend(self):
+        """Benchmarks capture backends once and remembers the winner in settings.json.
+
+        Runs after the tray is up and only while visual detection is enabled, so screenshot libraries
+        and NumPy stay off the startup path.
+        """
+        if not self.settings.visual_monitor_enabled or self.locker.has_capture_backend:
+            return
+        preferred = self.settings.capture_backend
+        selected = self.locker.select_capture_backend(None if preferred == "auto" else preferred)
+        if selected and selected != preferred:
+            self.settings.update({"capture_backend": selected})
+            self.settings.save_later()
+
     def _init_settings_state(self):
         self.timeout_var = tk.StringVar(value=str(self.settings.timeout_seconds))
         self.mouse_check_var = tk.StringVar(value=str(self.settings.mouse_check_ms))
@@ -77,7 +135,6 @@ class TrayApp:
         self.show_zone_var = tk.BooleanVar(value=True)
         self.show_zone_var.trace_add("write", lambda *_: self._toggle_visual_zone_overlay())
 
-        self.settings_icon_image = ImageTk.PhotoImage(create_tray_image())
         self.pause_minutes_error = tk.StringVar(value="")
         self.pause_minutes_entry = None
         self.pause_minutes_entry_default_bg = None
@@ -87,14 +144,25 @@ class TrayApp:
         self.language_display_to_code: dict[str, str] = {}
 
     def _setup_tray(self):
-        image = create_tray_image()
+        import pystray
+
+        self.icon = pystray.Icon("ScreenLocker", create_tray_image(), "ScreenLocker", self._build_menu())
+        if platform.system() == "Windows":
+            self.icon._on_left_up = self._toggle
+        else:
+            self.icon.on_clicked = self._toggle
 
+    def _build_menu(self):
+        """Builds the tray menu; every label is a callable so language and state changes only need update_menu()."""
+        from pystray import MenuItem as item, Menu
+
+        self._menu_pause_minutes = list(self.settings.pause_minutes)
         delay_items = [
-            item(self._format_delay_label(minutes), self._make_delay_action(minutes))
-            for minutes in self.settings.pause_minutes
+            item(lambda _, minutes=minutes: self._format_delay_label(minutes), self._make_delay_action(minutes))
+            for minutes in self._menu_pause_minutes
         ]
 
-        menu = Menu(
+        return Menu(
             item(lambda _:
                  self._("tray.autolock_state",
                         state=self._("common.enabled") if self.locker.auto_lock_enabled else self._("common.disabled")),
@@ -108,24 +176,19 @@ class TrayApp:
                  None, enabled=False,
                  visible=lambda _:
                  self.locker.delayed_until is not None),
-            item(self._("tray.lock_manually"), self._toggle, default=True),
+            item(lambda _: self._("tray.lock_manually"), self._toggle, default=True),
             item(lambda _:
                  self._("tray.disable_autolock") if self.locker.auto_lock_enabled else self._("tray.enable_autolock"),
                  lambda _,: self.locker.toggle_auto_lock()),
             Menu.SEPARATOR,
             *delay_items,
             Menu.SEPARATOR,
-            item(self._("tray.settings"), self._open_settings),
+            item(lambda _: self._("tray.settings"), self._open_settings),
+            item(lambda _: self._("tray.exposure"), self._open_exposure),
             Menu.SEPARATOR,
-            item(self._("tray.exit"), self._quit)
+            item(lambda _: self._("tray.exit"), self._quit)
         )
 
-        self.icon = pystray.Icon("ScreenLocker", image, "ScreenLocker", menu)
-        if platform.system() == "Windows":
-            self.icon._on_left_up = self._toggle
-        else:
-            self.icon.on_clicked = self._toggle
-
     def _format_delay_label(self, minutes: int | None) -> str:
         if minutes is None:
             return ""
@@ -136,8 +199,26 @@ class TrayApp:
         self.icon.run_detached()
         self._icon_thread = getattr(self.icon, "_thread", None)
 
-    def _recreate_icon_after_unlock(self):
-        """Вызывается ScreenLocker'ом сразу после разблокировки."""
+    @span("tray_refresh")
+    def _refresh_tray(self):
+        """Brings the running icon up to date after unlock or a settings save without restarting it.
+
+        The menu object is rebuilt only when the pause presets changed; otherwise its dynamic labels are re-read.
+        """
+        if self.icon is None:
+            return
+        try:
+            if self.settings.pause_minutes != self._menu_pause_minutes:
+                self.icon.menu = self._build_menu()  # the setter pushes the new menu to the running icon
+            else:
+                self.icon.update_menu()
+        except Exception as e:
+            logger.warning("Tray update failed, recreating icon: %s", e)
+            self._recreate_icon()
+
+    @span("tray_recreate")
+    def _recreate_icon(self):
+        """Recovery path: stops whatever is left of the icon and starts a fresh one."""
         try:
             if self.icon:
                 self.icon.stop()
@@ -148,16 +229,19 @@ class TrayApp:
 
         self._setup_tray()
         self._start_icon()
-        logger.debug("Tray icon recreated after unlock")
+        logger.debug("Tray icon recreated")
 
     def _make_delay_action(self, minutes):
         def _action(icon, item):
-            self.last_delay_minutes = minutes
-            self.locker.disable_auto_lock_for(minutes * SECONDS_IN_MINUTE)
-            logger.debug("Auto-lock paused for %s minutes", minutes)
+            self._pause_for(minutes)
 
         return _action
 
+    def _pause_for(self, minutes: int):
+        self.last_delay_minutes = minutes
+        self.locker.disable_auto_lock_for(minutes * config.SECONDS_IN_MINUTE)
+        logger.debug("Auto-lock paused for %s minutes", minutes)
+
     def _toggle(self, icon, item=None):
         self.root.after(0, self.locker.toggle_lock)
 
@@ -175,6 +259,9 @@ class TrayApp:
         self.settings_window.title(self._("settings.title"))
         self.settings_window.resizable(True, False)
         self.settings_window.protocol("WM_DELETE_WINDOW", self._close_settings_window)
+        if self.settings_icon_image is None:
+            from PIL import ImageTk
+            self.settings_icon_image = ImageTk.PhotoImage(create_tray_image())
         if self.settings_icon_image:
             self.settings_window.iconphoto(False, self.settings_icon_image)
 
@@ -197,6 +284,66 @@ class TrayApp:
         self._center_window(self.settings_window)
         self._update_visual_zone_overlay()
 
+    def _open_exposure(self, icon, item):
+        self.root.after(0, self._show_exposure_window)
+
+    def _show_exposure_window(self):
+        """Shows every monitor's burn-in heatmap (yellow = most exposure), re-read from the maps on each open."""
+        from PIL import Image, ImageTk
+
+        if self.exposure_window and self.exposure_window.winfo_exists():
+            self.exposure_window.destroy()
+        window = self.exposure_window = tk.Toplevel(self.root)
+        window.title(self._("exposure.title"))
+        window.resizable(False, False)
+        window.protocol("WM_DELETE_WINDOW", self._close_exposure_window)
+
+        content = ttk.Frame(window, padding=(20, 16, 20, 16))
+        content.pack(fill=tk.BOTH, expand=True)
+        self._exposure_images = []
+        maps = load_maps(self.exposure_dir)
+        row = 0
+        if not maps:
+            ttk.Label(content, text=self._("exposure.empty"), wraplength=360).grid(row=row, column=0, sticky="w")
+            row += 1
+        for name, grid in maps:
+            image = render_heatmap(grid)
+            scale = max(1, 640 // image.width)
+            photo = ImageTk.PhotoImage(image.resize((image.width * scale, image.height * scale), Image.NEAREST))
+            self._exposure_images.append(photo)
+            hours = f"{float(grid.max()) / 3600:.1f}"
+            ttk.Label(content, text=self._("exposure.caption", name=name, hours=hours)).grid(
+                row=row, column=0, sticky="w")
+            ttk.Label(content, image=photo).grid(row=row + 1, column=0, pady=(4, 12))
+            row += 2
+
+        status_var = tk.StringVar(value="")
+        ttk.Label(content, textvariable=status_var, wraplength=360).grid(row=row, column=0, sticky="w")
+        buttons = ttk.Frame(content)
+        buttons.grid(row=row + 1, column=0, sticky="e", pady=(10, 0))
+        export_btn = ttk.Button(buttons, text=self._("exposure.export"),
+                                command=lambda: status_var.set(self._export_exposure()))
+        export_btn.grid(row=0, column=0, padx=(0, 10))
+        if not maps:
+            export_btn.state(["disabled"])
+        ttk.Button(buttons, text=self._("exposure.close"), command=self._close_exposure_window).grid(row=0, column=1)
+        self._center_window(window)
+
+    def _export_exposure(self) -> str:
+        target = self.exposure_dir / "export"
+        try:
+            written = export_maps(self.exposure_dir, target)
+        except OSError as e:
+            logger.warning("Exposure export failed: %s", e)
+            return str(e)
+        return self._("exposure.exported", path=target) if written else self._("exposure.empty")
+
+    def _close_exposure_window(self):
+        if self.exposure_window and self.exposure_window.winfo_exists():
+            self.exposure_window.destroy()
+        self.exposure_window = None
+        self._exposure_images = []
+
     def _build_settings_form(self, container):
         container.columnconfigure(1, weight=1, minsize=360)
         row = 0
@@ -354,7 +501,7 @@ class TrayApp:
         try:
             timeout_seconds = max(1, int(self.timeout_var.get()))
             mouse_check_ms = max(1, int(self.mouse_check_var.get()))
-            cursor_hide_ms = max(0, int(self.cursor_hide_var.get()))
+            cursor_hide_ms = max(config.CURSOR_HIDE_NEVER, int(self.cursor_hide_var.get()))
             threshold_percent = float(self.visual_threshold_var.get().replace(",", "."))
         except ValueError:
             messagebox.showerror(self._("settings.dialog_title"), self._("settings.error_numeric"))
@@ -388,7 +535,7 @@ class TrayApp:
         visual_monitor_enabled = self.visual_detection_var.get()
         selected_language = self._selected_language_code()
 
-        self.settings.update({
+        changed = self.settings.update({
             "timeout_seconds": timeout_seconds,
             "mouse_check_ms": mouse_check_ms,
             "cursor_hide_ms": cursor_hide_ms,
@@ -398,20 +545,75 @@ class TrayApp:
             "visual_monitor_enabled": visual_monitor_enabled,
             "language": selected_language,
         })
-        self.settings.save()
-        self.translator.set_language(selected_language)
-
-        self.locker.update_timeout(timeout_seconds)
-        self.locker.update_visual_settings(
-            visual_monitor_enabled,
-            visual_margins,
-            visual_threshold
-        )
-        self.settings.language = selected_language
-        self._recreate_icon_after_unlock()
+        if changed:
+            self.settings.save_later()
+            self._apply_settings(changed)
         logger.info("Settings saved to %s", self.settings.path)
         return True
 
+    def _apply_settings(self, changed: set[str]):
+        """Reconfigures only the subsystems whose settings changed."""
+        if "timeout_seconds" in changed:
+            self.locker.update_timeout(self.settings.timeout_seconds)
+        if changed & {"mouse_check_ms", "cursor_hide_ms"}:
+            self.locker.update_input_timing(self.settings.mouse_check_ms, self.settings.cursor_hide_ms)
+        if changed & VISUAL_SETTING_KEYS:
+            self.locker.update_visual_settings(
+                self.settings.visual_monitor_enabled,
+                self.settings.visual_margins,
+                self.settings.visual_threshold,
+                self.settings.visual_tile_grid,
+                self.settings.visual_tiles_per_check,
+                self.settings.visual_monitors,
+                self.settings.visual_mask
+            )
+        if "capture_backend" in changed and self.settings.visual_monitor_enabled:
+            preferred = self.settings.capture_backend
+            self.locker.select_capture_backend(None if preferred == "auto" else preferred)
+        elif changed & VISUAL_SETTING_KEYS:
+            self._init_capture_backend()
+        if "language" in changed:
+            self.translator.set_language(self.settings.language)
+        if "hotkeys" in changed:
+            self.locker.update_hotkeys(self.settings.hotkeys)
+        if "idle_backend" in changed:
+            logger.info("Idle backend change to %r takes effect after restart", self.settings.idle_backend)
+        if changed & {"language", "pause_minutes"}:
+            self._refresh_tray()
+
+    def _schedule_settings_reload(self):
+        """Coalesces bursts of file events (editors often truncate, write and rename) into one reload."""
+        if self._settings_reload_id is not None:
+            self.root.after_cancel(self._settings_reload_id)
+        self._settings_reload_id = self.root.after(config.SETTINGS_RELOAD_DELAY_MS, self._on_settings_file_changed)
+
+    def _on_settings_file_changed(self):
+        self._settings_reload_id = None
+        previous = deepcopy(self.settings.to_dict())
+        changed = self.settings.reload()
+        if not changed:
+            return
+        try:
+            self._apply_settings(changed)
+        except Exception:
+            logger.exception("Settings from %s could not be applied; keeping the previous values", self.settings.path)
+            self.settings.update({key: previous[key] for key in changed})
+            self._apply_settings(changed)
+        self._sync_settings_vars()
+
+    def _sync_settings_vars(self):
+        """Points the settings-form variables at the current values after an external edit."""
+        self.timeout_var.set(str(self.settings.timeout_seconds))
+        self.mouse_check_var.set(str(self.settings.mouse_check_ms))
+        self.cursor_hide_var.set(str(self.settings.cursor_hide_ms))
+        self.pause_minutes_var.set(", ".join(str(n) for n in self.settings.pause_minutes))
+        self.visual_threshold_var.set(str(round(self.settings.visual_threshold * 100, 3)))
+        for key, var in self.visual_zone_vars.items():
+            percent_str = f"{self.settings.visual_margins.get(key, 0.0) * 100:.3f}".rstrip("0").rstrip(".")
+            var.set(percent_str or "0")
+        self.visual_detection_var.set(self.settings.visual_monitor_enabled)
+        self.language_choice_var.set(self._language_label(self.settings.language))
+
     def _close_settings_window(self):
         if self.settings_window and self.settings_window.winfo_exists():
             self.settings_window.destroy()
@@ -420,26 +622,167 @@ class TrayApp:
 
     def _quit(self, icon, item):
         logger.info("Exiting...")
+        self._settings_watcher.stop()
+        self.settings.flush()
         self.locker.stop_listeners()
         icon.stop()
         self.root.after(0, self.root.destroy)
-        try:
-            os.remove(PID_FILE)
-        except Exception:
-            pass
+        self.events.close()
+        self.journal.record(STOP)
+        self.journal.close()
+        if self.instance is not None:
+            self.instance.close()
 
     def _schedule_icon_check(self):
         try:
             if self._icon_thread and not self._icon_thread.is_alive():
                 logger.warning("Tray icon thread died — restarting...")
-                self._recreate_icon_after_unlock()
+                self._recreate_icon()
         except Exception as e:
             logger.debug("Error checking tray thread: %s", e)
         finally:
             self.root.after(10_000, self._schedule_icon_check)
 
+    def _start_profiling(self, window_seconds: int):
+        session = ProfileSession(window_seconds, self.settings.path.parent)
+        session.start()
+        self.root.after(window_seconds * 1000, session.finish)
+
+    def _on_instance_request(self, request: dict, conn) -> dict | None:
+        """Runs on the instance-server thread; work that touches Tk is posted to the main loop."""
+        if request.get("cmd") == "launch":
+            self.root.after(0, self._on_relaunch, list(request.get("argv") or []))
+            return {"ok": True}
+        return self.control.handle(request, conn)
+
+    def _control_commands(self) -> dict:
+        """Control-socket commands; each runs on the Tk thread and returns a JSON-serializable result."""
+        return {
+            "status": self._control_status,
+            "toggle_lock": self._control_toggle_lock,
+            "lock": lambda: self._control_toggle_lock(locked=True),
+            "unlock": lambda: self._control_toggle_lock(locked=False),
+            "toggle_auto_lock": self._control_toggle_auto_lock,
+            "disable_auto_lock_for": self._control_pause,
+            "update_visual_settings": self._control_visual_settings,
+            "toggle_visual_detection": self._control_toggle_visual,
+            "visual_mask": self.locker.mask_status,
+        }
+
+    def _on_hotkey(self, action: str, args: list):
+        """Tk thread: runs a bound hotkey action through the matching control command."""
+        command = self.control.commands.get(action) if action in config.HOTKEY_ACTIONS else None
+        if command is None:
+            logger.warning("Unknown hotkey action %r; expected one of %s", action, ", ".join(config.HOTKEY_ACTIONS))
+            return
+        try:
+            command(*args)
+        except (TypeError, ValueError) as e:
+            logger.warning("Hotkey action %r %s failed: %s", action, args, e)
+
+    def _on_locker_event(self, event: str, **data):
+        """Any thread: journals the event (a queue put, no I/O here) and forwards it to subscribers."""
+        if event == "auto_lock":
+            event = "auto_lock_on" if data.get("enabled") else "auto_lock_off"
+        kind = KINDS.get(event)
+        if kind is not None:
+            value = data.get("seconds", data.get("score", data.get("idle_seconds", 0.0)))
+            self.journal.record(kind, float(value or 0.0))
+        self.events.publish(event, **data)
+
+    def _control_usage(self, days: int = 7) -> dict:
+        """Connection thread: per-day locked/unlocked/paused seconds, streamed from the journal files."""
+        self.journal.flush()
+        first_day = date.today() - timedelta(days=max(1, int(days)) - 1)
+        totals = daily_totals(iter_records(self.journal.files()))
+        return {
+            day.isoformat(): {key: round(value, 1) if isinstance(value, float) else value
+                              for key, value in entry.items()}
+            for day, entry in sorted(totals.items()) if day >= first_day
+        }
+
+    def _control_export_exposure(self) -> list[str]:
+        """Connection thread: writes the heatmaps (PNG) and raw maps (NPY) to exposure/export."""
+        return [str(path) for path in export_maps(self.exposure_dir, self.exposure_dir / "export")]
+
+    def _control_status(self) -> dict:
+        return {**self.locker.status(), "paused_minutes": self.last_delay_minutes}
+
+    def _control_toggle_lock(self, locked: bool | None = None) -> dict:
+        if locked is None or locked != self.locker.locked:
+            self.locker.toggle_lock()
+        return self._control_status()
+
+    def _control_toggle_auto_lock(self) -> dict:
+        self.locker.toggle_auto_lock()
+        self._refresh_tray()
+        return self._control_status()
+
+    def _control_pause(self, minutes: float) -> dict:
+        minutes = int(minutes)
+        if minutes <= 0:
+            raise ValueError("minutes must be positive")
+        self._pause_for(minutes)
+        self._refresh_tray()
+        return self._control_status()
+
+    def _control_toggle_visual(self) -> dict:
+        return self._control_visual_settings(enabled=not self.settings.visual_monitor_enabled)
+
+    def _control_visual_settings(self, enabled: bool | None = None, margins: dict | None = None,
+                                 threshold: float | None = None, tile_grid: list[int] | None = None,
+                                 tiles_per_check: int | None = None, monitors: dict | None = None,
+                                 mask: str | None = None) -> dict:
+        """Same keys as ``ScreenLocker.update_visual_settings``; persisted like a settings-window save.
+
+        Values are checked before anything changes and written to disk only once the locker accepted them;
+        a rejected value is a protocol error and leaves settings, file and locker as they were.
+        """
+        values = {
+            "visual_monitor_enabled": enabled,
+            "visual_margins": margins,
+            "visual_threshold": threshold,
+            "visual_tile_grid": tile_grid,
+            "visual_tiles_per_check": tiles_per_check,
+            "visual_monitors": monitors,
+            "visual_mask": mask,
+        }
+        values = config.coerce_visual_settings({key: value for key, value in values.items() if value is not None},
+                                               self.settings.visual_margins)
+        previous = {key: deepcopy(getattr(self.settings, key)) for key in values}
+        changed = self.settings.update(values)
+        if not changed:
+            return {"changed": []}
+        try:
+            self._apply_settings(changed)
+        except Exception:
+            logger.exception("Visual settings from the control socket could not be applied; reverting")
+            self.settings.update(previous)
+            self._apply_settings(changed)
+            raise
+        self.settings.save_later()
+        self._sync_settings_vars()
+        return {"changed": sorted(changed)}
+
+    def _on_relaunch(self, argv: list[str]):
+        """A second launch handed over its arguments instead of restarting; runtime state is kept."""
+        logger.info("Launched again with %s", argv or "no arguments")
+        profile_window = config.parse_profile_window(argv)
+        if profile_window is not None and not profiling.enabled:
+            self._start_profiling(profile_window)
+        self._on_settings_file_changed()
+        self._refresh_tray()
+
     def run(self):
+        if config.PROFILE_MODE:
+            self._start_profiling(config.PROFILE_WINDOW)
+        if self.instance is not None:
+            self.instance.serve(self._on_instance_request)
         self._start_icon()
+        self.root.after_idle(self._init_capture_backend)
+        self._settings_watcher.start()
+        self.journal.record(START)
+        self.journal.start()
         self._schedule_icon_check()
         self.root.mainloop()
 
@@ -569,5 +912,8 @@ class TrayApp:
 
 
 if __name__ == "__main__":
-    kill_previous_instance()
-    TrayApp().run()
+    config.init()
+    instance = claim_instance(config.instance_name(), sys.argv[1:])
+    if instance is None:
+        sys.exit(0)
+    TrayApp(instance).run()
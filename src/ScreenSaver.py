@@ -1,24 +1,43 @@
 import logging
 
 logger = logging.getLogger(__name__)
+import threading
 import time
 import tkinter as tk
+from functools import partial
+from pathlib import Path
 from typing import Optional, Callable
 
-import pyautogui
-from pynput import keyboard
-
-pyautogui.FAILSAFE = False
-
 from src.config import (
+    ACTIVITY_EVENT_GAP,
+    CAPTURE_BENCHMARK_SAMPLES,
     CURSOR_HIDE_CHECK_TIMEOUT,
+    CURSOR_HIDE_NEVER,
+    HOTKEYS,
+    IDLE_BACKEND,
+    IDLE_BACKENDS,
     MIN_TOGGLE_INTERVAL,
+    MOUSE_CHECK_MAX_INTERVAL,
     MOUSE_CHECK_TIMEOUT,
-    VISUAL_START_DELAY,
+    NATIVE_IDLE_JITTER,
+    STALL_PROBE_MS,
+    STALL_REPORT_INTERVAL,
     VISUAL_CHANGE_THRESHOLD,
+    VISUAL_MASK,
+    VISUAL_MASK_MODES,
+    VISUAL_PENDING_RETRY_MS,
     VISUAL_SAMPLE_MARGINS,
+    VISUAL_TILE_GRID,
+    VISUAL_TILES_PER_CHECK,
 )
-from .utils import is_taskbar_focused, calc_change_ratio
+from .capture import create_backend, select_backend
+from .hotkeys import HotkeyEngine
+from .idle import IdleSource, create_idle_source
+from .monitors import Monitor, enumerate_monitors
+from . import profiling
+from .profiling import span
+from .utils import is_taskbar_focused
+from .visual import MonitorChannel, VisualCadence, VisualResult, apply_margins, merge_results
 
 
 class ScreenLocker:
@@ -26,40 +45,124 @@ class ScreenLocker:
             self,
             root: tk.Tk,
             timeout_seconds: int,
-            on_unlock: Optional[Callable[[], None]] = None
+            on_unlock: Optional[Callable[[], None]] = None,
+            on_event: Optional[Callable[..., None]] = None,
+            idle_backend: str = IDLE_BACKEND,
+            mouse_check_ms: int = MOUSE_CHECK_TIMEOUT,
+            cursor_hide_ms: int = CURSOR_HIDE_CHECK_TIMEOUT,
+            hotkeys: dict[str, str] | None = None,
+            on_hotkey: Optional[Callable[[str, list], None]] = None,
+            exposure_dir: Path | None = None,
+            mask_dir: Path | None = None
     ):
         self.root = root
         self.timeout_seconds = timeout_seconds
         self.last_activity_time = time.time()
+        # Input timestamps, each written by exactly one pynput thread and read by the Tk thread; a single
+        # float store needs no lock and one writer per slot cannot move it backwards
+        self._key_input_time = 0.0
+        self._mouse_input_time = 0.0
+        self._input_seen = 0.0
         self._mouse_error_logged = False
-        self.last_mouse_position = self._safe_mouse_position(default=(0, 0))
+        self.last_mouse_position: tuple[int, int] | None = None  # polling backend only; set on its first tick
         self.locked = False
-        self.locker_window: tk.Toplevel | None = None
+        self.locker_window: tk.Toplevel | None = None  # primary monitor's lock window (holds the grab) while locked
+        self._lock_windows: list[tk.Toplevel] = []  # one per monitor, pre-built and withdrawn while unlocked
+        self._lock_started: float | None = None  # perf_counter() of the pending lock, for time-to-black
+        self._unmapped_windows = 0
 
         self.auto_lock_enabled = True
         self.delayed_until: float | None = None
         self.delay_after_id: str | None = None
 
         self.monitor_id: str | None = None
-        self._visual_baseline = None
-        self._visual_start_delay = VISUAL_START_DELAY
+        self.idle_backend = idle_backend if idle_backend in IDLE_BACKENDS else IDLE_BACKEND
+        self._idle_source: IdleSource | None = None
+        if self.idle_backend == "native":
+            self._idle_source = create_idle_source()
+            if self._idle_source is None:
+                logger.info("No native idle counter in this session; using input hooks")
+                self.idle_backend = "events"
+            else:
+                logger.debug("Idle source: %s", self._idle_source.name)
+        self._wakeups = 0
+        self._monitored_seconds = 0.0
+        self._tick_scheduled_at: float | None = None
+        self.mouse_check_ms = max(1, int(mouse_check_ms))
+        self.cursor_hide_ms = max(CURSOR_HIDE_NEVER, int(cursor_hide_ms))
+        self._poll_interval_ms = self.mouse_check_ms
+        self._cursor_check_id: str | None = None
+        self._locked_at = 0.0
+        # Tiles are only touched on the channels' worker threads; the Tk side tracks windows by epoch
+        self._monitors: list[Monitor] = []
+        self._channels: list[MonitorChannel] = []
+        self._visual_grid = (*VISUAL_TILE_GRID, VISUAL_TILES_PER_CHECK)
+        self._monitor_settings: dict[str, dict] = {}
+        self._visual_epoch = 0
+        self._visual_pending = False
+        self._visual_has_baseline = False
+        self._visual_cadence = VisualCadence()
+        self._visual_next_due: float | None = None
+        self._stall_expected = 0.0
+        self._stall_worst = 0.0
+        self._stall_window_started = time.perf_counter()
+        self._visual_start_delay = max(1.0, timeout_seconds / 2)
         self._visual_change_threshold = VISUAL_CHANGE_THRESHOLD
         self._visual_margins = VISUAL_SAMPLE_MARGINS
+        self._exposure_dir = exposure_dir  # per-monitor burn-in exposure maps; None disables them
+        self._mask_dir = mask_dir  # learned visual masks, cached per monitor and resolution
+        self._visual_mask = VISUAL_MASK
         self.visual_detection_enabled = True
+        self._capture_backend_name: str | None = None
         self._last_toggle_time = 0.0
         self._on_unlock = on_unlock  # ← callback
-
-        self.ctrl_pressed = False
-        self.shift_pressed = False
-        self._key_listener = keyboard.Listener(
-            on_press=self._on_press,
-            on_release=self._on_release
-        )
-        self._key_listener.start()
+        self._on_event = on_event  # (name, **data) for control-socket subscribers; called from any thread
+
+        self._hotkeys = HotkeyEngine(HOTKEYS if hotkeys is None else hotkeys)
+        self._on_hotkey = on_hotkey  # runs bound actions on the Tk thread; toggle_lock is built in
+        self._key_listener = None  # pynput keyboard.Listener; pynput is imported when a listener starts
+        self._sync_key_listener()
+        self._mouse_listener = None  # pynput mouse.Listener
+        if self.idle_backend == "events":
+            self._start_mouse_listener()
         self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._refresh_monitors()  # also builds the withdrawn lock windows
 
         self._apply_timeout_settings(timeout_seconds)
         self.start_mouse_monitor()
+        if logger.isEnabledFor(logging.DEBUG):
+            self._schedule_stall_probe()
+
+    def _emit(self, event: str, **data):
+        if self._on_event is not None:
+            try:
+                self._on_event(event, **data)
+            except Exception as e:
+                logger.debug("Event callback error: %s", e)
+
+    def status(self) -> dict:
+        """Snapshot of the lock state for the control socket."""
+        self._consume_input()
+        now = time.time()
+        due = self._next_visual_due(now) if self.auto_lock_enabled and not self.locked else None
+        next_sample_in = round(max(0.0, due - now), 3) if due is not None else None
+        return {
+            "locked": self.locked,
+            "auto_lock_enabled": self.auto_lock_enabled,
+            "delayed_until": self.delayed_until,
+            "idle_seconds": round(max(0.0, now - self.last_activity_time), 3),
+            "timeout_seconds": self.timeout_seconds,
+            "idle_backend": self.idle_backend,
+            "idle_source": self._idle_source.name if self._idle_source else None,
+            "visual_detection_enabled": self.visual_detection_enabled,
+            "capture_backend": self._capture_backend_name,
+            "visual_cadence": {**self._visual_cadence.stats(), "next_sample_in": next_sample_in},
+            "monitors": [monitor.name for monitor in self._monitors],
+        }
+
+    def mask_status(self) -> dict:
+        """Learned visual mask per sampled monitor: mode, idle periods seen, proposed margins, ignored pixels."""
+        return {channel.monitor.name: channel.mask_status() for channel in self._channels}
 
     def _apply_timeout_settings(self, timeout_seconds: int):
         self.timeout_seconds = timeout_seconds
@@ -68,57 +171,184 @@ class ScreenLocker:
     def update_timeout(self, timeout_seconds: int):
         self._apply_timeout_settings(timeout_seconds)
 
+    def update_hotkeys(self, hotkeys: dict[str, str]):
+        """Recompiles bindings; the listener thread picks up the new engine on its next event."""
+        self._hotkeys = HotkeyEngine(hotkeys)
+        self._sync_key_listener()
+
+    def _sync_key_listener(self):
+        """The global keyboard hook runs only while something needs it: hotkeys or the events backend."""
+        wanted = bool(self._hotkeys) or self.idle_backend == "events"
+        if wanted and self._key_listener is None:
+            from pynput import keyboard
+
+            self._hotkeys.reset()  # keys held while no hook ran were never seen released
+            self._key_listener = keyboard.Listener(on_press=self._on_press, on_release=self._on_release)
+            self._key_listener.start()
+        elif not wanted and self._key_listener is not None:
+            self._key_listener.stop()
+            self._key_listener = None
+
     def _on_press(self, key):
-        if key in (keyboard.Key.ctrl_l, keyboard.Key.ctrl_r):
-            self.ctrl_pressed = True
-        elif key in (keyboard.Key.shift, keyboard.Key.shift_l, keyboard.Key.shift_r):
-            self.shift_pressed = True
-        else:
-            vk = getattr(key, 'vk', None)
-            if self.ctrl_pressed and self.shift_pressed and vk == 0x42:
-                self.root.after(0, self.toggle_lock)
+        action = self._hotkeys.press(key)
+        if action is not None:
+            self.root.after(0, self._run_hotkey, *action)
 
         if self.auto_lock_enabled and not self.locked:
-            self._mark_activity()
-            logger.debug("Key event: %s", key)
+            self._key_input_time = time.time()
 
     def _on_release(self, key):
-        if key in {keyboard.Key.ctrl_l, keyboard.Key.ctrl_r}:
-            self.ctrl_pressed = False
-        elif key in (keyboard.Key.shift, keyboard.Key.shift_l, keyboard.Key.shift_r):
-            self.shift_pressed = False
+        self._hotkeys.release(key)
+
+    def _run_hotkey(self, action: str, args: list):
+        logger.debug("Hotkey action: %s %s", action, args)
+        if self._on_hotkey is not None:
+            self._on_hotkey(action, args)
+        elif action == "toggle_lock":
+            self.toggle_lock()
+
+    def _start_mouse_listener(self):
+        """Subscribes to global mouse events; falls back to polling if hooks are unavailable."""
+        try:
+            from pynput import mouse
+
+            self._mouse_listener = mouse.Listener(
+                on_move=self._on_mouse_event,
+                on_click=self._on_mouse_event,
+                on_scroll=self._on_mouse_event
+            )
+            self._mouse_listener.start()
+        except Exception as e:
+            logger.warning("Mouse listener unavailable, falling back to polling: %s", e)
+            self._mouse_listener = None
+            self.idle_backend = "polling"
+
+    def _on_mouse_event(self, *_):
+        if self.auto_lock_enabled and not self.locked:
+            self._mouse_input_time = time.time()
+
+    def _consume_input(self):
+        """Tk thread: folds input recorded by the listener threads (or the native idle counter) into the
+        activity state.
+
+        Called once per check, so baseline invalidation, events and logging happen at most once per tick
+        however fast keys repeat.
+        """
+        latest = max(self._key_input_time, self._mouse_input_time)
+        if self._idle_source is not None:
+            idle = self._idle_source.idle_seconds()
+            if idle is not None:
+                native = time.time() - idle
+                if native - self.last_activity_time > NATIVE_IDLE_JITTER:
+                    latest = max(latest, native)
+        if latest <= self._input_seen:
+            return
+        self._input_seen = latest
+        if latest > self.last_activity_time:
+            logger.debug("Input activity %.1f s ago", time.time() - latest)
+            self._mark_activity(latest)
 
     def start_mouse_monitor(self):
         if self.monitor_id is None and self.auto_lock_enabled:
-            self.monitor_id = self.root.after(MOUSE_CHECK_TIMEOUT, self._monitor_mouse)
+            self._tick_scheduled_at = time.time()
+            self.monitor_id = self.root.after(self._next_check_delay_ms(), self._monitor_mouse)
+
+    def _next_check_delay_ms(self) -> int:
+        """Native and event backends sleep until the nearest deadline; polling backs off from mouse_check_ms.
 
+        Each quiet polling tick doubles the interval (up to MOUSE_CHECK_MAX_INTERVAL) but never sleeps
+        past the next deadline, so lock precision stays high while average wakeups drop.
+        """
+        now = time.time()
+        due = self.last_activity_time + self.timeout_seconds
+        visual_due = self._next_visual_due(now)
+        if visual_due is not None and visual_due > now:
+            due = min(due, visual_due)
+        remaining_ms = max(1, int((due - now) * 1000) + 1)
+        if self.idle_backend != "polling":
+            return remaining_ms
+        interval = max(self.mouse_check_ms, self._poll_interval_ms)
+        self._poll_interval_ms = min(max(MOUSE_CHECK_MAX_INTERVAL, self.mouse_check_ms), interval * 2)
+        return min(remaining_ms, interval)
+
+    def update_input_timing(self, mouse_check_ms: int, cursor_hide_ms: int):
+        """Applies polling floor and cursor-hide delay live, rescheduling pending timers."""
+        self.mouse_check_ms = max(1, int(mouse_check_ms))
+        self.cursor_hide_ms = max(CURSOR_HIDE_NEVER, int(cursor_hide_ms))
+        self._poll_interval_ms = self.mouse_check_ms
+        if self.monitor_id:
+            self.root.after_cancel(self.monitor_id)
+            self.monitor_id = None
+            self.start_mouse_monitor()
+        if self.locker_window is not None:
+            self._cancel_cursor_check()
+            self._schedule_cursor_check()
+
+    def _next_visual_due(self, now: float) -> float | None:
+        """When the next visual sample is wanted, or None if only the lock deadline matters."""
+        if not self._visual_available:
+            return None
+        start = self.last_activity_time + self._visual_start_delay
+        if now < start or self._visual_next_due is None:
+            return start
+        return self._visual_next_due
+
+    @span("monitor_tick")
     def _monitor_mouse(self):
         self.monitor_id = None
         if not self.auto_lock_enabled or self.locked:
             return
 
+        self._consume_input()
         now = time.time()
-        pos = self._safe_mouse_position()
-        if pos is None:
-            self.start_mouse_monitor()
-            return
+        self._count_wakeup(now)
+        if self.idle_backend == "polling":
+            pos = self._safe_mouse_position()
+            if pos is None:
+                self.start_mouse_monitor()
+                return
+            if self.last_mouse_position is None:
+                self.last_mouse_position = pos
+            elif pos != self.last_mouse_position:
+                logger.debug("Mouse moved: %s → %s", self.last_mouse_position, pos)
+                self.last_mouse_position = pos
+                self._mark_activity(now)
+                self.start_mouse_monitor()
+                return
 
-        if pos != self.last_mouse_position:
-            logger.debug("Mouse moved: %s → %s", self.last_mouse_position, pos)
-            self.last_mouse_position = pos
-            self._mark_activity(now)
-        else:
-            elapsed = now - self.last_activity_time
-            if elapsed >= self.timeout_seconds:
-                if self._visual_check(force=True):
-                    self.start_mouse_monitor()
-                    return
-                self.root.after(0, self.lock_screen)
+        elapsed = now - self.last_activity_time
+        if elapsed >= self.timeout_seconds:
+            if self._visual_pending:
+                self._tick_scheduled_at = now
+                self.monitor_id = self.root.after(VISUAL_PENDING_RETRY_MS, self._monitor_mouse)
                 return
-            self._maybe_schedule_visual_check(now)
+            if self._visual_check(force=True):
+                return  # the lock decision continues in _on_visual_result
+            self.root.after(0, self.lock_screen)
+            return
+        self._maybe_schedule_visual_check(now)
 
         self.start_mouse_monitor()
 
+    def _count_wakeup(self, now: float):
+        self._wakeups += 1
+        self._account_monitored_time(now)
+
+    def _account_monitored_time(self, now: float):
+        if self._tick_scheduled_at is not None:
+            self._monitored_seconds += max(0.0, now - self._tick_scheduled_at)
+            self._tick_scheduled_at = None
+
+    def wakeup_stats(self) -> dict:
+        """Returns monitor wakeup counters so idle backends can be compared."""
+        hours = self._monitored_seconds / 3600
+        return {
+            "backend": self.idle_backend,
+            "wakeups": self._wakeups,
+            "monitored_seconds": round(self._monitored_seconds, 1),
+            "wakeups_per_hour": round(self._wakeups / hours, 1) if hours else 0.0,
+        }
+
     def toggle_lock(self):
         """Triggers screen lock."""
         now = time.time()
@@ -130,48 +360,124 @@ class ScreenLocker:
         else:
             self.lock_screen()
 
+    def _prepare_lock_windows(self):
+        """Builds one fullscreen black window per monitor, withdrawn, and fits them to the current layout.
+
+        Locking then only maps, raises and grabs them; unlocking withdraws them again.
+        """
+        windows = [win for win in self._lock_windows if win.winfo_exists()]
+        while len(windows) > len(self._monitors):
+            windows.pop().destroy()
+        while len(windows) < len(self._monitors):
+            win = tk.Toplevel(self.root)
+            win.withdraw()
+            win.overrideredirect(True)
+            win.attributes('-topmost', True)
+            win.config(bg="black")
+            win.bind("<Button>", lambda e: self.unlock())
+            win.protocol("WM_DELETE_WINDOW", lambda: None)
+            win.bind('<Motion>', self.locked_mouse_motion)
+            win.bind('<Map>', self._on_lock_window_mapped)
+            windows.append(win)
+        for win, monitor in zip(windows, self._monitors):
+            win.geometry(f"{monitor.width}x{monitor.height}+{monitor.x}+{monitor.y}")
+        self._lock_windows = windows
+
+    def _on_lock_window_mapped(self, _event=None):
+        """Reports time-to-black: from the lock request until every lock window is actually mapped."""
+        if self._lock_started is None:
+            return
+        self._unmapped_windows -= 1
+        if self._unmapped_windows > 0:
+            return
+        elapsed = time.perf_counter() - self._lock_started
+        self._lock_started = None
+        if profiling.enabled:
+            profiling.record("time_to_black", elapsed)
+        logger.debug("Time to black: %.1f ms", elapsed * 1000)
+
+    def _set_lock_cursor(self, cursor: str):
+        for win in self._lock_windows:
+            win.config(cursor=cursor)
+
+    @span("lock_screen")
     def lock_screen(self):
-        """Creates fullscreen black window that locks the screen."""
+        """Shows the pre-built black windows that cover every monitor."""
         if self.locked:
             return
+        for channel in self._channels:
+            channel.locked_epoch = self._visual_epoch  # the mask learner keeps this window
         self._cancel_monitor()
+        if logger.isEnabledFor(logging.DEBUG):
+            stats = self.wakeup_stats()
+            logger.debug(
+                "Idle wakeups (%s): %s in %.0f s, %.1f/h",
+                stats["backend"], stats["wakeups"], stats["monitored_seconds"], stats["wakeups_per_hour"],
+            )
+            if self.visual_detection_enabled:
+                logger.debug("Visual cadence at lock: %s", self._visual_cadence.stats())
         logger.debug("Activating screen lock...")
         self.locked = True
-        win = tk.Toplevel(self.root)
-        win.overrideredirect(True)
-        win.attributes('-topmost', True)
-        win.config(bg="black")
-        win.bind("<Button>", lambda e: self.unlock())
-        win.geometry(f"{win.winfo_screenwidth()}x{win.winfo_screenheight()}+0+0")
-        win.protocol("WM_DELETE_WINDOW", lambda: None)
-        win.bind('<Motion>', self.locked_mouse_motion)
+        self._hotkeys.reset()  # the lock window's grab may swallow releases of the combination that locked
+        self._emit("lock")
+        self._lock_started = time.perf_counter()
+        if not self._lock_windows or not all(win.winfo_exists() for win in self._lock_windows):
+            self._prepare_lock_windows()
+        self._unmapped_windows = len(self._lock_windows)
+        self._set_lock_cursor('')
+        for win in self._lock_windows:
+            win.deiconify()
+            win.lift()
+        win = self._lock_windows[0]  # primary monitor
         win.grab_set()
         if is_taskbar_focused():
             win.focus_force()
-        win.after(CURSOR_HIDE_CHECK_TIMEOUT, self.check_cursor_visibility)
         self.locker_window = win
-        logger.debug("Lock window created.")
+        self._locked_at = time.time()
+        self._schedule_cursor_check()
+        logger.debug("Lock windows shown on %s monitor(s).", len(self._lock_windows))
 
     def locked_mouse_motion(self, event):
         """Handles mouse motion in locked mode – updates activity and shows cursor."""
         self._mark_activity()
         if self.locker_window and self.locker_window['cursor'] == 'none':
-            self.locker_window.config(cursor='')
+            self._set_lock_cursor('')
             logger.debug("Cursor shown due to mouse motion in locked mode.")
+            self._schedule_cursor_check()
+
+    def _schedule_cursor_check(self):
+        """Arms a single timer for the moment the cursor may be hidden (cursor_hide_ms after activity)."""
+        if self.locker_window is None or self._cursor_check_id or self.cursor_hide_ms == CURSOR_HIDE_NEVER:
+            return
+        since = max(self.last_activity_time, self._locked_at)
+        remaining = since + self.cursor_hide_ms / 1000 - time.time()
+        self._cursor_check_id = self.locker_window.after(
+            max(1, int(remaining * 1000) + 1), self.check_cursor_visibility
+        )
+
+    def _cancel_cursor_check(self):
+        if self._cursor_check_id and self.locker_window is not None:
+            try:
+                self.locker_window.after_cancel(self._cursor_check_id)
+            except Exception:
+                pass
+        self._cursor_check_id = None
 
     def check_cursor_visibility(self):
-        """Hides cursor if inactivity duration exceeds threshold."""
-        if self.locker_window is None:
+        """Hides cursor if inactivity duration exceeds threshold; otherwise re-arms for the remainder."""
+        self._cursor_check_id = None
+        if self.locker_window is None or self.locker_window['cursor'] == 'none':
+            return
+        elapsed = time.time() - max(self.last_activity_time, self._locked_at)
+        if elapsed * 1000 >= self.cursor_hide_ms:
+            self._set_lock_cursor('none')
+            logger.debug("Cursor hidden due to inactivity.")
             return
-        if self.locker_window['cursor'] != 'none':
-            elapsed = time.time() - self.last_activity_time
-            if elapsed * 1000 >= CURSOR_HIDE_CHECK_TIMEOUT:
-                self.locker_window.config(cursor='none')
-                logger.debug("Cursor hidden due to inactivity.")
-        self.locker_window.after(CURSOR_HIDE_CHECK_TIMEOUT, self.check_cursor_visibility)
+        self._schedule_cursor_check()
 
+    @span("unlock")
     def unlock(self):
-        """Unlocks the screen and removes the black window."""
+        """Unlocks the screen and withdraws the black windows for the next lock."""
         if not self.locker_window:
             return
         logger.debug("Unlocking screen...")
@@ -179,11 +485,18 @@ class ScreenLocker:
             self.locker_window.grab_release()
         except Exception as e:
             logger.debug("Error releasing grab: %s", e)
-        self.locker_window.destroy()
+        self._cancel_cursor_check()
+        for win in self._lock_windows:
+            win.withdraw()
         self.locker_window = None
         self.locked = False
+        self._lock_started = None
+        self._hotkeys.reset()
         self._mark_activity()
+        self._emit("unlock")
         logger.debug("Screen unlocked.")
+        # Off the lock path: picks up monitor changes made while locked
+        self._refresh_monitors()
 
         if self._on_unlock:
             try:
@@ -207,6 +520,7 @@ class ScreenLocker:
         if self.monitor_id:
             self.root.after_cancel(self.monitor_id)
             self.monitor_id = None
+            self._account_monitored_time(time.time())
         self._clear_visual_monitor()
 
     def toggle_auto_lock(self):
@@ -221,6 +535,7 @@ class ScreenLocker:
             self.start_mouse_monitor()
         else:
             self._cancel_monitor()
+        self._emit("auto_lock", enabled=self.auto_lock_enabled)
 
     def disable_auto_lock_for(self, seconds: int):
         """Disables auto-lock for the given number of seconds."""
@@ -231,6 +546,7 @@ class ScreenLocker:
 
         self.delay_after_id = self.root.after(seconds * 1000, self._reenable_auto_lock)
         logger.debug("Auto-lock DISABLED for %s s", seconds)
+        self._emit("pause", seconds=seconds, until=self.delayed_until)
 
     def _reenable_auto_lock(self):
         """Internal method — re-enables auto-lock."""
@@ -239,9 +555,20 @@ class ScreenLocker:
         self.delay_after_id = None
         logger.debug("Auto-lock re-enabled after delay")
         self.start_mouse_monitor()
+        self._emit("resume")
 
     def stop_listeners(self):
-        self._key_listener.stop()
+        if self._key_listener:
+            self._key_listener.stop()
+            self._key_listener = None
+        if self._mouse_listener:
+            self._mouse_listener.stop()
+        if self._idle_source is not None:
+            self._idle_source.close()
+            self._idle_source = None
+        for channel in self._channels:
+            channel.close(timeout=1.0)  # at exit: let the exposure maps and mask statistics reach the disk
+        self._channels = []
 
     def _on_close(self):
         self.stop_listeners()
@@ -249,100 +576,232 @@ class ScreenLocker:
 
     def _mark_activity(self, now: float | None = None):
         """Resets inactivity timers and cancels visual checks."""
-        self.last_activity_time = now if now is not None else time.time()
+        now = now if now is not None else time.time()
+        quiet = now - self.last_activity_time
+        self.last_activity_time = now
+        if quiet >= ACTIVITY_EVENT_GAP:  # report input resuming, not every mouse move
+            self._emit("activity", idle_seconds=round(quiet, 3))
+        self._poll_interval_ms = self.mouse_check_ms
         self._clear_visual_monitor()
 
     def _clear_visual_monitor(self):
-        """Drops visual baseline."""
-        self._visual_baseline = None
+        """Drops visual baselines; the sampler resets its tiles when it sees the new epoch.
+
+        A check still running belongs to the old epoch: it no longer blocks new checks and its result is dropped.
+        """
+        self._visual_epoch += 1
+        self._visual_pending = False
+        self._visual_has_baseline = False
+        self._visual_next_due = None
 
     def _maybe_schedule_visual_check(self, now: float):
-        """Triggers visual snapshot if inactivity exceeded the start delay."""
-        if (self.locked or not self.auto_lock_enabled or
-                not self.visual_detection_enabled or self._visual_baseline is not None):
+        """Triggers a visual sample once the start delay passed and the adaptive cadence says it is due."""
+        if self.locked or not self.auto_lock_enabled or not self._visual_available:
+            return
+        if now - self.last_activity_time < self._visual_start_delay:
             return
-        if now - self.last_activity_time >= self._visual_start_delay:
-            self._visual_check()
+        if self._visual_next_due is not None and now < self._visual_next_due:
+            return
+        deadline = self.last_activity_time + self.timeout_seconds
+        if self._visual_check():
+            self._visual_next_due = self._visual_cadence.next_due(now, deadline)
+        elif self._visual_pending:
+            # The previous sample is still running: retry soon instead of waiting for the deadline
+            self._visual_next_due = now + self._visual_cadence.base_interval / 2
+        else:
+            # No monitor can be sampled (e.g. none left after a monitor change): only the lock deadline matters
+            self._visual_next_due = deadline
+
+    @property
+    def _visual_available(self) -> bool:
+        """Visual detection is on and a capture backend was selected; otherwise no sample is ever taken."""
+        return self.visual_detection_enabled and self._capture_backend_name is not None
 
+    @span("visual_check")
     def _visual_check(self, force: bool = False) -> bool:
-        """Compares screenshots to detect motion; returns True if activity detected."""
+        """Queues background screenshot comparisons, one per monitor in parallel; True if they were submitted."""
         if (self.locked or not self.auto_lock_enabled or
-                not self.visual_detection_enabled):
+                not self.visual_detection_enabled or self._capture_backend_name is None):
             self._clear_visual_monitor()
             return False
+        if self._visual_pending:
+            return False
 
         now = time.time()
         elapsed = now - self.last_activity_time
-        if self._visual_baseline is None:
-            if elapsed < self._visual_start_delay:
-                return False
-            snapshot = self._capture_sample()
-            if snapshot is None:
-                return False
-            self._visual_baseline = snapshot
-            logger.debug("Visual baseline captured.")
-            return False
-
-        if not force and elapsed < self.timeout_seconds:
+        if not self._visual_has_baseline and elapsed < self._visual_start_delay:
             return False
 
-        snapshot = self._capture_sample()
-        if snapshot is None:
+        if not self._visual_has_baseline:
+            self._refresh_monitors()
+        channels = [channel for channel in self._channels if channel.has_backend]
+        if not channels:
             return False
+        epoch = self._visual_epoch
+        results: list[VisualResult | None] = []
+        results_lock = threading.Lock()
+
+        def _done(result):
+            with results_lock:
+                results.append(result)
+                finished = len(results) == len(channels)
+            if finished:
+                self.root.after(0, self._on_visual_result, merge_results(results), force, epoch)
+
+        self._visual_pending = True
+        for channel in channels:
+            if not channel.submit(epoch, force, now, _done):
+                _done(None)
+        return True
+
+    def _on_visual_result(self, result: VisualResult | None, force: bool, epoch: int):
+        """Tk thread: applies a sampling result unless activity made it stale."""
+        if epoch == self._visual_epoch:
+            self._visual_pending = False  # an older check's flag was already cleared with its epoch
+        if self.locked or not self.auto_lock_enabled:
+            return
+        self._consume_input()
+        if epoch != self._visual_epoch or (result is not None and self.last_activity_time > result.started):
+            logger.debug("Discarding stale visual result.")
+            if force:
+                self.start_mouse_monitor()
+            return
 
-        change_ratio = calc_change_ratio(self._visual_baseline, snapshot)
-        self._visual_baseline = snapshot
-        if logger.isEnabledFor(logging.DEBUG):
-            logger.debug(
-                "Visual change: %.2f%% / %.2f%%",
-                change_ratio * 100,
-                self._visual_change_threshold * 100,
-            )
-
-        if change_ratio >= self._visual_change_threshold:
-            self._mark_activity(now)
-            return True
-        return False
+        if result is not None:
+            self._visual_has_baseline = result.has_baseline
+            self._visual_cadence.record(result.score, result.started)
+            if result.active:
+                self._mark_activity(result.started)
+                if force:
+                    self._emit("visual_veto", score=round(result.score, 3))
+                    self.start_mouse_monitor()
+                return
+        if force:
+            self.lock_screen()
 
-    def _capture_sample(self):
-        """Takes a downscaled grayscale screenshot of the configured area to reduce CPU use."""
+    def _schedule_stall_probe(self):
+        self._stall_expected = time.perf_counter() + STALL_PROBE_MS / 1000
+        self.root.after(STALL_PROBE_MS, self._stall_probe)
+
+    def _stall_probe(self):
+        """Developer-mode heartbeat: tracks how late the Tk loop runs timers and logs the worst case."""
+        now = time.perf_counter()
+        self._stall_worst = max(self._stall_worst, now - self._stall_expected)
+        if now - self._stall_window_started >= STALL_REPORT_INTERVAL:
+            logger.debug("Worst Tk loop stall over %.0f s: %.1f ms",
+                         now - self._stall_window_started, self._stall_worst * 1000)
+            self._stall_worst = 0.0
+            self._stall_window_started = now
+        self._schedule_stall_probe()
+
+    @property
+    def has_capture_backend(self) -> bool:
+        return self._capture_backend_name is not None
+
+    def select_capture_backend(self, preferred: str | None) -> str | None:
+        """Picks the screenshot backend (benchmarking candidates if needed); returns its name.
+
+        Every sampled monitor then gets its own instance so captures can run in parallel.
+        """
+        channels = self._channels
+        box = channels[0].capture_box() if channels else apply_margins(self._monitors[0].box, self._visual_margins)
+        backend = select_backend(preferred, box, CAPTURE_BENCHMARK_SAMPLES)
+        self._capture_backend_name = backend.name if backend else None
+        if backend is not None:
+            backend.close()
+        for channel in channels:
+            self._attach_backend(channel)
+        return self._capture_backend_name
+
+    def _attach_backend(self, channel: MonitorChannel):
+        """The channel's worker thread opens its own instance; X11 and mss handles must not cross threads."""
+        name = self._capture_backend_name
+        channel.use_backend(partial(create_backend, name) if name else None)
+
+    def _refresh_monitors(self):
+        """Re-reads the monitor layout (at startup, after unlock and once per visual window).
+
+        On a change, the per-monitor channels are rebuilt and the withdrawn lock windows are refitted.
+        """
+        fallback = (self.root.winfo_screenwidth(), self.root.winfo_screenheight())
+        monitors = enumerate_monitors(fallback)
+        if monitors == self._monitors:
+            return
+        logger.info("Monitors: %s", ", ".join(f"{m.name} {m.width}x{m.height}+{m.x}+{m.y}" for m in monitors))
+        self._monitors = monitors
+        self._rebuild_channels()
+        if not self.locked:
+            self._prepare_lock_windows()
+
+    def _monitor_visual_settings(self, monitor: Monitor) -> tuple[bool, dict, float]:
+        """(enabled, margins, threshold) for a monitor: its own overrides on top of the global values."""
+        overrides = self._monitor_settings.get(monitor.name)
+        if not isinstance(overrides, dict):  # hand-edited settings.json: ignore what is not an override object
+            overrides = {}
+        enabled = bool(overrides.get("enabled", True))
+        margins = overrides.get("margins")
         try:
-            width = self.root.winfo_screenwidth()
-            height = self.root.winfo_screenheight()
-            margins = self._visual_margins or {}
-
-            def _ratio(key: str) -> float:
-                value = margins.get(key, 0.0)
-                try:
-                    return max(0.0, min(1.0, float(value)))
-                except (TypeError, ValueError):
-                    return 0.0
-
-            left_px = int(width * _ratio("left"))
-            right_px = int(width * _ratio("right"))
-            top_px = int(height * _ratio("top"))
-            bottom_px = int(height * _ratio("bottom"))
-
-            if left_px + right_px >= width:
-                left_px = 0
-                right_px = 0
-            if top_px + bottom_px >= height:
-                top_px = 0
-                bottom_px = 0
-
-            box_w = max(1, width - left_px - right_px)
-            box_h = max(1, height - top_px - bottom_px)
-            img = pyautogui.screenshot(region=(left_px, top_px, box_w, box_h))
-            scaled_w = 320 if box_w >= 320 else box_w
-            scaled_h = max(90, int(box_h * scaled_w / max(box_w, 1)))
-            return img.resize((scaled_w, scaled_h)).convert("L")
-        except Exception as e:
-            logger.debug("Visual sample failed: %s", e)
-            return None
+            margins = {**self._visual_margins, **{key: float(value) for key, value in margins.items()}}
+        except (AttributeError, TypeError, ValueError):
+            margins = self._visual_margins
+        try:
+            threshold = max(0.0, float(overrides.get("threshold", self._visual_change_threshold)))
+        except (TypeError, ValueError):
+            threshold = self._visual_change_threshold
+        return enabled, margins, threshold
+
+    def _rebuild_channels(self):
+        """Keeps one channel per monitor with visual detection enabled; excluded monitors are never captured."""
+        current = {channel.monitor.name: channel for channel in self._channels}
+        channels: list[MonitorChannel] = []
+        reset = False
+        for monitor in self._monitors:
+            enabled, margins, threshold = self._monitor_visual_settings(monitor)
+            if not enabled:
+                continue
+            channel = current.pop(monitor.name, None)
+            if channel is None:
+                channel = MonitorChannel(monitor, margins, threshold, self._visual_grid, self._exposure_dir,
+                                         self._mask_dir, self._visual_mask)
+                if self._capture_backend_name:
+                    self._attach_backend(channel)
+                reset = True
+            else:
+                reset |= channel.configure(monitor, margins, threshold, self._visual_grid, self._visual_mask)
+            channels.append(channel)
+        for channel in current.values():
+            channel.close()
+            reset = True
+        self._channels = channels
+        if reset:
+            self._clear_visual_monitor()
+
+    def update_visual_settings(
+            self,
+            enabled: bool,
+            margins: dict | None,
+            threshold: float | None,
+            tile_grid: tuple[int, int] | list[int] | None = None,
+            tiles_per_check: int | None = None,
+            monitors: dict[str, dict] | None = None,
+            mask: str | None = None
+    ):
+        """Updates runtime parameters for visual detection.
 
-    def update_visual_settings(self, enabled: bool, margins: dict | None, threshold: float | None):
-        """Updates runtime parameters for visual detection."""
+        ``monitors`` maps a monitor name to overrides of ``enabled``, ``margins`` and ``threshold``;
+        monitors with ``"enabled": false`` are still locked but never captured. ``mask`` is one of
+        ``VISUAL_MASK_MODES`` (learned static/periodic region mask).
+        """
         self.visual_detection_enabled = bool(enabled)
+        try:
+            cols, rows = tile_grid or VISUAL_TILE_GRID
+            self._visual_grid = (int(cols), int(rows), int(tiles_per_check or VISUAL_TILES_PER_CHECK))
+            if min(self._visual_grid) < 1:
+                raise ValueError(f"tile grid {self._visual_grid} has no tiles")
+        except (TypeError, ValueError):
+            self._visual_grid = (*VISUAL_TILE_GRID, VISUAL_TILES_PER_CHECK)
+        self._monitor_settings = monitors if isinstance(monitors, dict) else {}
+        self._visual_mask = mask if mask in VISUAL_MASK_MODES else VISUAL_MASK
         if margins:
             try:
                 self._visual_margins = {key: float(value) for key, value in margins.items()}
@@ -356,11 +815,20 @@ class ScreenLocker:
         except (TypeError, ValueError):
             self._visual_change_threshold = VISUAL_CHANGE_THRESHOLD
 
+        self._rebuild_channels()
         if not self.visual_detection_enabled:
             self._clear_visual_monitor()
 
     def _safe_mouse_position(self, default=None):
         """Reads cursor position without letting pyautogui exceptions crash the app."""
+        try:
+            # Imported on first poll: the event-driven idle backend never needs pyautogui. The import itself
+            # fails without a usable display (headless, some Wayland setups), so it is guarded like the query.
+            import pyautogui
+            pyautogui.FAILSAFE = False
+        except Exception as exc:
+            self._log_mouse_error("Mouse position unavailable", exc)
+            return default
         try:
             pos = pyautogui.position()
             coords = tuple(pos)
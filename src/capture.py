@@ -0,0 +1,588 @@
+from __future__ import annotations
+
+import logging
+
+logger = logging.getLogger(__name__)
+import ctypes
+import os
+import sys
+import time
+from typing import Callable, Dict, Iterable, Optional, Type
+
+from PIL import Image
+
+from .utils import load_numpy
+
+# (left, top, width, height) in screen pixels
+Box = tuple[int, int, int, int]
+
+CAPTURE_BACKENDS: Dict[str, Type["CaptureBackend"]] = {}
+
+
+def register_backend(name: str):
+    """Class decorator adding a capture backend to the registry under the given name."""
+
+    def _register(cls):
+        cls.name = name
+        CAPTURE_BACKENDS[name] = cls
+        return cls
+
+    return _register
+
+
+class CaptureBackend:
+    """Grabs a screen region as a PIL image; subclasses wrap a concrete screenshot API."""
+
+    name = "base"
+    auto_select = True  # participates in the startup benchmark
+
+    @classmethod
+    def available(cls) -> bool:
+        return True
+
+    def grab(self, box: Box) -> Image.Image:
+        raise NotImplementedError
+
+    def grab_raw(self, box: Box, out: bytearray) -> tuple[memoryview, int]:
+        """Returns BGRX pixels of the box and the row stride in bytes.
+
+        Backends that have to copy write into ``out`` (sized width * height * 4); zero-copy backends
+        return a view of their own memory instead. The default goes through ``grab``.
+        """
+        img = self.grab(box)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        data = img.tobytes("raw", "BGRX")
+        view = memoryview(out)[:len(data)]
+        view[:] = data
+        return view, box[2] * 4
+
+    def close(self) -> None:
+        pass
+
+
+@register_backend("pyautogui")
+class PyAutoGuiBackend(CaptureBackend):
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            import pyautogui  # noqa: F401
+        except Exception:
+            return False
+        return True
+
+    def __init__(self):
+        import pyautogui
+        self._pyautogui = pyautogui
+
+    def grab(self, box: Box) -> Image.Image:
+        return self._pyautogui.screenshot(region=box)
+
+
+@register_backend("mss")
+class MssBackend(CaptureBackend):
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            import mss  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def __init__(self):
+        import mss
+        self._sct = mss.mss()
+
+    def grab(self, box: Box) -> Image.Image:
+        left, top, width, height = box
+        shot = self._sct.grab({"left": left, "top": top, "width": width, "height": height})
+        return Image.frombuffer("RGB", shot.size, shot.bgra, "raw", "BGRX", 0, 1)
+
+    def grab_raw(self, box: Box, out: bytearray) -> tuple[memoryview, int]:
+        left, top, width, height = box
+        shot = self._sct.grab({"left": left, "top": top, "width": width, "height": height})
+        return memoryview(shot.raw), width * 4
+
+    def close(self) -> None:
+        self._sct.close()
+
+
+class _XImage(ctypes.Structure):
+    _fields_ = [
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int),
+        ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p),
+        ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int),
+        ("bitmap_bit_order", ctypes.c_int),
+        ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("bytes_per_line", ctypes.c_int),
+        ("bits_per_pixel", ctypes.c_int),
+        ("red_mask", ctypes.c_ulong),
+        ("green_mask", ctypes.c_ulong),
+        ("blue_mask", ctypes.c_ulong),
+    ]
+
+
+class _XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong),
+        ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p),
+        ("readOnly", ctypes.c_int),
+    ]
+
+
+_ALL_PLANES = 0xFFFFFFFF
+_Z_PIXMAP = 2
+
+
+def _find_library(name: str) -> str | None:
+    import ctypes.util  # pulls in subprocess and tempfile; only needed when probing the X11 backends
+    return ctypes.util.find_library(name)
+
+
+def _load_xlib():
+    path = _find_library("X11")
+    if not path:
+        raise OSError("libX11 not found")
+    xlib = ctypes.cdll.LoadLibrary(path)
+    xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    xlib.XOpenDisplay.restype = ctypes.c_void_p
+    xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+    xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+    xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+    xlib.XDefaultScreen.argtypes = [ctypes.c_void_p]
+    xlib.XDefaultVisual.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    xlib.XDefaultVisual.restype = ctypes.c_void_p
+    xlib.XDefaultDepth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    xlib.XGetImage.argtypes = [
+        ctypes.c_void_p, ctypes.c_ulong, ctypes.c_int, ctypes.c_int,
+        ctypes.c_uint, ctypes.c_uint, ctypes.c_ulong, ctypes.c_int,
+    ]
+    xlib.XGetImage.restype = ctypes.POINTER(_XImage)
+    xlib.XDestroyImage.argtypes = [ctypes.POINTER(_XImage)]
+    xlib.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    return xlib
+
+
+def _x11_available() -> bool:
+    return sys.platform.startswith("linux") and bool(os.environ.get("DISPLAY")) \
+        and _find_library("X11") is not None
+
+
+def _ximage_to_pil(ximage: _XImage, width: int, height: int) -> Image.Image:
+    if ximage.bits_per_pixel != 32:
+        raise OSError(f"Unsupported XImage depth: {ximage.bits_per_pixel} bpp")
+    data = ctypes.string_at(ximage.data, ximage.bytes_per_line * height)
+    return Image.frombuffer("RGB", (width, height), data, "raw", "BGRX", ximage.bytes_per_line, 1)
+
+
+@register_backend("xlib")
+class XlibBackend(CaptureBackend):
+    """Direct XGetImage on the root window through libX11."""
+
+    @classmethod
+    def available(cls) -> bool:
+        return _x11_available()
+
+    def __init__(self):
+        self._xlib = _load_xlib()
+        self._display = self._xlib.XOpenDisplay(None)
+        if not self._display:
+            raise OSError("Cannot open X display")
+        self._root = self._xlib.XDefaultRootWindow(self._display)
+
+    def grab(self, box: Box) -> Image.Image:
+        left, top, width, height = box
+        ptr = self._xlib.XGetImage(self._display, self._root, left, top, width, height, _ALL_PLANES, _Z_PIXMAP)
+        if not ptr:
+            raise OSError("XGetImage failed")
+        try:
+            return _ximage_to_pil(ptr.contents, width, height)
+        finally:
+            self._xlib.XDestroyImage(ptr)
+
+    def grab_raw(self, box: Box, out: bytearray) -> tuple[memoryview, int]:
+        left, top, width, height = box
+        ptr = self._xlib.XGetImage(self._display, self._root, left, top, width, height, _ALL_PLANES, _Z_PIXMAP)
+        if not ptr:
+            raise OSError("XGetImage failed")
+        try:
+            ximage = ptr.contents
+            if ximage.bits_per_pixel != 32:
+                raise OSError(f"Unsupported XImage depth: {ximage.bits_per_pixel} bpp")
+            row = width * 4
+            if ximage.bytes_per_line == row:
+                ctypes.memmove((ctypes.c_char * len(out)).from_buffer(out), ximage.data, row * height)
+            else:
+                dst = (ctypes.c_char * len(out)).from_buffer(out)
+                for y in range(height):
+                    ctypes.memmove(ctypes.addressof(dst) + y * row, ximage.data + y * ximage.bytes_per_line, row)
+            return memoryview(out)[:row * height], row
+        finally:
+            self._xlib.XDestroyImage(ptr)
+
+    def close(self) -> None:
+        if self._display:
+            self._xlib.XCloseDisplay(self._display)
+            self._display = None
+
+
+@register_backend("xshm")
+class XShmBackend(CaptureBackend):
+    """MIT-SHM capture: the X server writes pixels straight into a shared memory segment."""
+
+    _IPC_PRIVATE = 0
+    _IPC_CREAT = 0o1000
+    _IPC_RMID = 0
+
+    @classmethod
+    def available(cls) -> bool:
+        return _x11_available() and _find_library("Xext") is not None
+
+    def __init__(self):
+        self._xlib = _load_xlib()
+        self._xext = ctypes.cdll.LoadLibrary(_find_library("Xext"))
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._xext.XShmQueryExtension.argtypes = [ctypes.c_void_p]
+        self._xext.XShmCreateImage.argtypes = [
+            ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_char_p,
+            ctypes.POINTER(_XShmSegmentInfo), ctypes.c_uint, ctypes.c_uint,
+        ]
+        self._xext.XShmCreateImage.restype = ctypes.POINTER(_XImage)
+        self._xext.XShmAttach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        self._xext.XShmDetach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        self._xext.XShmGetImage.argtypes = [
+            ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XImage), ctypes.c_int, ctypes.c_int, ctypes.c_ulong,
+        ]
+        self._libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+        self._libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+        self._libc.shmat.restype = ctypes.c_void_p
+        self._libc.shmdt.argtypes = [ctypes.c_void_p]
+        self._libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+
+        self._display = self._xlib.XOpenDisplay(None)
+        if not self._display:
+            raise OSError("Cannot open X display")
+        if not self._xext.XShmQueryExtension(self._display):
+            self._xlib.XCloseDisplay(self._display)
+            self._display = None
+            raise OSError("MIT-SHM extension not available")
+        self._root = self._xlib.XDefaultRootWindow(self._display)
+        self._shminfo = _XShmSegmentInfo()
+        self._image = None
+        self._size: tuple[int, int] | None = None
+        self._view: memoryview | None = None
+
+    def _ensure_image(self, width: int, height: int):
+        if self._size == (width, height):
+            return
+        self._release_image()
+        screen = self._xlib.XDefaultScreen(self._display)
+        image = self._xext.XShmCreateImage(
+            self._display,
+            self._xlib.XDefaultVisual(self._display, screen),
+            self._xlib.XDefaultDepth(self._display, screen),
+            _Z_PIXMAP, None, ctypes.byref(self._shminfo), width, height,
+        )
+        if not image:
+            raise OSError("XShmCreateImage failed")
+        size = image.contents.bytes_per_line * height
+        shmid = self._libc.shmget(self._IPC_PRIVATE, size, self._IPC_CREAT | 0o600)
+        if shmid < 0:
+            self._xlib.XDestroyImage(image)
+            raise OSError(ctypes.get_errno(), "shmget failed")
+        addr = self._libc.shmat(shmid, None, 0)
+        if addr in (None, ctypes.c_void_p(-1).value):
+            self._libc.shmctl(shmid, self._IPC_RMID, None)
+            self._xlib.XDestroyImage(image)
+            raise OSError(ctypes.get_errno(), "shmat failed")
+        self._shminfo.shmid = shmid
+        self._shminfo.shmaddr = addr
+        self._shminfo.readOnly = 0
+        image.contents.data = addr
+        self._xext.XShmAttach(self._display, ctypes.byref(self._shminfo))
+        self._xlib.XSync(self._display, 0)
+        # Segment is freed automatically once both sides detach, even after a crash
+        self._libc.shmctl(shmid, self._IPC_RMID, None)
+        self._image = image
+        self._size = (width, height)
+        self._view = memoryview((ctypes.c_char * size).from_address(addr)).cast("B")
+
+    def _release_image(self):
+        if self._image is None:
+            return
+        self._view = None
+        self._xext.XShmDetach(self._display, ctypes.byref(self._shminfo))
+        self._xlib.XSync(self._display, 0)
+        self._libc.shmdt(self._shminfo.shmaddr)
+        # XDestroyImage must not free shared memory
+        self._image.contents.data = None
+        self._xlib.XDestroyImage(self._image)
+        self._image = None
+        self._size = None
+
+    def grab(self, box: Box) -> Image.Image:
+        left, top, width, height = box
+        self._ensure_image(width, height)
+        if not self._xext.XShmGetImage(self._display, self._root, self._image, left, top, _ALL_PLANES):
+            raise OSError("XShmGetImage failed")
+        return _ximage_to_pil(self._image.contents, width, height)
+
+    def grab_raw(self, box: Box, out: bytearray) -> tuple[memoryview, int]:
+        left, top, width, height = box
+        self._ensure_image(width, height)
+        if not self._xext.XShmGetImage(self._display, self._root, self._image, left, top, _ALL_PLANES):
+            raise OSError("XShmGetImage failed")
+        if self._image.contents.bits_per_pixel != 32:
+            raise OSError(f"Unsupported XImage depth: {self._image.contents.bits_per_pixel} bpp")
+        # Zero-copy: the reducer reads straight from the shared segment
+        return self._view, self._image.contents.bytes_per_line
+
+    def close(self) -> None:
+        if self._display:
+            self._release_image()
+            self._xlib.XCloseDisplay(self._display)
+            self._display = None
+
+
+@register_backend("fake")
+class FakeBackend(CaptureBackend):
+    """In-memory frames for tests and headless runs; never picked automatically."""
+
+    auto_select = False
+
+    def __init__(self, frames: Iterable[Image.Image] | Callable[[Box], Image.Image] | None = None):
+        self._source = frames if callable(frames) else None
+        self._frames = [] if frames is None or callable(frames) else list(frames)
+        self._raw_frames: list[bytes | None] = [None] * len(self._frames)
+        self._index = 0
+
+    def set_frames(self, frames: Iterable[Image.Image]) -> None:
+        self._frames = list(frames)
+        self._raw_frames = [None] * len(self._frames)
+        self._index = 0
+
+    def grab_raw(self, box: Box, out: bytearray) -> tuple[memoryview, int]:
+        if self._source is not None or not self._frames:
+            return super().grab_raw(box, out)
+        index = self._index % len(self._frames)
+        self._index += 1
+        frame = self._frames[index]
+        stride = frame.size[0] * 4
+        if self._raw_frames[index] is None:
+            # One spare row keeps every in-frame box view long enough for stride * height
+            self._raw_frames[index] = frame.convert("RGB").tobytes("raw", "BGRX") + bytes(stride)
+        left, top, width, height = box
+        if frame.size == (width, height):
+            left = top = 0
+        return memoryview(self._raw_frames[index])[top * stride + left * 4:], stride
+
+    def grab(self, box: Box) -> Image.Image:
+        left, top, width, height = box
+        if self._source is not None:
+            return self._source(box)
+        if not self._frames:
+            return Image.new("RGB", (width, height), "black")
+        frame = self._frames[self._index % len(self._frames)]
+        self._index += 1
+        if frame.size == (width, height):
+            return frame
+        return frame.crop((left, top, left + width, top + height))
+
+
+class FrameRing:
+    """Fixed-capacity store of the last K grayscale frames in one contiguous uint8 array of shape [K, H, W].
+
+    Captures are written in place into the slot returned by ``next_slot``; ``current`` and ``baseline`` are
+    slot indices, and ``frame(index)`` hands out cached views, so comparing frames never copies or allocates.
+    """
+
+    def __init__(self, capacity: int, height: int, width: int):
+        np = load_numpy()
+        self.capacity = max(2, int(capacity))
+        self.frames = np.zeros((self.capacity, height, width), dtype=np.uint8)
+        self._views = [self.frames[index] for index in range(self.capacity)]
+        self.current = -1
+        self.count = 0
+        # Scratch buffers for variance(), allocated on first use
+        self._sum: np.ndarray | None = None
+        self._sum_sq: np.ndarray | None = None
+        self._square: np.ndarray | None = None
+        self._variance: np.ndarray | None = None
+
+    @property
+    def baseline(self) -> int:
+        """Slot of the frame captured before ``current``, or -1 if there is none."""
+        return (self.current - 1) % self.capacity if self.count > 1 else -1
+
+    def next_slot(self) -> np.ndarray:
+        """Advances ``current`` and returns the view to write the new frame into."""
+        self.current = (self.current + 1) % self.capacity
+        self.count = min(self.capacity, self.count + 1)
+        return self._views[self.current]
+
+    def frame(self, index: int) -> np.ndarray:
+        return self._views[index]
+
+    def variance(self) -> np.ndarray | None:
+        """Per-pixel variance (float32, in grey levels squared) over the frames held, or None below two frames.
+
+        The result lives in a reused buffer and is overwritten by the next call.
+        """
+        if self.count < 2:
+            return None
+        np = load_numpy()
+        if self._sum is None:
+            shape = self.frames.shape[1:]
+            self._sum = np.empty(shape, dtype=np.float32)
+            self._sum_sq = np.empty(shape, dtype=np.float32)
+            self._square = np.empty(shape, dtype=np.float32)
+            self._variance = np.empty(shape, dtype=np.float32)
+        self._sum.fill(0)
+        self._sum_sq.fill(0)
+        for frame in self._views[:self.count]:
+            np.copyto(self._square, frame)  # widen once; mixed-dtype ufuncs would allocate cast buffers
+            self._sum += self._square
+            self._square *= self._square
+            self._sum_sq += self._square
+        # Var = E[x^2] - E[x]^2, all in place
+        scale = np.float32(1 / self.count)
+        self._sum *= scale
+        self._sum_sq *= scale
+        np.multiply(self._sum, self._sum, out=self._variance)
+        np.subtract(self._sum_sq, self._variance, out=self._variance)
+        np.maximum(self._variance, 0, out=self._variance)
+        return self._variance
+
+
+class CapturePlan:
+    """Capture box, integer reduction factor and output size, computed once per screen geometry and margins.
+
+    Captures land in a reused raw buffer (or the backend's own memory) and are box-reduced straight to
+    grayscale into the plan's FrameRing, so per-check allocations stay constant regardless of monitor
+    resolution.
+    """
+
+    TARGET_WIDTH = 320
+
+    def __init__(self, box: Box, factor: int, history: int = 2):
+        self.box = box
+        self.factor = max(1, int(factor))
+        self.size = (max(1, box[2] // self.factor), max(1, box[3] // self.factor))
+        self._raw: bytearray | None = None
+        self.ring: FrameRing | None = None
+        self._np = np = load_numpy()  # None: PIL-only reduce()
+        if np is not None:
+            width, height = self.size
+            self._luma = np.empty((height, width), dtype=np.uint16)
+            self._tmp = np.empty((height, width), dtype=np.uint16)
+            self.ring = FrameRing(history, height, width)
+
+    @classmethod
+    def factor_for(cls, width: int) -> int:
+        return max(1, width // cls.TARGET_WIDTH)
+
+    def capture(self, backend: CaptureBackend):
+        """Grabs the box and returns a grayscale frame (uint8 array, or PIL image without NumPy).
+
+        The returned array is a FrameRing slot and stays valid for ``history - 1`` further captures.
+        """
+        if self._raw is None:
+            self._raw = bytearray(self.box[2] * self.box[3] * 4)
+        buf, stride = backend.grab_raw(self.box, self._raw)
+        return self.reduce(buf, stride)
+
+    def reduce(self, buf, stride: int):
+        factor = self.factor
+        width, height = self.size
+        # BGRX bytes mapped as an RGBX image share memory with buf; only the reduced image is allocated
+        mapped = Image.frombuffer("RGBX", self.box[2:], buf, "raw", "RGBX", stride, 1)
+        small = mapped.reduce(factor, box=(0, 0, width * factor, height * factor))
+        np = self._np
+        if np is None:
+            return small.convert("RGB").convert("L", (0.114, 0.587, 0.299, 0))
+        bgrx = np.asarray(small)
+        # ITU-R BT.601 luma in 8.8 fixed point: (29 B + 150 G + 77 R) / 256
+        np.multiply(bgrx[..., 0], 29, out=self._luma, dtype=np.uint16)
+        np.multiply(bgrx[..., 1], 150, out=self._tmp, dtype=np.uint16)
+        self._luma += self._tmp
+        np.multiply(bgrx[..., 2], 77, out=self._tmp, dtype=np.uint16)
+        self._luma += self._tmp
+        out = self.ring.next_slot()
+        np.right_shift(self._luma, 8, out=out, casting="unsafe")
+        return out
+
+
+def create_backend(name: str) -> CaptureBackend | None:
+    """Instantiates a registered backend; returns None if it is unknown or unusable here."""
+    cls = CAPTURE_BACKENDS.get(name)
+    if cls is None or not cls.available():
+        return None
+    try:
+        return cls()
+    except Exception as e:
+        logger.debug("Capture backend %s failed to start: %s", name, e)
+        return None
+
+
+def measure_backend(backend: CaptureBackend, box: Box, samples: int) -> float:
+    """Returns the median latency in ms of one visual sample of ``box`` after a warm-up sample.
+
+    Times ``grab_raw`` plus the plan's reduction, the path ``MonitorChannel`` samples with, not ``grab``.
+    """
+    plan = CapturePlan(box, CapturePlan.factor_for(box[2]))
+    plan.capture(backend)
+    timings = []
+    for _ in range(max(1, samples)):
+        started = time.perf_counter()
+        plan.capture(backend)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def select_backend(preferred: str | None, box: Box, samples: int = 3) -> Optional[CaptureBackend]:
+    """Uses the preferred backend if it works, otherwise benchmarks all candidates and keeps the fastest."""
+    if preferred and preferred in CAPTURE_BACKENDS:
+        backend = create_backend(preferred)
+        if backend is not None:
+            try:
+                CapturePlan(box, CapturePlan.factor_for(box[2])).capture(backend)
+                return backend
+            except Exception as e:
+                logger.info("Capture backend %s unusable, re-benchmarking: %s", preferred, e)
+                backend.close()
+
+    best: CaptureBackend | None = None
+    best_ms = float("inf")
+    for name, cls in CAPTURE_BACKENDS.items():
+        if not cls.auto_select:
+            continue
+        backend = create_backend(name)
+        if backend is None:
+            logger.debug("Capture backend %s: unavailable", name)
+            continue
+        try:
+            latency = measure_backend(backend, box, samples)
+        except Exception as e:
+            logger.debug("Capture backend %s: failed (%s)", name, e)
+            backend.close()
+            continue
+        logger.info("Capture backend %s: %.1f ms per sample", name, latency)
+        if latency < best_ms:
+            if best is not None:
+                best.close()
+            best, best_ms = backend, latency
+        else:
+            backend.close()
+
+    if best is not None:
+        logger.info("Selected capture backend: %s", best.name)
+    else:
+        logger.warning("No working screen capture backend found")
+    return best
@@ -4,6 +4,7 @@ import os
 import platform
 import signal
 import sys
+import threading
 from copy import deepcopy
 from pathlib import Path
 from typing import Any, Dict
@@ -16,15 +17,20 @@ from src.localization import (
 )
 
 CURSOR_HIDE_CHECK_TIMEOUT = 5000  # ms
+CURSOR_HIDE_NEVER = -1  # cursor_hide_ms that keeps the cursor visible on the black screen; 0 hides it at once
 MIN_TOGGLE_INTERVAL = 0.3  # s Prevents back-to-back toggles when detecting activity to avoid visible flicker
-DEV_MODE = 'dev' in sys.argv
-TIMEOUT = 5 if DEV_MODE else 120
-SECONDS_IN_MINUTE = 1 if DEV_MODE else 60
+# Run-mode values below are defaults; init() overrides them from the command line
+DEV_MODE = False
+# `python black.py profile [seconds]` records spans, cProfile and tracemalloc for a fixed window
+PROFILE_MODE = False
+PROFILE_WINDOW = 120  # seconds
+TIMEOUT = 120
+SECONDS_IN_MINUTE = 60
 durations_in_minutes = [15, 30, 60, 120, 180, 240, 480, 720]
 
-# Visual activity detection (screenshots)
-VISUAL_START_DELAY = max(1, TIMEOUT // 2)  # seconds before first snapshot after inactivity
+# Visual activity detection (screenshots); sampling starts after half of the lock timeout
 VISUAL_CHANGE_THRESHOLD = 0.015  # 1.5% difference counts as movement
+VISUAL_PIXEL_DELTA = 16  # per-pixel brightness delta that counts a pixel as "changed" (debug stats)
 # Percentage offsets for screenshot region; allows excluding taskbar or title areas
 VISUAL_SAMPLE_MARGINS = {
     "top": 0.06,
@@ -32,18 +38,206 @@ VISUAL_SAMPLE_MARGINS = {
     "left": 0.05,
     "right": 0.05,
 }
+# Tile-grid detection: (columns, rows) of independently compared tiles; (1, 1) compares the whole zone
+VISUAL_TILE_GRID = (1, 1)
+VISUAL_TILES_PER_CHECK = 4  # tiles captured per check besides the ones that changed last time
+VISUAL_CHECK_INTERVAL = 2000  # ms between visual samples once the visual window opens (adaptive cadence base)
+VISUAL_HISTORY_SIZE = 16  # change scores remembered across idle windows to adapt the cadence
+VISUAL_STATIC_CYCLES = 6  # consecutive near-zero scores before sampling becomes sparse
+VISUAL_MOTION_CYCLES = 3  # consecutive scores above threshold that confirm sustained motion
+VISUAL_FRAME_HISTORY = 4  # reduced frames kept per tile in a preallocated ring (baseline slot, per-pixel variance)
+VISUAL_SIGNATURE_HISTORY = 8  # difference-hash signatures remembered per tile
+VISUAL_SIGNATURE_TOLERANCE = 4  # differing bits (of 64) under which two signatures are the same screen state
+VISUAL_PERIODIC_STATES = 3  # at most this many recurring states in the history marks a tile as a looping animation
+# Learned static/periodic mask: "off" uses the margins as set, "learn" only proposes a mask, "auto" applies it
+VISUAL_MASK_MODES = ("off", "learn", "auto")
+VISUAL_MASK = "off"
+VISUAL_MASK_MIN_WINDOWS = 20  # idle periods sampled before a mask is proposed
+VISUAL_MASK_PERIODIC_SHARE = 0.5  # pixels that changed in at least this share of idle periods tick on their own
+VISUAL_MASK_STATES = 16  # distinct states a region may cycle through and still count as periodic (clock digits)
+VISUAL_MASK_EDGE_SHARE = 0.97  # an edge row/column this static or periodic is cropped from the capture box
+VISUAL_MASK_MAX_MARGIN = 0.25  # learned crop per side, as a fraction of the monitor
+VISUAL_MASK_SAVE_WINDOWS = 5  # idle periods between writes of the learned statistics
+VISUAL_PENDING_RETRY_MS = 100  # lock deadline re-check while a background sample is still running
+STALL_PROBE_MS = 100  # Tk loop heartbeat used to report stalls in developer mode
+STALL_REPORT_INTERVAL = 60  # seconds between worst-stall debug reports
+# Screen capture backend name from src.capture registry; "auto" benchmarks candidates at startup
+CAPTURE_BACKEND = "auto"
+CAPTURE_BENCHMARK_SAMPLES = 3
 
-logging.basicConfig(
-    level=logging.DEBUG if DEV_MODE else logging.INFO,
-    format='%(asctime)s: %(message)s',
-    datefmt='%H:%M:%S'
-)
-logging.getLogger("PIL").setLevel(logging.WARNING)
-
-signal.signal(signal.SIGINT, signal.SIG_IGN)
-signal.signal(signal.SIGBREAK, signal.SIG_IGN)
 MOUSE_CHECK_TIMEOUT = 2000
-PID_FILE = os.path.expanduser("~/.screensaver_tray.pid")
+# Polling interval doubles on every quiet tick up to this cap, never overshooting the next deadline
+MOUSE_CHECK_MAX_INTERVAL = 16000  # ms
+# Idle detection engine: "events" uses input listeners plus one deadline timer,
+# "polling" compares the cursor position, starting every mouse_check_ms and backing off while idle
+IDLE_BACKENDS = ("native", "events", "polling")
+IDLE_BACKEND = "native"  # OS idle counter where available, else "events"
+NATIVE_IDLE_JITTER = 0.25  # s; input older than this relative to the last activity is not news
+# Key combination → action; actions are control commands ("disable_auto_lock_for 30" takes minutes)
+HOTKEYS = {"ctrl+shift+b": "toggle_lock"}
+HOTKEY_ACTIONS = ("toggle_lock", "toggle_auto_lock", "disable_auto_lock_for", "toggle_visual_detection")
+SETTINGS_SAVE_DELAY_MS = 500  # coalescing window for settings writes
+SETTINGS_RELOAD_DELAY_MS = 200  # coalescing window for external edits (editors write in several steps)
+ACTIVITY_EVENT_GAP = 1.0  # s of quiet after which input is published as an "activity" event
+JOURNAL_MAX_BYTES = 1 << 20  # journal.bin rotates at this size (65 536 records)
+JOURNAL_KEEP_FILES = 4  # rotated journals kept next to settings.json
+JOURNAL_FLUSH_INTERVAL = 5.0  # s the journal writer batches records before writing
+EXPOSURE_MAX_GAP = 600.0  # s; a tile sampled less often than this only counts this much time per sample
+EXPOSURE_FLUSH_INTERVAL = 300.0  # s between msync()s of the exposure maps (the OS writes back anyway)
+SETTINGS_POLL_INTERVAL = 2.0  # seconds between mtime checks where inotify is unavailable
+
+
+def parse_profile_window(argv: list[str]) -> int | None:
+    """Seconds requested by ``profile [N]`` (``PROFILE_WINDOW`` without N); None when not profiling."""
+    if 'profile' not in argv:
+        return None
+    profile_args = argv[argv.index('profile') + 1:]
+    return int(profile_args[0]) if profile_args and profile_args[0].isdigit() else PROFILE_WINDOW
+
+
+def _number(name: str, value: Any, minimum: float = 0.0, maximum: float | None = None) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{name} must be a number, got {value!r}")
+    if value < minimum or (maximum is not None and value > maximum):
+        raise ValueError(f"{name} must be within {minimum}..{maximum if maximum is not None else 'inf'}, got {value!r}")
+    return float(value)
+
+
+def _count(name: str, value: Any, minimum: int = 1) -> int:
+    if isinstance(value, bool) or not isinstance(value, int) or value < minimum:
+        raise ValueError(f"{name} must be an integer of at least {minimum}, got {value!r}")
+    return value
+
+
+def _margins(name: str, value: Any, base: Dict[str, float]) -> Dict[str, float]:
+    if not isinstance(value, dict) or not value:
+        raise ValueError(f"{name} must be an object with any of {sorted(VISUAL_SAMPLE_MARGINS)}, got {value!r}")
+    unknown = set(value) - set(VISUAL_SAMPLE_MARGINS)
+    if unknown:
+        raise ValueError(f"{name} has unknown zones {sorted(unknown)}")
+    margins = {**base, **{zone: _number(f"{name}.{zone}", share, 0.0, 1.0) for zone, share in value.items()}}
+    if margins["top"] + margins["bottom"] > 1.0 or margins["left"] + margins["right"] > 1.0:
+        raise ValueError(f"{name} leave nothing to sample: {margins}")
+    return margins
+
+
+def coerce_visual_settings(values: Dict[str, Any], margins: Dict[str, float]) -> Dict[str, Any]:
+    """Checks ``visual_*`` settings from outside the settings window (the control socket) like the window does.
+
+    ``margins`` are the current global margins that partial margin objects are completed from. Returns the
+    values in their stored form; raises ValueError naming the first rejected one.
+    """
+    coerced: Dict[str, Any] = {}
+    for key, value in values.items():
+        if key == "visual_monitor_enabled":
+            if not isinstance(value, bool):
+                raise ValueError(f"enabled must be true or false, got {value!r}")
+            coerced[key] = value
+        elif key == "visual_margins":
+            coerced[key] = _margins("margins", value, margins)
+        elif key == "visual_threshold":
+            coerced[key] = _number("threshold", value)
+        elif key == "visual_tile_grid":
+            if not isinstance(value, (list, tuple)) or len(value) != 2:
+                raise ValueError(f"tile_grid must be [columns, rows], got {value!r}")
+            coerced[key] = [_count("tile_grid columns", value[0]), _count("tile_grid rows", value[1])]
+        elif key == "visual_tiles_per_check":
+            coerced[key] = _count("tiles_per_check", value)
+        elif key == "visual_mask":
+            if value not in VISUAL_MASK_MODES:
+                raise ValueError(f"mask must be one of {list(VISUAL_MASK_MODES)}, got {value!r}")
+            coerced[key] = value
+        elif key == "visual_monitors":
+            if not isinstance(value, dict):
+                raise ValueError(f"monitors must map monitor names to overrides, got {value!r}")
+            monitors: Dict[str, Dict[str, Any]] = {}
+            for name, overrides in value.items():
+                if not isinstance(overrides, dict):
+                    raise ValueError(f"monitors.{name} must be an object, got {overrides!r}")
+                unknown = set(overrides) - {"enabled", "margins", "threshold"}
+                if unknown:
+                    raise ValueError(f"monitors.{name} has unknown keys {sorted(unknown)}")
+                checked: Dict[str, Any] = {}
+                if "enabled" in overrides:
+                    if not isinstance(overrides["enabled"], bool):
+                        raise ValueError(f"monitors.{name}.enabled must be true or false")
+                    checked["enabled"] = overrides["enabled"]
+                if "margins" in overrides:
+                    _margins(f"monitors.{name}.margins", overrides["margins"], coerced.get("visual_margins", margins))
+                    checked["margins"] = {zone: float(share) for zone, share in overrides["margins"].items()}
+                if "threshold" in overrides:
+                    checked["threshold"] = _number(f"monitors.{name}.threshold", overrides["threshold"])
+                monitors[str(name)] = checked
+            coerced[key] = monitors
+        else:
+            raise ValueError(f"unknown visual setting {key!r}")
+    return coerced
+
+
+def coerce_settings(values: Dict[str, Any], margins: Dict[str, float]) -> Dict[str, Any]:
+    """Checks the types of a settings.json object before any of it is applied.
+
+    ``values`` holds only keys that ``SettingsStore.to_dict`` writes. ``language``, ``idle_backend`` and
+    ``hotkeys`` keep their lenient fallbacks in ``SettingsStore.update``. Raises ValueError naming the first
+    rejected value.
+    """
+    coerced: Dict[str, Any] = {}
+    visual: Dict[str, Any] = {}
+    for key, value in values.items():
+        if key == "timeout_seconds":
+            coerced[key] = _count(key, value)
+        elif key == "mouse_check_ms":
+            coerced[key] = _count(key, value)
+        elif key == "cursor_hide_ms":
+            coerced[key] = _count(key, value, CURSOR_HIDE_NEVER)
+        elif key == "pause_minutes":
+            if not isinstance(value, list) or not value:
+                raise ValueError(f"pause_minutes must be a non-empty list of minutes, got {value!r}")
+            coerced[key] = [_count("pause_minutes", minutes, 0) for minutes in value]
+        elif key == "capture_backend":
+            if not isinstance(value, str):
+                raise ValueError(f"capture_backend must be a backend name, got {value!r}")
+            coerced[key] = value
+        elif key.startswith("visual_"):
+            visual[key] = value
+        else:
+            coerced[key] = value
+    coerced.update(coerce_visual_settings(visual, margins))
+    return coerced
+
+
+def instance_name() -> str:
+    """Lock/socket name; dev mode runs alongside a normal instance like its settings directory does."""
+    return f"black_screensaver{'_dev' if DEV_MODE else ''}"
+
+
+def init(argv: list[str] | None = None) -> None:
+    """Applies command-line run modes, configures logging and ignores console interrupts.
+
+    Called once by the entry point before the application modules are imported; importing this
+    module has no side effects.
+    """
+    global DEV_MODE, PROFILE_MODE, PROFILE_WINDOW, TIMEOUT, SECONDS_IN_MINUTE
+    argv = sys.argv if argv is None else argv
+    DEV_MODE = 'dev' in argv
+    profile_window = parse_profile_window(argv)
+    PROFILE_MODE = profile_window is not None
+    if PROFILE_MODE:
+        PROFILE_WINDOW = profile_window
+    TIMEOUT = 5 if DEV_MODE else 120
+    SECONDS_IN_MINUTE = 1 if DEV_MODE else 60
+    SettingsStore.timeout_seconds = TIMEOUT
+
+    logging.basicConfig(
+        level=logging.DEBUG if DEV_MODE else logging.INFO,
+        format='%(asctime)s: %(message)s',
+        datefmt='%H:%M:%S'
+    )
+    logging.getLogger("PIL").setLevel(logging.WARNING)
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(signal, "SIGBREAK"):  # Windows only
+        signal.signal(signal.SIGBREAK, signal.SIG_IGN)
 
 
 class SettingsStore:
@@ -56,6 +250,14 @@ class SettingsStore:
     visual_threshold = VISUAL_CHANGE_THRESHOLD
     visual_margins = deepcopy(VISUAL_SAMPLE_MARGINS)
     visual_monitor_enabled = True
+    visual_tile_grid = list(VISUAL_TILE_GRID)
+    visual_tiles_per_check = VISUAL_TILES_PER_CHECK
+    # Per-monitor overrides by monitor name: {"enabled": bool, "margins": {...}, "threshold": float}
+    visual_monitors: Dict[str, Dict[str, Any]] = {}
+    visual_mask = VISUAL_MASK
+    idle_backend = IDLE_BACKEND
+    hotkeys = deepcopy(HOTKEYS)
+    capture_backend = CAPTURE_BACKEND
     language = DEFAULT_LANGUAGE
 
     def __init__(self):
@@ -63,46 +265,112 @@ class SettingsStore:
             "APPDATA",
             Path.home() / ("AppData/Roaming" if platform.system() == "Windows" else ".config"))
         ) / f"black_screensaver{'_dev' if DEV_MODE else ''}" / "settings.json"
+        self._save_timer: threading.Timer | None = None
+        self._save_lock = threading.Lock()
 
-        settings_data: Dict[str, Any] | None = None
         file_exists = self.path.exists()
+        self._load()
+        if not file_exists:
+            self.language = detect_system_language(DEFAULT_LANGUAGE)
+
+    def _load(self) -> set[str]:
+        """Applies settings.json on top of the current values; returns the keys that changed."""
         try:
-            if file_exists:
-                with self.path.open("r", encoding="utf-8") as fh:
-                    settings_data = json.load(fh)
-                if isinstance(settings_data, dict):
-                    self.update(settings_data)
+            with self.path.open("r", encoding="utf-8") as fh:
+                settings_data = json.load(fh)
         except FileNotFoundError:
-            pass
+            return set()
         except Exception as exc:
             print(f"Failed to load settings file {self.path}: {exc}")
+            return set()
+        try:
+            return self.update(settings_data) if isinstance(settings_data, dict) else set()
+        except ValueError as exc:
+            logging.getLogger(__name__).warning("Ignoring settings file %s, keeping current values: %s",
+                                                self.path, exc)
+            return set()
 
-        if not file_exists:
-            self.language = detect_system_language(DEFAULT_LANGUAGE)
+    def reload(self) -> set[str]:
+        """Re-reads the file after an external edit; returns the keys whose values changed.
+
+        A pending delayed save holds newer values than the file and is left to overwrite it.
+        """
+        if self._save_timer is not None:
+            return set()
+        changed = self._load()
+        if changed:
+            logging.getLogger(__name__).info("Settings reloaded from %s: %s", self.path, ", ".join(sorted(changed)))
+        return changed
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "timeout_seconds": self.timeout_seconds,
+            "mouse_check_ms": self.mouse_check_ms,
+            "cursor_hide_ms": self.cursor_hide_ms,
+            "pause_minutes": list(self.pause_minutes),
+            "visual_threshold": self.visual_threshold,
+            "visual_margins": self.visual_margins,
+            "visual_monitor_enabled": self.visual_monitor_enabled,
+            "visual_tile_grid": list(self.visual_tile_grid),
+            "visual_tiles_per_check": self.visual_tiles_per_check,
+            "visual_monitors": self.visual_monitors,
+            "visual_mask": self.visual_mask,
+            "idle_backend": self.idle_backend,
+            "hotkeys": self.hotkeys,
+            "capture_backend": self.capture_backend,
+            "language": self.language,
+        }
 
     def save(self) -> None:
-        """Persists current settings to disk."""
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        with self.path.open("w", encoding="utf-8") as fh:
-            json.dump({
-                "timeout_seconds": self.timeout_seconds,
-                "mouse_check_ms": self.mouse_check_ms,
-                "cursor_hide_ms": self.cursor_hide_ms,
-                "pause_minutes": list(self.pause_minutes),
-                "visual_threshold": self.visual_threshold,
-                "visual_margins": self.visual_margins,
-                "visual_monitor_enabled": self.visual_monitor_enabled,
-                "language": self.language,
-            }, fh, indent=2, ensure_ascii=True)
-
-    def update(self, values: Dict[str, Any]) -> None:
+        """Persists current settings to disk atomically: a crash leaves either the old or the new file."""
+        with self._save_lock:
+            self._cancel_pending_save()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+            with tmp_path.open("w", encoding="utf-8") as fh:
+                json.dump(self.to_dict(), fh, indent=2, ensure_ascii=True)
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp_path, self.path)
+
+    def save_later(self, delay_ms: int = SETTINGS_SAVE_DELAY_MS) -> None:
+        """Coalesces saves: rapid successive calls produce one write ``delay_ms`` after the last one."""
+        with self._save_lock:
+            self._cancel_pending_save()
+            self._save_timer = threading.Timer(delay_ms / 1000, self.save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self) -> None:
+        """Writes a pending delayed save now (e.g. before exit)."""
+        if self._save_timer is not None:
+            self.save()
+
+    def _cancel_pending_save(self):
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+
+    def update(self, values: Dict[str, Any]) -> set[str]:
+        """Applies known keys; returns the ones whose value actually changed.
+
+        All values are checked first (``coerce_settings``), so a ValueError leaves every setting as it was.
+        """
         if not isinstance(values, dict):
-            return
-        for key, value in values.items():
-            if not hasattr(self, key):
-                continue
+            return set()
+        known = self.to_dict()
+        changed: set[str] = set()
+        values = {key: value for key, value in values.items() if key in known}
+        for key, value in coerce_settings(values, self.visual_margins).items():
             if key == "language":
                 normalized = normalize_language_code(value if isinstance(value, str) else None)
-                setattr(self, key, normalized if normalized in SUPPORTED_LANGUAGES else DEFAULT_LANGUAGE)
-            else:
-                setattr(self, key, value)
+                value = normalized if normalized in SUPPORTED_LANGUAGES else DEFAULT_LANGUAGE
+            elif key == "idle_backend":
+                value = value if value in IDLE_BACKENDS else IDLE_BACKEND
+            elif key == "hotkeys":
+                value = {str(combo): str(action) for combo, action in value.items()} if isinstance(
+                    value, dict) else deepcopy(HOTKEYS)
+            if getattr(self, key) != value:
+                changed.add(key)
+            setattr(self, key, value)
+        return changed
@@ -0,0 +1,206 @@
+import logging
+
+logger = logging.getLogger(__name__)
+import json
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Callable
+
+from .instance import LineConnection, Message, SingleInstance, connect
+
+SUBSCRIBER_QUEUE = 256  # events buffered per subscriber; a stalled reader loses the oldest ones
+COMMAND_TIMEOUT = 5.0  # s a command may wait for the Tk loop
+
+
+class Subscription:
+    """Bounded event queue of one subscriber; publishing never blocks on a slow reader."""
+
+    __slots__ = ("events", "dropped", "closed", "_cond")
+
+    def __init__(self, capacity: int):
+        self.events: deque[Message] = deque(maxlen=capacity)
+        self.dropped = 0
+        self.closed = False
+        self._cond = threading.Condition(threading.Lock())
+
+    def put(self, event: Message):
+        with self._cond:
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append(event)
+            self._cond.notify()
+
+    def take(self, timeout: float | None = None) -> tuple[list[Message], int]:
+        """Waits for events; returns them with the number dropped since the last call."""
+        with self._cond:
+            if not self.events and not self.closed:
+                self._cond.wait(timeout)
+            events = list(self.events)
+            self.events.clear()
+            dropped, self.dropped = self.dropped, 0
+        return events, dropped
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+
+class EventHub:
+    """Fans events out to every subscriber's queue; safe to call from any thread."""
+
+    def __init__(self, capacity: int = SUBSCRIBER_QUEUE):
+        self.capacity = capacity
+        self._subscribers: tuple[Subscription, ...] = ()  # replaced, never mutated, so publish needs no lock
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.capacity)
+        with self._lock:
+            self._subscribers = self._subscribers + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.close()
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s is not subscription)
+
+    def publish(self, event: str, **data):
+        subscribers = self._subscribers
+        if not subscribers:
+            return
+        message = {"event": event, "time": round(time.time(), 3), **data}
+        for subscription in subscribers:
+            subscription.put(message)
+
+    def close(self):
+        with self._lock:
+            subscribers, self._subscribers = self._subscribers, ()
+        for subscription in subscribers:
+            subscription.close()
+
+
+class ControlServer:
+    """Line-delimited JSON commands on the instance socket.
+
+    Requests look like ``{"cmd": "toggle_lock"}`` and get ``{"ok": true, "result": ...}`` or
+    ``{"ok": false, "error": "..."}``. Commands run on the Tk thread via ``schedule`` (``root.after``); the
+    connection threads only wait for them. ``{"cmd": "subscribe"}`` turns the connection into an event
+    stream that each subscriber's own connection thread writes, so many readers never touch the Tk loop.
+    ``background`` commands (e.g. disk queries) run on the connection thread instead, keeping I/O off Tk.
+    """
+
+    def __init__(self, schedule: Callable[[Callable[[], None]], Any],
+                 commands: dict[str, Callable[..., Any]], hub: EventHub,
+                 background: dict[str, Callable[..., Any]] | None = None):
+        self.schedule = schedule
+        self.commands = commands
+        self.background = background or {}
+        self.hub = hub
+
+    def handle(self, request: Message, conn: LineConnection) -> Message | None:
+        cmd = request.get("cmd")
+        if cmd == "subscribe":
+            self._stream(conn)
+            return None
+        args = {key: value for key, value in request.items() if key != "cmd"}
+        if cmd in self.background:
+            try:
+                return {"ok": True, "result": self.background[cmd](**args)}
+            except Exception as e:
+                return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        command = self.commands.get(cmd)
+        if command is None:
+            return {"ok": False, "error": f"unknown command: {cmd!r}",
+                    "commands": sorted([*self.commands, *self.background, "subscribe"])}
+        try:
+            return {"ok": True, "result": self._call_on_tk(command, args)}
+        except Exception as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    def _call_on_tk(self, command: Callable[..., Any], args: dict):
+        done = threading.Event()
+        outcome: dict[str, Any] = {}
+
+        def _run():
+            try:
+                outcome["result"] = command(**args)
+            except Exception as e:
+                outcome["error"] = e
+            finally:
+                done.set()
+
+        self.schedule(_run)
+        if not done.wait(COMMAND_TIMEOUT):
+            raise TimeoutError("the application did not respond")
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome.get("result")
+
+    def _stream(self, conn: LineConnection):
+        subscription = self.hub.subscribe()
+        try:
+            conn.send({"ok": True, "result": "subscribed"})
+            while not subscription.closed:
+                events, dropped = subscription.take(timeout=30.0)
+                if dropped:
+                    conn.send({"event": "dropped", "count": dropped})
+                for event in events:
+                    conn.send(event)
+        except OSError:
+            pass  # subscriber went away
+        finally:
+            self.hub.unsubscribe(subscription)
+
+
+def _parse_value(raw: str):
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+
+def build_request(args: list[str]) -> Message:
+    """``toggle_lock`` / ``disable_auto_lock_for 15`` / ``update_visual_settings threshold=0.03`` → a request."""
+    if not args:
+        raise ValueError("missing command")
+    request: Message = {"cmd": args[0]}
+    for arg in args[1:]:
+        key, sep, value = arg.partition("=")
+        if sep:
+            request[key] = _parse_value(value)
+        elif args[0] == "disable_auto_lock_for" and "minutes" not in request:
+            request["minutes"] = _parse_value(arg)
+        else:
+            raise ValueError(f"expected key=value, got {arg!r}")
+    return request
+
+
+def run_client(name: str, args: list[str]) -> int:
+    """``black.py ctl ...``: sends one command (or subscribes) and prints the JSON replies."""
+    try:
+        request = build_request(args)
+    except ValueError as e:
+        print(f"usage: black.py [dev] ctl <command> [key=value ...]: {e}", file=sys.stderr)
+        return 2
+    streaming = request["cmd"] == "subscribe"
+    try:
+        conn = connect(SingleInstance(name).address, timeout=None if streaming else COMMAND_TIMEOUT * 2)
+    except OSError as e:
+        print(f"black screensaver is not running: {e}", file=sys.stderr)
+        return 1
+    try:
+        conn.send(request)
+        while True:
+            reply = conn.recv()
+            if reply is None:
+                return 0
+            print(json.dumps(reply), flush=True)
+            if not streaming:
+                return 0 if reply.get("ok") else 1
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        conn.close()
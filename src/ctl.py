@@ -0,0 +1,12 @@
+from src import config
+from src.control import run_client
+
+
+def main(argv: list[str]) -> int:
+    """``black.py [dev] ctl <command> [key=value ...]`` without the tray app's GUI imports.
+
+    Runs over SSH, from cron or on a headless session, so only config and the socket client are loaded.
+    """
+    ctl_index = argv.index("ctl")
+    config.DEV_MODE = "dev" in argv[:ctl_index]
+    return run_client(config.instance_name(), argv[ctl_index + 1:])
@@ -0,0 +1,137 @@
+import logging
+
+logger = logging.getLogger(__name__)
+import time
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+from src.config import EXPOSURE_FLUSH_INTERVAL, EXPOSURE_MAX_GAP
+from .capture import CapturePlan
+from .monitors import Monitor
+from .utils import load_numpy
+
+
+def map_path(directory: Path, monitor: Monitor, factor: int) -> Path:
+    """``DP-1-2560x1440-8.npy``: one map per monitor, resolution and reduction factor."""
+    return Path(directory) / f"{monitor.slug}-{factor}.npy"
+
+
+def _open_grid(np, path: Path, shape: tuple[int, int]):
+    if path.exists():
+        try:
+            grid = np.lib.format.open_memmap(path, mode="r+")
+            if grid.shape == shape and grid.dtype == np.float32:
+                return grid
+            logger.warning("Exposure map %s is %s %s, expected %s float32; starting over",
+                           path, grid.shape, grid.dtype, shape)
+            del grid
+        except (OSError, ValueError) as e:
+            logger.warning("Exposure map %s is unreadable (%s); starting over", path, e)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=shape)
+
+
+class ExposureMap:
+    """Cumulative burn-in exposure of one monitor: luminance (0..1) × seconds, per sample pixel, in float32.
+
+    The grid covers the whole monitor at the capture plans' reduction factor and is a memory-mapped ``.npy``
+    file, so totals survive restarts and readers can ``numpy.load`` it while it grows. Each tile sample adds
+    its frame weighted by the time since that tile's previous sample in the same visual window, capped at
+    ``EXPOSURE_MAX_GAP``. Only the worker thread of the monitor's channel writes.
+    """
+
+    def __init__(self, path: Path, monitor: Monitor, plans: list[CapturePlan]):
+        np = load_numpy()
+        if np is None:
+            raise ValueError("exposure maps need NumPy")
+        self._np = np
+        self.path = Path(path)
+        self.plans = plans
+        factor = plans[0].factor
+        self.grid = _open_grid(np, self.path, (max(1, monitor.height // factor), max(1, monitor.width // factor)))
+        self._views = []
+        self._scratch = []
+        for plan in plans:
+            x = (plan.box[0] - monitor.x) // factor
+            y = (plan.box[1] - monitor.y) // factor
+            width, height = plan.size
+            view = self.grid[y:y + height, x:x + width]
+            if x < 0 or y < 0 or view.shape != (height, width):
+                raise ValueError(f"tile {plan.box} lies outside {monitor.name}")
+            self._views.append(view)
+            self._scratch.append(np.empty((height, width), dtype=np.float32))
+        self._sampled_at: list[float | None] = [None] * len(plans)
+        self._flushed_at = time.monotonic()
+
+    def restart(self):
+        """Starts a new visual window: the next sample of each tile only sets its clock."""
+        self._sampled_at = [None] * len(self._sampled_at)
+
+    def add(self, index: int, frame, now: float):
+        """Accumulates the grayscale ``frame`` of tile ``index``, captured at ``now`` (monotonic seconds)."""
+        previous, self._sampled_at[index] = self._sampled_at[index], now
+        if previous is None:
+            return
+        seconds = min(now - previous, EXPOSURE_MAX_GAP)
+        if seconds <= 0:
+            return
+        np = self._np
+        scratch = self._scratch[index]
+        view = self._views[index]
+        np.multiply(frame, seconds / 255, out=scratch, dtype=np.float32)
+        np.add(view, scratch, out=view)
+
+    def flush_if_due(self, now: float):
+        if now - self._flushed_at >= EXPOSURE_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        self._flushed_at = time.monotonic()
+        try:
+            self.grid.flush()
+        except (OSError, ValueError) as e:
+            logger.debug("Exposure map flush failed for %s: %s", self.path, e)
+
+    def close(self):
+        self.flush()
+        self._views = []
+        self._scratch = []
+
+
+def load_maps(directory: Path) -> list[tuple[str, object]]:
+    """Read-only memory maps of every exposure map in ``directory`` as ``(name, array)``, sorted by name."""
+    np = load_numpy()
+    directory = Path(directory)
+    if np is None or not directory.is_dir():
+        return []
+    maps = []
+    for path in sorted(directory.glob("*.npy")):
+        try:
+            maps.append((path.stem, np.load(path, mmap_mode="r")))
+        except (OSError, ValueError) as e:
+            logger.debug("Skipping exposure map %s: %s", path, e)
+    return maps
+
+
+def render_heatmap(grid) -> Image.Image:
+    """Colours a map black → red → yellow relative to its own peak; RGB at the map's resolution."""
+    np = load_numpy()
+    peak = float(grid.max()) if grid.size else 0.0
+    scaled = np.zeros(grid.shape, dtype=np.uint8)
+    if peak > 0:
+        np.multiply(grid, 255 / peak, out=scaled, casting="unsafe")
+    return ImageOps.colorize(Image.fromarray(scaled), black="black", white="yellow", mid="red")
+
+
+def export_maps(directory: Path, target: Path) -> list[Path]:
+    """Writes ``<map>.npy`` (raw luminance-seconds) and ``<map>.png`` (heatmap) for every map; returns the files."""
+    np = load_numpy()
+    written: list[Path] = []
+    for name, grid in load_maps(directory):
+        target.mkdir(parents=True, exist_ok=True)
+        npy, png = target / f"{name}.npy", target / f"{name}.png"
+        np.save(npy, np.asarray(grid))
+        render_heatmap(grid).save(png)
+        written += [npy, png]
+    return written
@@ -0,0 +1,140 @@
+import logging
+
+logger = logging.getLogger(__name__)
+import sys
+
+# Sided and generic pynput modifier names collapse to one name each
+_MODIFIER_ALIASES = {
+    "ctrl": "ctrl", "ctrl_l": "ctrl", "ctrl_r": "ctrl", "control": "ctrl",
+    "shift": "shift", "shift_l": "shift", "shift_r": "shift",
+    "alt": "alt", "alt_l": "alt", "alt_r": "alt", "alt_gr": "alt", "option": "alt",
+    "cmd": "cmd", "cmd_l": "cmd", "cmd_r": "cmd", "win": "cmd", "super": "cmd", "meta": "cmd", "command": "cmd",
+}
+MODIFIERS = ("ctrl", "shift", "alt", "cmd")
+_NAME_ALIASES = {"escape": "esc", "return": "enter", "del": "delete", "pgup": "page_up", "pgdn": "page_down"}
+# pynput ``Key`` members that can take part in a binding (function keys are matched by pattern)
+_NAMED_KEYS = frozenset({
+    "backspace", "caps_lock", "delete", "down", "end", "enter", "esc", "home", "insert", "left", "menu",
+    "num_lock", "page_down", "page_up", "pause", "print_screen", "right", "scroll_lock", "space", "tab", "up",
+})
+_WINDOWS = sys.platform == "win32"
+
+
+def normalize_name(name: str) -> str:
+    """Canonical key name: ``ctrl_r`` → ``ctrl``, ``Escape`` → ``esc``, ``B`` → ``b``."""
+    name = name.strip().lower()
+    return _MODIFIER_ALIASES.get(name) or _NAME_ALIASES.get(name, name)
+
+
+def key_name(key) -> str | None:
+    """Platform-neutral name of a pynput ``Key``/``KeyCode`` (duck-typed), or None if it has none.
+
+    Windows reports virtual-key codes and control characters while Ctrl is held (Ctrl+B → ``"\\x02"``);
+    X11 reports keysyms, which are Latin-1 code points for printable keys. Both end up as ``"b"``.
+    """
+    name = getattr(key, "name", None)
+    if name is not None:  # Key enum member
+        return normalize_name(name)
+    char = getattr(key, "char", None)
+    if char:
+        code = ord(char[0])
+        if 1 <= code <= 26:
+            return chr(code + 96)  # Ctrl+letter control character
+        if char.isprintable():
+            return char.lower()
+    vk = getattr(key, "vk", None)
+    if vk is None:
+        return None
+    if _WINDOWS:
+        if 0x30 <= vk <= 0x39 or 0x41 <= vk <= 0x5A:
+            return chr(vk).lower()
+        if 0x70 <= vk <= 0x87:
+            return f"f{vk - 0x6F}"
+        return None
+    if 0x20 < vk < 0x7F:
+        return chr(vk).lower()
+    return None
+
+
+def parse_combo(combo: str) -> frozenset[str]:
+    """``"Ctrl+Shift+B"`` → ``{"ctrl", "shift", "b"}``; raises ValueError for unknown or missing keys."""
+    names = [normalize_name(part) for part in combo.split("+")]
+    if not all(names):
+        raise ValueError(f"empty key in {combo!r}")
+    for name in names:
+        if (name not in MODIFIERS and name not in _NAMED_KEYS and len(name) != 1
+                and not (name[0] == "f" and name[1:].isdigit())):
+            raise ValueError(f"unknown key {name!r} in {combo!r}")
+    if all(name in MODIFIERS for name in names):
+        raise ValueError(f"{combo!r} has only modifiers")
+    return frozenset(names)
+
+
+def parse_action(action: str) -> tuple[str, list]:
+    """``"disable_auto_lock_for 30"`` → ``("disable_auto_lock_for", [30])``."""
+    name, *args = action.split()
+    return name, [int(arg) if arg.lstrip("-").isdigit() else arg for arg in args]
+
+
+class HotkeyEngine:
+    """Matches key events against bindings compiled into pressed-key bitmasks.
+
+    Every key that appears in a binding (plus the four modifiers) owns one bit; a press ORs it in, a release
+    clears it, and a binding fires when the mask equals its own, so matching is a dict lookup per event.
+    Keys outside every binding are ignored. Runs on the pynput thread, so the hot path only touches
+    per-key caches and ints.
+    """
+
+    def __init__(self, bindings: dict[str, str]):
+        self._bits: dict[str, int] = {name: 1 << index for index, name in enumerate(MODIFIERS)}
+        self._actions: dict[int, tuple[str, list]] = {}
+        for combo, action in (bindings or {}).items():
+            if not action:
+                continue
+            try:
+                names = parse_combo(combo)
+                parsed = parse_action(action)
+            except ValueError as e:
+                logger.warning("Ignoring hotkey %r: %s", combo, e)
+                continue
+            mask = 0
+            for name in sorted(names):
+                bit = self._bits.setdefault(name, 1 << len(self._bits))
+                mask |= bit
+            if mask in self._actions:
+                logger.warning("Hotkey %r is bound twice; keeping %r", combo, action)
+            self._actions[mask] = parsed
+        self._named: dict[str, int] = {}  # pynput Key name → bit (0 for keys no binding uses)
+        self._codes: dict[tuple, int] = {}  # (vk, char) of a KeyCode → bit
+        self.pressed = 0
+
+    def __bool__(self) -> bool:
+        return bool(self._actions)
+
+    def _bit(self, key) -> int:
+        name = getattr(key, "name", None)
+        if name is not None:
+            bit = self._named.get(name)
+            if bit is None:
+                bit = self._named[name] = self._bits.get(normalize_name(name), 0)
+            return bit
+        code = (getattr(key, "vk", None), getattr(key, "char", None))
+        bit = self._codes.get(code)
+        if bit is None:
+            bit = self._codes[code] = self._bits.get(key_name(key), 0)
+        return bit
+
+    def press(self, key) -> tuple[str, list] | None:
+        """Records a press; returns the bound action when it completes a combination (not on auto-repeat)."""
+        bit = self._bit(key)
+        if not bit or self.pressed & bit:
+            return None
+        self.pressed |= bit
+        return self._actions.get(self.pressed)
+
+    def release(self, key):
+        self.pressed &= ~self._bit(key)
+
+    def reset(self):
+        """Forgets held keys, e.g. when releases may have been missed."""
+        self.pressed = 0
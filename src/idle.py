@@ -0,0 +1,119 @@
+import logging
+
+logger = logging.getLogger(__name__)
+import ctypes
+import os
+import sys
+
+from .capture import _find_library, _load_xlib, _x11_available
+
+
+class IdleSource:
+    """Answers "seconds since the last user input" with one cheap OS query per check."""
+
+    name = "base"
+
+    def idle_seconds(self) -> float | None:
+        """Seconds since the last keyboard/mouse input, or None if the query failed this time."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class _XScreenSaverInfo(ctypes.Structure):
+    _fields_ = [
+        ("window", ctypes.c_ulong),
+        ("state", ctypes.c_int),
+        ("kind", ctypes.c_int),
+        ("til_or_since", ctypes.c_ulong),
+        ("idle", ctypes.c_ulong),
+        ("eventMask", ctypes.c_ulong),
+    ]
+
+
+class XScreenSaverIdle(IdleSource):
+    """MIT-SCREEN-SAVER extension: the X server's own idle counter (also provided by Xvfb)."""
+
+    name = "xscreensaver"
+
+    def __init__(self):
+        path = _find_library("Xss")
+        if not path:
+            raise OSError("libXss not found")
+        self._xss = ctypes.cdll.LoadLibrary(path)
+        self._xss.XScreenSaverQueryExtension.argtypes = [
+            ctypes.c_void_p, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)
+        ]
+        self._xss.XScreenSaverAllocInfo.restype = ctypes.POINTER(_XScreenSaverInfo)
+        self._xss.XScreenSaverQueryInfo.argtypes = [
+            ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XScreenSaverInfo)
+        ]
+        self._xlib = _load_xlib()
+        self._xlib.XFree.argtypes = [ctypes.c_void_p]
+        self._display = self._xlib.XOpenDisplay(None)
+        if not self._display:
+            raise OSError("Cannot open X display")
+        event_base, error_base = ctypes.c_int(), ctypes.c_int()
+        if not self._xss.XScreenSaverQueryExtension(self._display, ctypes.byref(event_base), ctypes.byref(error_base)):
+            self._xlib.XCloseDisplay(self._display)
+            raise OSError("MIT-SCREEN-SAVER extension not available")
+        self._root = self._xlib.XDefaultRootWindow(self._display)
+        self._info = self._xss.XScreenSaverAllocInfo()
+        if not self._info:
+            self._xlib.XCloseDisplay(self._display)
+            raise OSError("XScreenSaverAllocInfo failed")
+
+    def idle_seconds(self) -> float | None:
+        if not self._xss.XScreenSaverQueryInfo(self._display, self._root, self._info):
+            return None
+        return self._info.contents.idle / 1000
+
+    def close(self):
+        if self._info:
+            self._xlib.XFree(self._info)
+            self._info = None
+        if self._display:
+            self._xlib.XCloseDisplay(self._display)
+            self._display = None
+
+
+class _LASTINPUTINFO(ctypes.Structure):
+    _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_uint)]
+
+
+class WindowsIdle(IdleSource):
+    """GetLastInputInfo: tick count of the session's last input event."""
+
+    name = "getlastinputinfo"
+
+    def __init__(self):
+        self._user32 = ctypes.windll.user32
+        self._kernel32 = ctypes.windll.kernel32
+        self._kernel32.GetTickCount.restype = ctypes.c_uint
+        self._info = _LASTINPUTINFO()
+        self._info.cbSize = ctypes.sizeof(_LASTINPUTINFO)
+        if self.idle_seconds() is None:
+            raise OSError("GetLastInputInfo failed")
+
+    def idle_seconds(self) -> float | None:
+        if not self._user32.GetLastInputInfo(ctypes.byref(self._info)):
+            return None
+        # Both are 32-bit millisecond tick counts; the mask keeps the difference right across the 49-day wrap
+        return ((self._kernel32.GetTickCount() - self._info.dwTime) & 0xFFFFFFFF) / 1000
+
+
+def create_idle_source() -> IdleSource | None:
+    """The OS idle counter for this session, or None where there is none we can trust."""
+    try:
+        if sys.platform == "win32":
+            return WindowsIdle()
+        if os.environ.get("XDG_SESSION_TYPE") == "wayland":
+            # XWayland only counts input delivered to X clients, so its idle time is not the session's
+            logger.debug("Wayland session: no native idle source")
+            return None
+        if _x11_available():
+            return XScreenSaverIdle()
+    except (OSError, AttributeError) as e:
+        logger.debug("Native idle source unavailable: %s", e)
+    return None
@@ -0,0 +1,270 @@
+import logging
+
+logger = logging.getLogger(__name__)
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+HANDOFF_TIMEOUT = 5.0  # s a later launch waits for the running instance to answer
+HANDOFF_ATTEMPTS = 3  # requests a starting or briefly busy instance gets before it counts as hung
+HANDOFF_RETRY_DELAY = 1.0  # s between those requests
+TAKEOVER_TIMEOUT = 2.0  # s to wait for an unresponsive instance to exit after SIGTERM
+_WINDOWS = sys.platform == "win32"
+_LOCK_OFFSET = 4096  # Windows byte-range lock lives past the PID text so the file stays readable
+
+Message = dict[str, Any]
+
+
+def _runtime_dir() -> Path:
+    """Per-user directory for the lock and socket; private so other users cannot spoof the endpoint."""
+    if _WINDOWS:
+        return Path(tempfile.gettempdir())
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime and os.path.isdir(runtime):
+        return Path(runtime)
+    path = Path(tempfile.gettempdir()) / f"black_screensaver-{os.getuid()}"
+    path.mkdir(mode=0o700, exist_ok=True)
+    info = path.lstat()
+    if info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"Refusing to use {path}: not private to this user")
+    return path
+
+
+class LineConnection:
+    """One JSON object per line over a Unix socket; one JSON message per pipe message on Windows."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._file = None if _WINDOWS else conn.makefile("rwb")
+        self._send_lock = threading.Lock()
+
+    def send(self, message: Message):
+        data = json.dumps(message, separators=(",", ":")).encode() + b"\n"
+        with self._send_lock:
+            if self._file is None:
+                self._conn.send_bytes(data)
+            else:
+                self._file.write(data)
+                self._file.flush()
+
+    def recv(self) -> Message | None:
+        """Next message, or None once the peer has closed the connection."""
+        try:
+            line = self._conn.recv_bytes() if self._file is None else self._file.readline()
+        except (EOFError, OSError):
+            return None
+        if not line:
+            return None
+        message = json.loads(line)
+        if not isinstance(message, dict):
+            raise ValueError("Expected a JSON object")
+        return message
+
+    def close(self):
+        try:
+            if self._file is not None:
+                self._file.close()
+            self._conn.close()
+        except OSError:
+            pass
+
+
+def connect(address: str, timeout: float | None = HANDOFF_TIMEOUT) -> LineConnection:
+    if _WINDOWS:
+        from multiprocessing.connection import Client
+
+        return LineConnection(Client(address, family="AF_PIPE"))
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(address)
+    except OSError:
+        sock.close()
+        raise
+    return LineConnection(sock)
+
+
+class SingleInstance:
+    """Single-instance lock plus a local endpoint (Unix socket / named pipe) later launches talk to.
+
+    The lock is an OS file lock, so it disappears with its process: whoever holds it owns the socket, and a
+    socket file found without a lock holder is a crash leftover that can be removed safely.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        runtime_dir = _runtime_dir()
+        self.lock_path = runtime_dir / f"{name}.lock"
+        self.address = rf"\\.\pipe\{name}-{os.environ.get('USERNAME', 'user')}" if _WINDOWS else str(
+            runtime_dir / f"{name}.sock"
+        )
+        self._lock_fh = None
+        self._listener = None
+        self._thread: threading.Thread | None = None
+
+    def acquire(self) -> bool:
+        """Takes the lock and opens the endpoint; False if another live instance holds it."""
+        fh = open(self.lock_path, "a+")
+        try:
+            if _WINDOWS:
+                import msvcrt
+
+                fh.seek(_LOCK_OFFSET)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            return False
+        fh.seek(0)
+        fh.truncate()
+        fh.write(str(os.getpid()))
+        fh.flush()
+        self._lock_fh = fh
+        self._listener = self._listen()
+        return True
+
+    def _listen(self):
+        if _WINDOWS:
+            from multiprocessing.connection import Listener
+
+            return Listener(self.address, family="AF_PIPE")
+        try:
+            os.unlink(self.address)  # left behind by a crashed owner; we hold the lock, so nobody serves it
+        except FileNotFoundError:
+            pass
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.address)
+        sock.listen(8)
+        return sock
+
+    def owner_pid(self) -> int | None:
+        try:
+            return int(self.lock_path.read_text().strip() or 0) or None
+        except (OSError, ValueError):
+            return None
+
+    def request(self, message: Message, timeout: float = HANDOFF_TIMEOUT) -> Message | None:
+        """Sends one message to the running instance and returns its reply; None if it does not answer."""
+        try:
+            conn = connect(self.address, timeout)
+        except OSError as e:
+            logger.debug("Cannot reach running instance at %s: %s", self.address, e)
+            return None
+        try:
+            conn.send(message)
+            return conn.recv()
+        except (OSError, ValueError) as e:
+            logger.debug("No reply from running instance: %s", e)
+            return None
+        finally:
+            conn.close()
+
+    def take_over(self) -> bool:
+        """Last resort for a hung owner: terminate it and claim the lock once it is gone.
+
+        Only called after the owner missed every handoff attempt; a PID that is no longer alive is never
+        signalled, since the lock holder is then not the process the lock file names.
+        """
+        pid = self.owner_pid()
+        if pid is None or pid == os.getpid():
+            return False
+        from .utils import pid_alive, terminate_pid  # PIL-free import path for the ctl client
+
+        if not pid_alive(pid):
+            logger.warning("Lock %s names PID %s, which is not running; terminating nothing", self.lock_path, pid)
+            return self.acquire()
+        logger.warning("Running instance %s is alive but did not answer %d requests; terminating it", pid,
+                       HANDOFF_ATTEMPTS)
+        terminate_pid(pid)
+        deadline = time.monotonic() + TAKEOVER_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.acquire():
+                return True
+            time.sleep(0.05)
+        return False
+
+    def serve(self, handler: Callable[[Message, LineConnection], Message | None]):
+        """Answers connections on a background thread; ``handler`` returns the reply to each request."""
+        if self._listener is None or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._accept_loop, args=(handler,), name="instance-server",
+                                        daemon=True)
+        self._thread.start()
+
+    def _accept_loop(self, handler):
+        listener = self._listener
+        while True:
+            try:
+                conn = listener.accept()
+            except OSError:
+                return  # listener closed
+            if not _WINDOWS:
+                conn = conn[0]
+            threading.Thread(target=self._serve_connection, args=(LineConnection(conn), handler),
+                             name="instance-client", daemon=True).start()
+
+    @staticmethod
+    def _serve_connection(conn: LineConnection, handler):
+        try:
+            while True:
+                try:
+                    message = conn.recv()
+                except ValueError as e:
+                    conn.send({"ok": False, "error": f"invalid request: {e}"})
+                    continue
+                if message is None:
+                    return
+                reply = handler(message, conn)
+                if reply is not None:
+                    conn.send(reply)
+        except OSError as e:
+            logger.debug("Instance connection closed: %s", e)
+        except Exception:
+            logger.exception("Instance request failed")
+        finally:
+            conn.close()
+
+    def close(self):
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            if not _WINDOWS:
+                try:
+                    listener.shutdown(socket.SHUT_RDWR)  # wakes the blocked accept()
+                except OSError:
+                    pass
+                try:
+                    os.unlink(self.address)
+                except OSError:
+                    pass
+            listener.close()
+        if self._lock_fh is not None:
+            self._lock_fh.close()  # releases the lock
+            self._lock_fh = None
+
+
+def claim_instance(name: str, argv: list[str]) -> SingleInstance | None:
+    """Returns the lock for a fresh instance, or None after handing ``argv`` to the one already running."""
+    instance = SingleInstance(name)
+    if instance.acquire():
+        return instance
+    message = {"cmd": "launch", "argv": argv}
+    for attempt in range(HANDOFF_ATTEMPTS):
+        if attempt:
+            time.sleep(HANDOFF_RETRY_DELAY)  # still starting up, or busy for a moment
+            if instance.acquire():  # exited meanwhile
+                return instance
+        if instance.request(message) is not None:
+            logger.info("Already running; arguments handed to the running instance")
+            return None
+    if instance.take_over():
+        return instance
+    raise RuntimeError(f"Another instance holds {instance.lock_path} and does not respond")
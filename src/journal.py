@@ -0,0 +1,223 @@
+import logging
+
+logger = logging.getLogger(__name__)
+import os
+import queue
+import struct
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Iterable, Iterator
+
+# File: 16-byte header, then fixed 16-byte records (little endian): time f64, kind u8, 3 pad bytes, value f32
+_MAGIC = b"BSJ1"
+_HEADER = struct.Struct("<4sHH8x")  # magic, version, record size
+_RECORD = struct.Struct("<dB3xf")
+_VERSION = 1
+_READ_RECORDS = 4096  # records per read() while streaming a query
+
+START, STOP, LOCK, UNLOCK, PAUSE, RESUME, ACTIVITY, VISUAL_VETO, AUTO_LOCK_OFF, AUTO_LOCK_ON = range(1, 11)
+KINDS = {
+    "start": START, "stop": STOP, "lock": LOCK, "unlock": UNLOCK, "pause": PAUSE, "resume": RESUME,
+    "activity": ACTIVITY, "visual_veto": VISUAL_VETO, "auto_lock_off": AUTO_LOCK_OFF, "auto_lock_on": AUTO_LOCK_ON,
+}
+
+
+class Journal:
+    """Append-only binary event log written by a background thread.
+
+    ``record`` only packs 16 bytes and puts them on a queue, so callers (the Tk and listener threads) never
+    wait for the disk. The writer batches whatever accumulated every ``flush_interval`` seconds and rotates
+    ``journal.bin`` → ``journal.1.bin`` … once it reaches ``max_bytes``, keeping ``keep`` old files.
+    """
+
+    def __init__(self, path: Path, max_bytes: int, keep: int, flush_interval: float):
+        self.path = Path(path)
+        self.max_bytes = max(_HEADER.size + _RECORD.size, max_bytes)
+        self.keep = max(0, keep)
+        self.flush_interval = flush_interval
+        self._queue: queue.SimpleQueue[bytes | threading.Event | None] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._writer, name="journal-writer", daemon=True)
+            self._thread.start()
+
+    def record(self, kind: int, value: float = 0.0, when: float | None = None):
+        self._queue.put(_RECORD.pack(time.time() if when is None else when, kind, value))
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Blocks until everything recorded so far is on disk; for readers, never call it from the Tk thread."""
+        if self._thread is None:
+            return False
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def _writer(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fh = self._open()
+        try:
+            stopping = False
+            while not stopping:
+                item = self._queue.get()
+                deadline = time.monotonic() + self.flush_interval
+                batch, waiters = [], []
+                while True:
+                    if item is None:
+                        stopping = True
+                    elif isinstance(item, threading.Event):
+                        waiters.append(item)
+                    else:
+                        batch.append(item)
+                    try:
+                        if stopping or waiters:  # someone is waiting: write what is queued right away
+                            item = self._queue.get_nowait()
+                        else:
+                            item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                if batch:
+                    fh = self._write(fh, b"".join(batch))
+                for waiter in waiters:
+                    waiter.set()
+        except Exception:
+            logger.exception("Journal writer stopped")
+        finally:
+            fh.close()
+
+    def _open(self):
+        """Opens the live file for appending, writing the header or dropping a torn tail from a crash."""
+        fh = open(self.path, "ab")
+        size = fh.tell()
+        if size < _HEADER.size:
+            fh.truncate(0)
+            fh.write(_HEADER.pack(_MAGIC, _VERSION, _RECORD.size))
+        else:
+            torn = (size - _HEADER.size) % _RECORD.size
+            if torn:
+                fh.truncate(size - torn)
+        fh.flush()
+        return fh
+
+    def _write(self, fh, data: bytes):
+        """Appends whole records, splitting a batch across files when it crosses ``max_bytes``."""
+        view = memoryview(data)
+        while view:
+            room = max(_RECORD.size, (self.max_bytes - fh.tell()) // _RECORD.size * _RECORD.size)
+            fh.write(view[:room])
+            view = view[room:]
+            fh.flush()
+            if fh.tell() >= self.max_bytes:
+                fh.close()
+                self._rotate()
+                fh = self._open()
+        return fh
+
+    def _rotate(self):
+        for index in range(self.keep, 0, -1):
+            source = self._rotated(index - 1) if index > 1 else self.path
+            if source.exists():
+                os.replace(source, self._rotated(index))
+        if not self.keep:
+            self.path.unlink(missing_ok=True)
+
+    def _rotated(self, index: int) -> Path:
+        return self.path.with_name(f"{self.path.stem}.{index}{self.path.suffix}")
+
+    def files(self) -> list[Path]:
+        """Journal files from oldest to newest."""
+        rotated = [self._rotated(index) for index in range(self.keep, 0, -1)]
+        return [path for path in (*rotated, self.path) if path.exists()]
+
+
+def iter_records(paths: Iterable[Path]) -> Iterator[tuple[float, int, float]]:
+    """Streams ``(time, kind, value)`` from journal files in order, a few records at a time."""
+    for path in paths:
+        try:
+            fh = open(path, "rb")
+        except OSError:
+            continue
+        with fh:
+            header = fh.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                continue
+            magic, version, size = _HEADER.unpack(header)
+            if magic != _MAGIC or size != _RECORD.size:
+                logger.warning("Skipping %s: not a version %s journal", path, _VERSION)
+                continue
+            while True:
+                chunk = fh.read(_READ_RECORDS * _RECORD.size)
+                usable = len(chunk) - len(chunk) % _RECORD.size  # a torn tail record is ignored
+                if not usable:
+                    break
+                yield from _RECORD.iter_unpack(chunk[:usable])
+
+
+def _next_midnight(timestamp: float) -> float:
+    day = datetime.fromtimestamp(timestamp).date() + timedelta(days=1)
+    return datetime.combine(day, datetime.min.time()).timestamp()
+
+
+def daily_totals(records: Iterable[tuple[float, int, float]], until: float | None = None) -> dict[date, dict]:
+    """Per local day: seconds locked, unlocked (content shown) and paused (auto-lock off), plus event counts.
+
+    All panels lock together, so the totals hold for every monitor. Time between a crash and the next start
+    counts as not running; an interval still open at the end is closed at ``until`` (default: now).
+    """
+    totals: dict[date, dict] = {}
+    state, since = None, None  # None: app not running; else "locked" / "unlocked" / "paused"
+    locked_state, paused = False, False
+
+    def _day(timestamp: float) -> dict:
+        key = datetime.fromtimestamp(timestamp).date()
+        entry = totals.get(key)
+        if entry is None:
+            entry = totals[key] = {"locked": 0.0, "unlocked": 0.0, "paused": 0.0,
+                                   "locks": 0, "visual_vetoes": 0, "activity_resumes": 0}
+        return entry
+
+    def _account(end: float):
+        start = since
+        while start < end:
+            boundary = min(end, _next_midnight(start))
+            _day(start)[state] += boundary - start
+            start = boundary
+
+    for timestamp, kind, _value in records:
+        if kind == START:
+            state = None  # no STOP before it: the previous run crashed and ends at its last record
+        if state is not None:
+            _account(timestamp)
+        if kind == START:
+            locked_state, paused = False, False
+            state = "unlocked"
+        elif kind == STOP:
+            state = None
+        elif state is not None:
+            if kind == LOCK:
+                locked_state = True
+                _day(timestamp)["locks"] += 1
+            elif kind == UNLOCK:
+                locked_state = False
+            elif kind in (PAUSE, AUTO_LOCK_OFF):
+                paused = True
+            elif kind in (RESUME, AUTO_LOCK_ON):
+                paused = False
+            elif kind == VISUAL_VETO:
+                _day(timestamp)["visual_vetoes"] += 1
+            elif kind == ACTIVITY:
+                _day(timestamp)["activity_resumes"] += 1
+            state = "locked" if locked_state else "paused" if paused else "unlocked"
+        since = timestamp
+    if state is not None and since is not None:
+        _account(max(since, time.time() if until is None else until))
+    return totals
@@ -58,7 +58,7 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "settings.save": "Save",
         "settings.timeout_label": "Idle timeout before lock (seconds)",
         "settings.mouse_check_label": "Mouse activity check interval (ms)",
-        "settings.cursor_hide_label": "Hide cursor after (ms, 0 = never)",
+        "settings.cursor_hide_label": "Hide cursor after (ms, 0 = immediately, -1 = never)",
         "settings.pause_minutes_label": "Pause auto-lock durations (comma separated minutes)",
         "settings.pause_minutes_error_empty": "Enter at least one value.",
         "settings.pause_minutes_error_invalid": "Enter whole numbers separated by commas.",
@@ -84,8 +84,15 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "tray.disable_autolock": "Disable auto-lock",
         "tray.enable_autolock": "Enable auto-lock",
         "tray.settings": "Settings",
+        "tray.exposure": "Burn-in heatmap",
         "tray.exit": "Exit",
         "tray.pause_label": "Pause for {duration}",
+        "exposure.title": "Burn-in exposure",
+        "exposure.caption": "{name}: peak {hours} h at full brightness",
+        "exposure.empty": "Nothing recorded yet: exposure builds up while visual detection samples an idle screen.",
+        "exposure.export": "Export PNG/NPY",
+        "exposure.exported": "Saved to {path}",
+        "exposure.close": "Close",
     },
     "ru": {
         "common.enabled": "ВКЛЮЧЕНА",
@@ -96,7 +103,7 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "settings.save": "Сохранить",
         "settings.timeout_label": "Таймаут бездействия до блокировки (сек)",
         "settings.mouse_check_label": "Частота проверки мыши (мс)",
-        "settings.cursor_hide_label": "Скрывать курсор через (мс, 0 = не скрывать)",
+        "settings.cursor_hide_label": "Скрывать курсор через (мс, 0 = сразу, -1 = не скрывать)",
         "settings.pause_minutes_label": "Минуты для паузы автоблокировки (через запятую)",
         "settings.pause_minutes_error_empty": "Укажите хотя бы одно значение.",
         "settings.pause_minutes_error_invalid": "Введите целые числа через запятую.",
@@ -122,8 +129,15 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "tray.disable_autolock": "Отключить автоблокировку",
         "tray.enable_autolock": "Включить автоблокировку",
         "tray.settings": "Настройки",
+        "tray.exposure": "Карта выгорания",
         "tray.exit": "Выход",
         "tray.pause_label": "Пауза на {duration}",
+        "exposure.title": "Экспозиция выгорания",
+        "exposure.caption": "{name}: максимум {hours} ч при полной яркости",
+        "exposure.empty": "Данных пока нет: экспозиция накапливается, пока визуальная проверка снимает простаивающий экран.",
+        "exposure.export": "Экспорт PNG/NPY",
+        "exposure.exported": "Сохранено в {path}",
+        "exposure.close": "Закрыть",
     },
 }
 
@@ -0,0 +1,384 @@
+import logging
+
+logger = logging.getLogger(__name__)
+import os
+from pathlib import Path
+from typing import NamedTuple
+
+from src.config import (
+    VISUAL_MASK_EDGE_SHARE,
+    VISUAL_MASK_MAX_MARGIN,
+    VISUAL_MASK_MIN_WINDOWS,
+    VISUAL_MASK_PERIODIC_SHARE,
+    VISUAL_MASK_STATES,
+    VISUAL_PIXEL_DELTA,
+    VISUAL_SIGNATURE_TOLERANCE,
+)
+from .capture import Box, CapturePlan
+from .monitors import Monitor
+from .utils import load_numpy
+
+_SATURATION = 60000  # uint16 window counters are halved past this, which keeps their ratios
+_BLOCK = 8  # sample pixels per side of a state-tracking block: 64 pixels, one 64-bit signature
+_LEVEL_TOLERANCE = 4  # mean brightness difference within one state: rendered UI repeats exactly, video does not
+_ARRAYS = ("low", "high", "seen", "changed", "states", "levels", "state_count", "recurred")  # cached statistics
+
+
+def mask_path(directory: Path, monitor: Monitor) -> Path:
+    """``DP-1-2560x1440.npz``: learned statistics are only valid for one monitor at one resolution."""
+    return Path(directory) / f"{monitor.slug}.npz"
+
+
+class LearnedMask(NamedTuple):
+    """A learner's conclusion for one monitor, on its sample grid (monitor size // factor)."""
+
+    monitor: Monitor
+    factor: int
+    margins: dict[str, float]  # edge bands that were static or periodic; cropped from the capture box
+    ignore: object  # bool [H, W]: pixels that tick on their own (clocks, tray indicators), left out of the diff
+    windows: int
+
+    def summary(self) -> dict:
+        return {
+            "windows": self.windows,
+            "margins": {key: round(value, 4) for key, value in self.margins.items()},
+            "ignored_pixels": int(self.ignore.sum()),
+        }
+
+
+class MaskLearner:
+    """Learns which parts of one monitor never matter for activity detection, from the visual samples.
+
+    Per sample pixel it keeps the darkest and brightest value seen and, per visual window (one idle period),
+    whether the pixel changed between two samples of its tile. Per block of 8x8 sample pixels it keeps the
+    distinct average-hash states the block has shown, up to ``VISUAL_MASK_STATES``: a clock's digits or a tray
+    indicator keep returning to a few known states, video and terminal output keep producing new ones. Only
+    windows that ended in a lock are kept; one that ended in activity is dropped, since what changed in it may
+    be the user's work.
+
+    Once ``VISUAL_MASK_MIN_WINDOWS`` windows were kept, pixels whose range stayed within ``VISUAL_PIXEL_DELTA``
+    are static (panels, taskbars), and pixels of a recurring block that changed in at least
+    ``VISUAL_MASK_PERIODIC_SHARE`` of their windows tick by themselves. Only the worker thread of the monitor's
+    channel calls it.
+    """
+
+    def __init__(self, path: Path, monitor: Monitor, factor: int):
+        np = load_numpy()
+        if np is None:
+            raise ValueError("mask learning needs NumPy")
+        self._np = np
+        self.path = Path(path)
+        self.monitor = monitor
+        self.factor = factor
+        shape = (max(1, monitor.height // factor), max(1, monitor.width // factor))
+        blocks = (_block_count(shape[0]), _block_count(shape[1]))
+        self.low = np.full(shape, 255, dtype=np.uint8)
+        self.high = np.zeros(shape, dtype=np.uint8)
+        self.seen = np.zeros(shape, dtype=np.uint16)  # windows in which the pixel was compared
+        self.changed = np.zeros(shape, dtype=np.uint16)  # windows in which it changed
+        self.states = np.zeros((*blocks, VISUAL_MASK_STATES), dtype=np.uint64)  # signatures a block has shown
+        self.levels = np.zeros((*blocks, VISUAL_MASK_STATES), dtype=np.uint8)  # and their mean brightness
+        self.state_count = np.zeros(blocks, dtype=np.uint8)  # VISUAL_MASK_STATES + 1: too many to be periodic
+        self.recurred = np.zeros(blocks, dtype=np.uint16)  # windows in which the block went back to a known state
+        self.windows = 0
+        self._load()
+        # The current window works on copies; end_window() keeps or drops them
+        self._low_now = self.low.copy()
+        self._high_now = self.high.copy()
+        self._states_now = self.states.copy()
+        self._levels_now = self.levels.copy()
+        self._count_now = self.state_count.copy()
+        self._recurred_now = np.zeros(blocks, dtype=bool)
+        self._compared_now = np.zeros(shape, dtype=bool)
+        self._changed_now = np.zeros(shape, dtype=bool)
+        self._previous: dict[int, object] = {}  # tile index → its last frame in this window
+        self._scratch: dict[tuple, tuple] = {}
+        self._layouts: dict[tuple, tuple] = {}  # tile geometry → its whole blocks
+        self._popcount = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+    def _load(self):
+        np = self._np
+        try:
+            with np.load(self.path) as data:
+                if (int(data["factor"]) != self.factor or data["low"].shape != self.low.shape
+                        or data["states"].shape != self.states.shape):
+                    logger.info("Mask cache %s is for another layout; learning again", self.path)
+                    return
+                arrays = {name: data[name] for name in _ARRAYS}
+                windows = int(data["windows"])
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Ignoring mask cache %s: %s", self.path, e)
+            return
+        for name, array in arrays.items():
+            getattr(self, name)[...] = array
+        self.windows = windows
+
+    def save(self):
+        """Writes the statistics atomically, like settings.json."""
+        np = self._np
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+            with tmp_path.open("wb") as fh:
+                np.savez(fh, **{name: getattr(self, name) for name in _ARRAYS},
+                         windows=np.array(self.windows), factor=np.array(self.factor))
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Cannot save mask cache %s: %s", self.path, e)
+
+    def restart(self):
+        """Forgets the frames of the current window, e.g. after the capture plans were rebuilt."""
+        self._previous.clear()
+
+    def observe(self, index: int, plan: CapturePlan, frame):
+        """Adds one tile sample (before any masking) to the current window."""
+        np = self._np
+        x = (plan.box[0] - self.monitor.x) // self.factor
+        y = (plan.box[1] - self.monitor.y) // self.factor
+        height, width = frame.shape
+        view = (slice(y, y + height), slice(x, x + width))
+        low, high = self._low_now[view], self._high_now[view]
+        if plan.factor != self.factor or low.shape != frame.shape:
+            return
+        np.minimum(low, frame, out=low)
+        np.maximum(high, frame, out=high)
+        previous = self._previous.get(index)
+        if previous is None or previous.shape != frame.shape:
+            self._previous[index] = frame.copy()
+            return
+        upper, lower, moved = self._buffers(frame.shape)
+        np.maximum(frame, previous, out=upper)
+        np.minimum(frame, previous, out=lower)
+        np.subtract(upper, lower, out=upper)
+        np.greater(upper, VISUAL_PIXEL_DELTA, out=moved)
+        if moved.any():
+            changed = self._changed_now[view]
+            np.logical_or(changed, moved, out=changed)
+            self._track_states(x, y, previous, frame, moved)
+        self._compared_now[view] = True
+        np.copyto(previous, frame)
+
+    def _buffers(self, shape: tuple[int, int]) -> tuple:
+        buffers = self._scratch.get(shape)
+        if buffers is None:
+            np = self._np
+            buffers = self._scratch[shape] = (
+                np.empty(shape, dtype=np.uint8), np.empty(shape, dtype=np.uint8), np.empty(shape, dtype=bool)
+            )
+        return buffers
+
+    def _block_layout(self, x: int, y: int, height: int, width: int) -> tuple:
+        """The whole blocks inside a tile: their first pixels in the frame and their block-grid rows and columns."""
+        key = (x, y, height, width)
+        layout = self._layouts.get(key)
+        if layout is None:
+            np = self._np
+            block_rows, row_starts = _whole_blocks(np, self.low.shape[0], y, height)
+            block_cols, col_starts = _whole_blocks(np, self.low.shape[1], x, width)
+            layout = self._layouts[key] = (row_starts, col_starts, block_rows, block_cols)
+        return layout
+
+    def _track_states(self, x: int, y: int, previous, frame, moved):
+        """Registers the states of the blocks that changed in a tile; marks those back in a known state."""
+        np = self._np
+        row_starts, col_starts, block_rows, block_cols = self._block_layout(x, y, *frame.shape)
+        if not len(block_rows) or not len(block_cols):
+            return
+        touched = _touched(np, moved, row_starts, col_starts)
+        # Blocks that already showed too many states (video, terminals) can never be periodic: not tracked
+        touched &= self._count_now[block_rows[:, None], block_cols] <= VISUAL_MASK_STATES
+        rows, cols = np.nonzero(touched)
+        if not len(rows):
+            return
+        offsets = np.arange(_BLOCK)
+        pixel_rows = (row_starts[rows, None] + offsets)[:, :, None]
+        pixel_cols = (col_starts[cols, None] + offsets)[:, None, :]
+        before = self._signatures(previous[pixel_rows, pixel_cols])
+        after = self._signatures(frame[pixel_rows, pixel_cols])
+        moved_on = ~self._same(*before, *after)
+        if not moved_on.any():
+            return
+        rows, cols = block_rows[rows[moved_on]], block_cols[cols[moved_on]]
+        self._known(rows, cols, *(part[moved_on] for part in before))
+        recurred = self._known(rows, cols, *(part[moved_on] for part in after))
+        self._recurred_now[rows[recurred], cols[recurred]] = True
+
+    def _signatures(self, blocks) -> tuple:
+        """64-bit average hash (one bit per pixel brighter than the block's mean) and mean brightness per block."""
+        np = self._np
+        flat = blocks.reshape(len(blocks), _BLOCK * _BLOCK)
+        mean = flat.mean(axis=1, keepdims=True)
+        return np.packbits(flat > mean, axis=1).view(np.uint64).ravel(), mean.ravel().astype(np.uint8)
+
+    def _same(self, signatures, levels, other_signatures, other_levels):
+        """Whether signature/level pairs are the same screen state (broadcasting)."""
+        np = self._np
+        xor = np.bitwise_xor(signatures, other_signatures)
+        bits = self._popcount[xor[..., None].view(np.uint8)].sum(axis=-1)
+        return ((bits <= VISUAL_SIGNATURE_TOLERANCE)
+                & (np.abs(levels.astype(np.int16) - other_levels) <= _LEVEL_TOLERANCE))
+
+    def _known(self, block_rows, block_cols, signatures, levels):
+        """True where a block already showed the state; new states are added to the block's list."""
+        np = self._np
+        counts = self._count_now[block_rows, block_cols]
+        valid = np.arange(VISUAL_MASK_STATES) < counts[:, None]
+        same = self._same(self._states_now[block_rows, block_cols], self._levels_now[block_rows, block_cols],
+                          signatures[:, None], levels[:, None])
+        known = (valid & same).any(axis=1)
+        new = ~known & (counts <= VISUAL_MASK_STATES)
+        room = new & (counts < VISUAL_MASK_STATES)
+        slots = (block_rows[room], block_cols[room], counts[room])
+        self._states_now[slots] = signatures[room]
+        self._levels_now[slots] = levels[room]
+        self._count_now[block_rows[new], block_cols[new]] = counts[new] + 1
+        return known
+
+    def end_window(self, learn: bool) -> bool:
+        """Ends the visual window: kept if ``learn`` (it ended in a lock), dropped otherwise.
+
+        Returns True if the window was kept and something was compared in it.
+        """
+        np = self._np
+        counted = learn and bool(self._compared_now.any())
+        if counted:
+            np.add(self.seen, self._compared_now, out=self.seen, casting="unsafe")
+            np.add(self.changed, self._changed_now, out=self.changed, casting="unsafe")
+            np.add(self.recurred, self._recurred_now, out=self.recurred, casting="unsafe")
+            np.copyto(self.low, self._low_now)
+            np.copyto(self.high, self._high_now)
+            np.copyto(self.states, self._states_now)
+            np.copyto(self.levels, self._levels_now)
+            np.copyto(self.state_count, self._count_now)
+            self.windows += 1
+            if self.seen.max() >= _SATURATION:
+                np.right_shift(self.seen, 1, out=self.seen)
+                np.right_shift(self.changed, 1, out=self.changed)
+            if self.recurred.max() >= _SATURATION:
+                np.right_shift(self.recurred, 1, out=self.recurred)
+        else:
+            np.copyto(self._low_now, self.low)
+            np.copyto(self._high_now, self.high)
+            np.copyto(self._states_now, self.states)
+            np.copyto(self._levels_now, self.levels)
+            np.copyto(self._count_now, self.state_count)
+        self._compared_now[...] = False
+        self._changed_now[...] = False
+        self._recurred_now[...] = False
+        self._previous.clear()
+        return counted
+
+    def result(self) -> LearnedMask | None:
+        """The mask the statistics support so far; None until enough windows were seen."""
+        if self.windows < VISUAL_MASK_MIN_WINDOWS:
+            return None
+        np = self._np
+        known = self.seen >= VISUAL_MASK_MIN_WINDOWS // 2
+        static = known & (self.high.astype(np.int16) - self.low <= VISUAL_PIXEL_DELTA)
+        recurring = (self.recurred > 0) & (self.state_count <= VISUAL_MASK_STATES)
+        periodic = known & self._pixels(recurring) & (self.changed >= self.seen * VISUAL_MASK_PERIODIC_SHARE)
+        margins = _edge_margins(static | periodic)
+        return LearnedMask(self.monitor, self.factor, margins, _grow(periodic), self.windows)
+
+    def _pixels(self, blocks):
+        """Per-block flags spread over the sample grid: a pixel is flagged if any block covering it is."""
+        np = self._np
+        height, width = self.low.shape
+        if not blocks.size:
+            return np.zeros((height, width), dtype=bool)
+        rows, edge_rows = _covering(np, height, blocks.shape[0])
+        cols, edge_cols = _covering(np, width, blocks.shape[1])
+        return (blocks[rows[:, None], cols] | blocks[edge_rows[:, None], cols]
+                | blocks[rows[:, None], edge_cols] | blocks[edge_rows[:, None], edge_cols])
+
+
+def _block_count(size: int) -> int:
+    return -(-size // _BLOCK) if size >= _BLOCK else 0
+
+
+def _touched(np, moved, row_starts, col_starts):
+    """Per whole block: whether any of its pixels moved. May also flag blocks next to a moved pixel."""
+    touched = np.logical_or.reduceat(np.logical_or.reduceat(moved, row_starts, axis=0), col_starts, axis=1)
+    # reduceat ends each block where the next begins: the edge-aligned last block cuts its neighbour short
+    if len(row_starts) > 1 and row_starts[-1] - row_starts[-2] < _BLOCK:
+        touched[-2] |= touched[-1]
+    if len(col_starts) > 1 and col_starts[-1] - col_starts[-2] < _BLOCK:
+        touched[:, -2] |= touched[:, -1]
+    return touched
+
+
+def _covering(np, size: int, count: int) -> tuple:
+    """Per pixel along one axis: its regular block, and the edge-aligned last block where that overlaps it."""
+    pixels = np.arange(size)
+    regular = np.minimum(pixels // _BLOCK, count - 1)
+    return regular, np.where(pixels >= size - _BLOCK, count - 1, regular)
+
+
+def _whole_blocks(np, size: int, start: int, length: int) -> tuple:
+    """Blocks along one axis that lie entirely in ``start:start + length``, and their offsets from ``start``.
+
+    Blocks are ``_BLOCK`` apart; the last one is aligned to the monitor edge, overlapping its neighbour, so
+    edge bands (taskbars, panels) are covered to the last pixel.
+    """
+    starts = np.minimum(np.arange(_block_count(size)) * _BLOCK, size - _BLOCK)
+    inside = (starts >= start) & (starts + _BLOCK <= start + length)
+    return np.nonzero(inside)[0], starts[inside] - start
+
+
+def _leading(flags, limit: int) -> int:
+    count = 0
+    for flag in flags[:limit]:
+        if not flag:
+            break
+        count += 1
+    return count
+
+
+def _edge_margins(useless) -> dict[str, float]:
+    """Fractions of the monitor to crop: edge rows, then columns, that are (almost) entirely useless."""
+    height, width = useless.shape
+    row_limit = int(height * VISUAL_MASK_MAX_MARGIN)
+    col_limit = int(width * VISUAL_MASK_MAX_MARGIN)
+    rows = useless.mean(axis=1) >= VISUAL_MASK_EDGE_SHARE
+    top = _leading(rows, row_limit)
+    bottom = _leading(rows[::-1], row_limit)
+    cols = useless[top:height - bottom].mean(axis=0) >= VISUAL_MASK_EDGE_SHARE
+    left = _leading(cols, col_limit)
+    right = _leading(cols[::-1], col_limit)
+    return {"top": top / height, "bottom": bottom / height, "left": left / width, "right": right / width}
+
+
+def _grow(mask):
+    """Adds the 4-neighbours of every set pixel, covering anti-aliased edges of digits and icons."""
+    grown = mask.copy()
+    grown[1:] |= mask[:-1]
+    grown[:-1] |= mask[1:]
+    grown[:, 1:] |= mask[:, :-1]
+    grown[:, :-1] |= mask[:, 1:]
+    return grown
+
+
+def outside_mask(monitor: Monitor, factor: int, box: Box):
+    """Sample-grid mask of everything outside ``box``: hand-set margins applied to a whole-monitor capture."""
+    np = load_numpy()
+    mask = np.ones((max(1, monitor.height // factor), max(1, monitor.width // factor)), dtype=bool)
+    x = (box[0] - monitor.x) // factor
+    y = (box[1] - monitor.y) // factor
+    mask[y:y + box[3] // factor, x:x + box[2] // factor] = False
+    return mask
+
+
+def tile_masks(ignore, monitor: Monitor, plans: list[CapturePlan]) -> list:
+    """Per-plan slices of a sample-grid mask; None for tiles it does not touch."""
+    masks = []
+    for plan in plans:
+        x = (plan.box[0] - monitor.x) // plan.factor
+        y = (plan.box[1] - monitor.y) // plan.factor
+        width, height = plan.size
+        tile = ignore[y:y + height, x:x + width]
+        masks.append(tile.copy() if tile.shape == (height, width) and tile.any() else None)
+    return masks
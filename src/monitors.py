@@ -0,0 +1,174 @@
+import logging
+
+logger = logging.getLogger(__name__)
+import ctypes
+import re
+import sys
+from typing import NamedTuple
+
+from .capture import Box, _find_library, _load_xlib, _x11_available
+
+
+class Monitor(NamedTuple):
+    """One physical output in virtual-screen coordinates."""
+
+    name: str  # RandR output name ("DP-1"), Windows device ("\\\\.\\DISPLAY1") or "screen-N"
+    x: int
+    y: int
+    width: int
+    height: int
+    primary: bool = False
+
+    @property
+    def box(self) -> Box:
+        return self.x, self.y, self.width, self.height
+
+    @property
+    def slug(self) -> str:
+        """File-name-safe ``name-WxH`` for per-monitor, per-resolution caches (``DISPLAY1-1920x1080``)."""
+        name = re.sub(r"[^A-Za-z0-9_.-]+", "_", self.name).strip("_.") or "monitor"
+        return f"{name}-{self.width}x{self.height}"
+
+
+class _XRRMonitorInfo(ctypes.Structure):
+    _fields_ = [
+        ("name", ctypes.c_ulong),
+        ("primary", ctypes.c_int),
+        ("automatic", ctypes.c_int),
+        ("noutput", ctypes.c_int),
+        ("x", ctypes.c_int),
+        ("y", ctypes.c_int),
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("mwidth", ctypes.c_int),
+        ("mheight", ctypes.c_int),
+        ("outputs", ctypes.c_void_p),
+    ]
+
+
+class _XineramaScreenInfo(ctypes.Structure):
+    _fields_ = [
+        ("screen_number", ctypes.c_int),
+        ("x_org", ctypes.c_short),
+        ("y_org", ctypes.c_short),
+        ("width", ctypes.c_short),
+        ("height", ctypes.c_short),
+    ]
+
+
+def _x11_monitors() -> list[Monitor]:
+    """RandR 1.5 monitors (named, with the primary flag), falling back to Xinerama screens."""
+    xlib = _load_xlib()
+    display = xlib.XOpenDisplay(None)
+    if not display:
+        raise OSError("Cannot open X display")
+    try:
+        try:
+            return _randr_monitors(xlib, display)
+        except (OSError, AttributeError) as e:
+            logger.debug("RandR monitor query unavailable, trying Xinerama: %s", e)
+        return _xinerama_monitors(xlib, display)
+    finally:
+        xlib.XCloseDisplay(display)
+
+
+def _randr_monitors(xlib, display) -> list[Monitor]:
+    path = _find_library("Xrandr")
+    if not path:
+        raise OSError("libXrandr not found")
+    xrandr = ctypes.cdll.LoadLibrary(path)
+    xrandr.XRRGetMonitors.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.c_int, ctypes.POINTER(ctypes.c_int)]
+    xrandr.XRRGetMonitors.restype = ctypes.POINTER(_XRRMonitorInfo)
+    xrandr.XRRFreeMonitors.argtypes = [ctypes.POINTER(_XRRMonitorInfo)]
+    xlib.XGetAtomName.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+    xlib.XGetAtomName.restype = ctypes.c_void_p
+    xlib.XFree.argtypes = [ctypes.c_void_p]
+
+    count = ctypes.c_int(0)
+    infos = xrandr.XRRGetMonitors(display, xlib.XDefaultRootWindow(display), 1, ctypes.byref(count))
+    if not infos:
+        raise OSError("XRRGetMonitors failed")
+    try:
+        monitors = []
+        for index in range(count.value):
+            info = infos[index]
+            name_ptr = xlib.XGetAtomName(display, info.name)
+            name = ctypes.string_at(name_ptr).decode(errors="replace") if name_ptr else f"screen-{index}"
+            if name_ptr:
+                xlib.XFree(name_ptr)
+            monitors.append(Monitor(name, info.x, info.y, info.width, info.height, bool(info.primary)))
+        return monitors
+    finally:
+        xrandr.XRRFreeMonitors(infos)
+
+
+def _xinerama_monitors(xlib, display) -> list[Monitor]:
+    path = _find_library("Xinerama")
+    if not path:
+        raise OSError("libXinerama not found")
+    xinerama = ctypes.cdll.LoadLibrary(path)
+    xinerama.XineramaIsActive.argtypes = [ctypes.c_void_p]
+    xinerama.XineramaQueryScreens.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int)]
+    xinerama.XineramaQueryScreens.restype = ctypes.POINTER(_XineramaScreenInfo)
+    xlib.XFree.argtypes = [ctypes.c_void_p]
+
+    if not xinerama.XineramaIsActive(display):
+        return []
+    count = ctypes.c_int(0)
+    screens = xinerama.XineramaQueryScreens(display, ctypes.byref(count))
+    if not screens:
+        return []
+    try:
+        return [
+            Monitor(f"screen-{s.screen_number}", s.x_org, s.y_org, s.width, s.height, index == 0)
+            for index, s in enumerate(screens[:count.value])
+        ]
+    finally:
+        xlib.XFree(screens)
+
+
+class _MONITORINFOEXW(ctypes.Structure):
+    _fields_ = [
+        ("cbSize", ctypes.c_ulong),
+        ("rcMonitor", ctypes.c_long * 4),
+        ("rcWork", ctypes.c_long * 4),
+        ("dwFlags", ctypes.c_ulong),
+        ("szDevice", ctypes.c_wchar * 32),
+    ]
+
+
+def _windows_monitors() -> list[Monitor]:
+    from ctypes import wintypes
+
+    user32 = ctypes.windll.user32
+    monitors: list[Monitor] = []
+    callback_type = ctypes.WINFUNCTYPE(
+        ctypes.c_int, wintypes.HMONITOR, wintypes.HDC, ctypes.POINTER(wintypes.RECT), wintypes.LPARAM
+    )
+
+    def _collect(handle, _hdc, _rect, _data):
+        info = _MONITORINFOEXW()
+        info.cbSize = ctypes.sizeof(_MONITORINFOEXW)
+        if user32.GetMonitorInfoW(handle, ctypes.byref(info)):
+            left, top, right, bottom = info.rcMonitor
+            monitors.append(Monitor(info.szDevice, left, top, right - left, bottom - top, bool(info.dwFlags & 1)))
+        return 1
+
+    if not user32.EnumDisplayMonitors(None, None, callback_type(_collect), 0):
+        raise OSError("EnumDisplayMonitors failed")
+    return monitors
+
+
+def enumerate_monitors(fallback_size: tuple[int, int]) -> list[Monitor]:
+    """Connected monitors, primary first; a single ``fallback_size`` monitor when they cannot be queried."""
+    monitors: list[Monitor] = []
+    try:
+        if sys.platform == "win32":
+            monitors = _windows_monitors()
+        elif _x11_available():
+            monitors = _x11_monitors()
+    except Exception as e:
+        logger.debug("Monitor enumeration failed: %s", e)
+    if not monitors:
+        return [Monitor("default", 0, 0, *fallback_size, primary=True)]
+    return sorted(monitors, key=lambda monitor: (not monitor.primary, monitor.x, monitor.y))
@@ -0,0 +1,163 @@
+import logging
+
+logger = logging.getLogger(__name__)
+import functools
+import io
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+# Single switch checked by every span; nothing else runs while it is False
+enabled = False
+
+_BUCKETS = 32  # log2 microsecond buckets: [0, 1) µs, [1, 2) µs, [2, 4) µs ... up to ~35 minutes
+
+
+class SpanHistogram:
+    """Log2-bucketed latency histogram for one span name."""
+
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * _BUCKETS
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        micros = int(seconds * 1_000_000)
+        self.buckets[min(_BUCKETS - 1, micros.bit_length())] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound (seconds) of the bucket holding the given fraction of samples."""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for index, hits in enumerate(self.buckets):
+            seen += hits
+            if seen >= target:
+                return min(self.max, (1 << index) / 1_000_000)
+        return self.max
+
+
+_histograms: dict[str, SpanHistogram] = {}
+_lock = threading.Lock()
+
+
+def record(name: str, seconds: float):
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = SpanHistogram()
+        histogram.add(seconds)
+
+
+def span(name: str):
+    """Decorator timing every call into the ``name`` histogram while profiling is enabled."""
+
+    def _decorate(fn: Callable):
+        @functools.wraps(fn)
+        def _wrapper(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - started)
+
+        return _wrapper
+
+    return _decorate
+
+
+def snapshot() -> dict[str, dict]:
+    """Per-span count, mean, p50/p99 and max in milliseconds."""
+    with _lock:
+        items = list(_histograms.items())
+    return {
+        name: {
+            "count": h.count,
+            "mean_ms": round(h.total / h.count * 1000, 3) if h.count else 0.0,
+            "p50_ms": round(h.percentile(0.50) * 1000, 3),
+            "p99_ms": round(h.percentile(0.99) * 1000, 3),
+            "max_ms": round(h.max * 1000, 3),
+        }
+        for name, h in sorted(items)
+    }
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def format_spans() -> str:
+    lines = [f"{'span':<28} {'count':>8} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+    for name, stats in snapshot().items():
+        lines.append(
+            f"{name:<28} {stats['count']:>8} {stats['mean_ms']:>9} {stats['p50_ms']:>9} "
+            f"{stats['p99_ms']:>9} {stats['max_ms']:>9}"
+        )
+    return "\n".join(lines)
+
+
+class ProfileSession:
+    """Enables spans, cProfile (calling thread) and tracemalloc for a fixed window, then writes a report.
+
+    The profilers are imported here rather than at module level, which every span user pulls in at startup.
+    """
+
+    def __init__(self, window_seconds: int, report_dir: Path):
+        import cProfile
+
+        self.window_seconds = window_seconds
+        self.report_path = report_dir / f"profile-{datetime.now():%Y%m%d-%H%M%S}.txt"
+        self._profiler = cProfile.Profile()
+        self._started = 0.0
+
+    def start(self):
+        global enabled
+        import tracemalloc
+
+        reset()
+        enabled = True
+        tracemalloc.start(10)
+        self._started = time.perf_counter()
+        self._profiler.enable()
+        logger.info("Profiling for %s s; report will be written to %s", self.window_seconds, self.report_path)
+
+    def finish(self) -> Path:
+        global enabled
+        import pstats
+        import tracemalloc
+
+        self._profiler.disable()
+        elapsed = time.perf_counter() - self._started
+        current, peak = tracemalloc.get_traced_memory()
+        top_allocations = tracemalloc.take_snapshot().statistics("lineno")[:20]
+        tracemalloc.stop()
+        enabled = False
+
+        stats_stream = io.StringIO()
+        pstats.Stats(self._profiler, stream=stats_stream).sort_stats("cumulative").print_stats(40)
+
+        self.report_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.report_path.open("w", encoding="utf-8") as fh:
+            fh.write(f"Profile window: {elapsed:.1f} s\n\n")
+            fh.write("== Spans (all threads) ==\n")
+            fh.write(format_spans() + "\n\n")
+            fh.write(f"== Memory (tracemalloc) ==\ncurrent {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB\n")
+            for stat in top_allocations:
+                fh.write(f"{stat}\n")
+            fh.write("\n== cProfile (Tk thread, by cumulative time) ==\n")
+            fh.write(stats_stream.getvalue())
+        logger.info("Profile report written to %s", self.report_path)
+        return self.report_path
@@ -1,3 +1,4 @@
+import functools
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,7 +10,20 @@ import time
 
 from PIL import Image, ImageDraw, ImageChops
 
-from src.config import PID_FILE
+from src.profiling import span
+
+CHANGE_BLOCK_ROWS = 32  # rows per block between early-exit checks
+DHASH_SIZE = 8  # signature is DHASH_SIZE x DHASH_SIZE bits
+
+
+@functools.cache
+def load_numpy():
+    """NumPy, imported on first use so it stays off the startup path; None if it is not installed."""
+    try:
+        import numpy
+    except ImportError:  # callers fall back to PIL
+        return None
+    return numpy
 
 
 def format_duration(minutes: int, language: str = "en") -> str:
@@ -90,33 +104,94 @@ def terminate_pid(pid: int):
         logger.debug("Failed to terminate old instance %s: %s", pid, e)
 
 
-def kill_previous_instance():
-    """Kill previous running instance if exists and write our PID."""
-    if os.path.exists(PID_FILE):
-        try:
-            with open(PID_FILE, "r") as f:
-                old_pid = int(f.read().strip())
-            terminate_pid(old_pid)
-            time.sleep(0.5)
-        except Exception as ex:
-            logger.debug("Error reading/killing previous PID: %s", ex)
+def pid_alive(pid: int) -> bool:
+    """True while a process with this PID exists (including one we may not signal)."""
+    if platform.system() == "Windows":
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        STILL_ACTIVE = 259
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return False
         try:
-            os.remove(PID_FILE)
-        except OSError:
-            pass
+            code = ctypes.c_ulong()
+            return bool(kernel32.GetExitCodeProcess(handle, ctypes.byref(code))) and code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
     try:
-        with open(PID_FILE, "w") as f:
-            f.write(str(os.getpid()))
-    except Exception as ex:
-        logger.debug("Error writing PID file: %s", ex)
-
-
-def calc_change_ratio(img_a, img_b) -> float:
-    """Returns normalized difference (0..1) between two grayscale images."""
-    if img_a.size != img_b.size:
-        img_b = img_b.resize(img_a.size)
+        os.kill(pid, 0)
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+@span("calc_change_stats")
+def calc_change_stats(img_a, img_b, pixel_delta: int = 0, stop_at: float | None = None) -> tuple[float, float]:
+    """Returns (mean absolute difference, fraction of pixels changed by more than pixel_delta), both 0..1.
+
+    Accepts PIL images or uint8 arrays. Frames of different size are treated as fully changed instead of
+    being resized on the hot path.
+    """
+    size_a = img_a.shape[:2] if hasattr(img_a, "shape") else img_a.size[::-1]
+    size_b = img_b.shape[:2] if hasattr(img_b, "shape") else img_b.size[::-1]
+    if size_a != size_b:
+        logger.debug("Frame size changed %s → %s; treating as full change", size_a, size_b)
+        return 1.0, 1.0
+    if load_numpy() is not None:
+        return _change_stats_numpy(img_a, img_b, pixel_delta, stop_at)
+    return _change_stats_pil(img_a, img_b, pixel_delta)
+
+
+def _change_stats_numpy(img_a, img_b, pixel_delta: int, stop_at: float | None) -> tuple[float, float]:
+    np = load_numpy()
+    a = np.asarray(img_a, dtype=np.uint8)
+    b = np.asarray(img_b, dtype=np.uint8)
+    total_pixels = a.size
+    if not total_pixels:
+        return 0.0, 0.0
+    scale = 255 * total_pixels
+    limit = None if stop_at is None else stop_at * scale
+    diff_sum = 0
+    changed = 0
+    rows = a.shape[0]
+    for start in range(0, rows, CHANGE_BLOCK_ROWS):
+        block_a = a[start:start + CHANGE_BLOCK_ROWS]
+        block_b = b[start:start + CHANGE_BLOCK_ROWS]
+        # |a - b| without leaving uint8: max - min never underflows
+        diff = np.maximum(block_a, block_b)
+        diff -= np.minimum(block_a, block_b)
+        diff_sum += int(diff.sum(dtype=np.uint64))
+        changed += int(np.count_nonzero(diff > pixel_delta))
+        if limit is not None and diff_sum >= limit:
+            break
+    return diff_sum / scale, changed / total_pixels
+
+
+def _change_stats_pil(img_a, img_b, pixel_delta: int) -> tuple[float, float]:
     diff = ImageChops.difference(img_a, img_b)
     hist = diff.histogram()
     total_pixels = img_a.size[0] * img_a.size[1]
+    if not total_pixels:
+        return 0.0, 0.0
     diff_sum = sum(value * count for value, count in enumerate(hist))
-    return diff_sum / (255 * total_pixels if total_pixels else 1)
+    changed = sum(hist[pixel_delta + 1:256])
+    return diff_sum / (255 * total_pixels), changed / total_pixels
+
+
+@span("dhash")
+def dhash(img, size: int = DHASH_SIZE) -> int:
+    """Difference hash of a grayscale frame: one bit per horizontally adjacent pair of a (size+1) x size thumbnail.
+
+    Accepts PIL images or uint8 arrays; similar frames differ in few bits (compare with ``(a ^ b).bit_count()``).
+    """
+    if not isinstance(img, Image.Image):
+        img = Image.fromarray(img)
+    pixels = img.resize((size + 1, size), Image.BOX).tobytes()  # one byte per grey pixel
+    signature = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            signature = (signature << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return signature
@@ -0,0 +1,600 @@
+import logging
+
+logger = logging.getLogger(__name__)
+import queue
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+from src.config import (
+    VISUAL_CHECK_INTERVAL,
+    VISUAL_FRAME_HISTORY,
+    VISUAL_HISTORY_SIZE,
+    VISUAL_MASK,
+    VISUAL_MASK_SAVE_WINDOWS,
+    VISUAL_MOTION_CYCLES,
+    VISUAL_PERIODIC_STATES,
+    VISUAL_PIXEL_DELTA,
+    VISUAL_SIGNATURE_HISTORY,
+    VISUAL_SIGNATURE_TOLERANCE,
+    VISUAL_STATIC_CYCLES,
+)
+from .capture import Box, CaptureBackend, CapturePlan, FrameRing
+from .exposure import ExposureMap, map_path
+from .mask import LearnedMask, MaskLearner, mask_path, outside_mask, tile_masks
+from .monitors import Monitor
+from .profiling import span
+from .utils import calc_change_stats, dhash
+
+
+class TileGrid:
+    """Splits the capture box into cols x rows tiles, each with its own baseline and latest change score.
+
+    Every check samples a rotating subset of tiles plus the tiles that changed last time, so a small
+    video window is judged against its own area instead of being diluted by the whole screen.
+
+    Each tile also keeps a short ring of 64-bit difference-hash signatures. A tile whose changes only
+    cycle among a few recurring states (blinking caret, spinner, clock) is flagged periodic and does not
+    count as activity.
+    """
+
+    def __init__(self, cols: int = 1, rows: int = 1, per_check: int = 1):
+        self.configure(cols, rows, per_check)
+
+    def configure(self, cols: int, rows: int, per_check: int):
+        self.cols = max(1, int(cols))
+        self.rows = max(1, int(rows))
+        self.count = self.cols * self.rows
+        self.per_check = max(1, min(self.count, int(per_check)))
+        self._cursor = 0
+        self._hot: set[int] = set()
+        self._layout_box: Box | None = None
+        self._boxes: list[Box] = []
+        self.signatures = [deque(maxlen=VISUAL_SIGNATURE_HISTORY) for _ in range(self.count)]
+        self.reset()
+
+    def reset(self):
+        """Drops baselines and scores; tiles that changed recently stay first in line and signatures are kept."""
+        self.baselines: list = [None] * self.count  # per tile: ring slot of its last sample (the image without NumPy)
+        self.scores = [0.0] * self.count
+        self.changed_pixels = [0.0] * self.count
+        self.compared = [False] * self.count
+        self.periodic = [False] * self.count
+
+    @property
+    def has_baseline(self) -> bool:
+        return any(baseline is not None for baseline in self.baselines)
+
+    def boxes(self, box: Box) -> list[Box]:
+        """Tile boxes in screen coordinates, cached until the capture box changes."""
+        if box != self._layout_box:
+            left, top, width, height = box
+            xs = [left + width * col // self.cols for col in range(self.cols + 1)]
+            ys = [top + height * row // self.rows for row in range(self.rows + 1)]
+            self._boxes = [
+                (xs[col], ys[row], max(1, xs[col + 1] - xs[col]), max(1, ys[row + 1] - ys[row]))
+                for row in range(self.rows)
+                for col in range(self.cols)
+            ]
+            self._layout_box = box
+        return self._boxes
+
+    def next_subset(self, force: bool = False) -> list[int]:
+        """Indices to sample now: changed tiles, the next rotation slice and, when forced, every unverified tile."""
+        subset = sorted(self._hot)
+        if force:
+            subset += [
+                index for index in range(self.count)
+                if self.baselines[index] is not None and not self.compared[index]
+            ]
+        for step in range(self.per_check):
+            subset.append((self._cursor + step) % self.count)
+        self._cursor = (self._cursor + self.per_check) % self.count
+        return list(dict.fromkeys(subset))
+
+    def record(self, index: int, sample, threshold: float, ring: FrameRing | None = None) -> float | None:
+        """Makes the sample the tile baseline; returns its change score if there was one to compare.
+
+        With the tile plan's ``ring``, ``sample`` is its current slot and the baseline is kept as a slot index,
+        read back only while it is still ``ring.baseline``: a slot overwritten since is never compared against.
+        """
+        baseline = self.baselines[index]
+        if ring is not None:
+            self.baselines[index] = ring.current
+            baseline = ring.frame(baseline) if baseline is not None and baseline == ring.baseline else None
+        else:
+            self.baselines[index] = sample
+        signature = dhash(sample)
+        history = self.signatures[index]
+        if baseline is None:
+            history.append(signature)
+            return None
+        score, changed = calc_change_stats(baseline, sample, VISUAL_PIXEL_DELTA, stop_at=threshold)
+        self.scores[index] = score
+        self.changed_pixels[index] = changed
+        self.compared[index] = True
+        self.periodic[index] = score >= threshold and self._recurs(history, signature)
+        history.append(signature)
+        if score >= threshold and not self.periodic[index]:
+            self._hot.add(index)
+        else:
+            self._hot.discard(index)
+        return score
+
+    @staticmethod
+    def _recurs(history: deque, signature: int) -> bool:
+        """True if the full history plus ``signature`` collapses into a few states and ``signature`` is an old one."""
+        if len(history) < history.maxlen or (history[-1] ^ signature).bit_count() <= VISUAL_SIGNATURE_TOLERANCE:
+            return False
+        if not any((old ^ signature).bit_count() <= VISUAL_SIGNATURE_TOLERANCE for old in list(history)[:-1]):
+            return False
+        states: list[int] = []
+        for old in history:
+            if not any((old ^ state).bit_count() <= VISUAL_SIGNATURE_TOLERANCE for state in states):
+                states.append(old)
+                if len(states) > VISUAL_PERIODIC_STATES:
+                    return False
+        return True
+
+    def active(self, threshold: float) -> bool:
+        return any(
+            compared and score >= threshold and not periodic
+            for compared, score, periodic in zip(self.compared, self.scores, self.periodic)
+        )
+
+    def max_score(self) -> float | None:
+        """Highest score among compared tiles, counting periodic tiles as unchanged; None if nothing was compared."""
+        scores = [
+            0.0 if periodic else score
+            for compared, score, periodic in zip(self.compared, self.scores, self.periodic)
+            if compared
+        ]
+        return max(scores, default=None)
+
+
+class VisualCadence:
+    """Chooses when the next visual sample is due from a short history of change scores.
+
+    Static screens are sampled sparsely (halving the distance to the deadline), sustained motion
+    skips straight to a pair of samples just before the deadline, and the last seconds before the
+    deadline are always sampled densely.
+    """
+
+    def __init__(self, base_interval: float = VISUAL_CHECK_INTERVAL / 1000):
+        self.base_interval = base_interval
+        self.history: deque[float] = deque(maxlen=VISUAL_HISTORY_SIZE)
+        self.reason = "default"
+        self._sample_times: deque[float] = deque(maxlen=VISUAL_HISTORY_SIZE)
+
+    def record(self, ratio: float | None, now: float | None = None):
+        """Adds one sample; ``ratio`` is its change score relative to the threshold (None: baseline only)."""
+        self._sample_times.append(time.time() if now is None else now)
+        if ratio is not None:
+            self.history.append(ratio)
+
+    def _trailing(self, predicate) -> int:
+        streak = 0
+        for value in reversed(self.history):
+            if not predicate(value):
+                break
+            streak += 1
+        return streak
+
+    def next_due(self, now: float, deadline: float) -> float:
+        base = self.base_interval
+        remaining = deadline - now
+        if remaining <= 2 * base:
+            reason, delay = "pre-deadline", base / 2
+        elif self._trailing(lambda ratio: ratio >= 1.0) >= VISUAL_MOTION_CYCLES:
+            reason, delay = "motion-confirmed", remaining - base
+        elif self._trailing(lambda ratio: ratio < 0.2) >= VISUAL_STATIC_CYCLES:
+            reason, delay = "static", max(base, remaining / 2)
+        else:
+            reason, delay = "default", base
+        if reason != self.reason and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Visual cadence: %s (next in %.1f s, %.1f samples/min)", reason, delay, self.rate())
+        self.reason = reason
+        return now + delay
+
+    def rate(self) -> float:
+        """Effective samples per minute over the remembered samples."""
+        if len(self._sample_times) < 2:
+            return 0.0
+        span_seconds = self._sample_times[-1] - self._sample_times[0]
+        return (len(self._sample_times) - 1) * 60 / span_seconds if span_seconds > 0 else 0.0
+
+    def stats(self) -> dict:
+        """Current cadence, its reason and the remembered change scores (relative to the threshold)."""
+        return {
+            "reason": self.reason,
+            "interval_seconds": self.base_interval,
+            "samples_per_min": round(self.rate(), 2),
+            "history": [round(ratio, 3) for ratio in self.history],
+        }
+
+
+class VisualResult(NamedTuple):
+    """Outcome of one background sampling pass, posted back to the Tk thread."""
+
+    epoch: int  # visual window the pass belonged to; a newer epoch means activity happened meanwhile
+    started: float  # time.time() when sampling began
+    force: bool  # lock-deadline check whose outcome decides the lock
+    active: bool  # some tile exceeded the threshold
+    has_baseline: bool
+    score: float | None  # highest tile score relative to its threshold (1.0 = at threshold); None: baselines only
+
+
+def merge_results(results: list[VisualResult | None]) -> VisualResult | None:
+    """Combines the per-monitor results of one check; None if every monitor failed."""
+    done = [result for result in results if result is not None]
+    if not done:
+        return None
+    scores = [result.score for result in done if result.score is not None]
+    return VisualResult(
+        done[0].epoch,
+        done[0].started,
+        done[0].force,
+        any(result.active for result in done),
+        any(result.has_baseline for result in done),
+        max(scores, default=None),
+    )
+
+
+class SamplingWorker:
+    """Single background thread running visual sampling jobs so screenshots never stall the Tk loop.
+
+    The queue is bounded: ``submit`` refuses new work instead of piling up captures behind a slow one.
+    """
+
+    def __init__(self, maxsize: int = 1):
+        self._queue: queue.Queue = queue.Queue(maxsize)
+        self._on_exit: Callable[[], None] | None = None
+        self._thread = threading.Thread(target=self._run, name="visual-sampler", daemon=True)
+        self._thread.start()
+
+    def submit(self, job: Callable[[], object], on_done: Callable[[object], None]) -> bool:
+        """Queues ``job``; returns False if busy.
+
+        ``on_done(result)`` is called on the worker thread, or with None by ``stop`` if the job is dropped.
+        """
+        try:
+            self._queue.put_nowait((job, on_done))
+        except queue.Full:
+            return False
+        return True
+
+    @staticmethod
+    def _report(on_done: Callable[[object], None], result: object):
+        try:
+            on_done(result)
+        except Exception as e:
+            logger.debug("Visual sampling callback failed: %s", e)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            job, on_done = item
+            try:
+                result = job()
+            except Exception as e:
+                logger.debug("Visual sampling job failed: %s", e)
+                result = None
+            self._report(on_done, result)
+        if self._on_exit is not None:
+            try:
+                self._on_exit()
+            except Exception as e:
+                logger.debug("Visual sampler cleanup failed: %s", e)
+
+    def stop(self, on_exit: Callable[[], None] | None = None):
+        """Ends the thread after the job it is running, without waiting for it.
+
+        Queued jobs are dropped and report None, so callers counting results still complete. ``on_exit`` runs
+        on the worker thread once the running job is done: resources the jobs use are released there.
+        """
+        self._on_exit = on_exit
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                self._report(item[1], None)
+        self._queue.put(None)  # only the Tk thread submits, so the drained queue has room
+
+    def join(self, timeout: float | None = None) -> bool:
+        """Waits for the thread to end (after ``stop``); True if it did."""
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+
+def apply_margins(box: Box, margins: dict | None) -> Box:
+    """Shrinks ``box`` by fractional top/bottom/left/right margins; margins that cover it entirely are ignored."""
+    x, y, width, height = box
+    margins = margins or {}
+
+    def _ratio(key: str) -> float:
+        value = margins.get(key, 0.0)
+        try:
+            return max(0.0, min(1.0, float(value)))
+        except (TypeError, ValueError):
+            return 0.0
+
+    left_px = int(width * _ratio("left"))
+    right_px = int(width * _ratio("right"))
+    top_px = int(height * _ratio("top"))
+    bottom_px = int(height * _ratio("bottom"))
+
+    if left_px + right_px >= width:
+        left_px = 0
+        right_px = 0
+    if top_px + bottom_px >= height:
+        top_px = 0
+        bottom_px = 0
+
+    return x + left_px, y + top_px, max(1, width - left_px - right_px), max(1, height - top_px - bottom_px)
+
+
+class MonitorChannel:
+    """Visual detection for one monitor: its own settings, tile grid, capture plans, backend and worker thread.
+
+    Channels of different monitors sample in parallel. ``tiles`` and ``plans`` are replaced (never mutated)
+    from the Tk thread, so a job already running keeps the objects it was submitted with. With an
+    ``exposure_dir``, every sample also feeds the monitor's burn-in exposure map.
+
+    With a ``mask_mode`` other than "off", the channel captures the whole monitor while a ``MaskLearner``
+    collects statistics from the windows that ended in a lock (the margins are masked out of the diff instead
+    of cropped). In "auto" mode the learned mask replaces the margins at the start of the next visual window:
+    static or periodic edge bands are no longer captured and periodic pixels inside the box are zeroed before
+    diffing.
+    """
+
+    def __init__(self, monitor: Monitor, margins: dict, threshold: float, grid: tuple[int, int, int],
+                 exposure_dir: Path | None = None, mask_dir: Path | None = None, mask_mode: str = VISUAL_MASK):
+        self.monitor = monitor
+        self.margins = margins
+        self.threshold = threshold
+        self.tiles = TileGrid(*grid)
+        self.plans: list[CapturePlan] | None = None
+        self.backend: CaptureBackend | None = None  # worker thread only: mss/Xlib handles belong to their thread
+        self._backend_factory: Callable[[], CaptureBackend | None] | None = None  # set by the Tk thread
+        self._backend_built_from: Callable[[], CaptureBackend | None] | None = None  # worker thread only
+        self.exposure_dir = exposure_dir
+        self.mask_dir = mask_dir
+        self.mask_mode = mask_mode
+        self.learned: LearnedMask | None = None  # applied mask ("auto" mode); Tk thread
+        self.proposal: LearnedMask | None = None  # latest learner result; set by the worker thread
+        self.plan_masks: list = []  # per plan: bool mask of pixels left out of the diff, or None
+        self.worker = SamplingWorker()
+        self._submitted_epoch = -1  # Tk thread only
+        self.locked_epoch = -1  # latest visual window that ended in a lock; set by the Tk thread
+        self._sampled_epoch = -1  # worker thread only
+        self._exposure: ExposureMap | None = None  # worker thread only
+        self._exposure_plans: list[CapturePlan] | None = None
+        self._learner: MaskLearner | None = None  # worker thread only
+        self._learner_plans: list[CapturePlan] | None = None
+
+    @property
+    def has_backend(self) -> bool:
+        return self._backend_factory is not None
+
+    def use_backend(self, factory: Callable[[], CaptureBackend | None] | None):
+        """Tk thread: the worker opens a backend from ``factory`` before its next capture, closing the old one."""
+        self._backend_factory = factory
+
+    def _sync_backend(self):
+        """Worker thread: backends are created, used and closed on the thread that samples with them."""
+        factory = self._backend_factory
+        if factory is self._backend_built_from:
+            return
+        if self.backend is not None:
+            self.backend.close()
+            self.backend = None
+        self._backend_built_from = factory
+        if factory is not None:
+            self.backend = factory()
+
+    @property
+    def grid(self) -> tuple[int, int, int]:
+        return self.tiles.cols, self.tiles.rows, self.tiles.per_check
+
+    def configure(self, monitor: Monitor, margins: dict, threshold: float, grid: tuple[int, int, int],
+                  mask_mode: str = VISUAL_MASK) -> bool:
+        """Applies new geometry/settings; returns True if baselines became invalid."""
+        reset = (monitor != self.monitor or margins != self.margins or grid != self.grid
+                 or mask_mode != self.mask_mode)
+        if monitor != self.monitor:
+            self.proposal = None
+        if monitor != self.monitor or mask_mode != "auto":
+            self.learned = None
+        self.monitor = monitor
+        self.margins = margins
+        self.threshold = threshold
+        self.mask_mode = mask_mode
+        if grid != self.grid:
+            self.tiles = TileGrid(*grid)
+        if reset:
+            self.plans = None
+        return reset
+
+    def capture_box(self) -> Box:
+        if self.mask_mode == "off":
+            return apply_margins(self.monitor.box, self.margins)
+        if self.learned is not None:
+            return apply_margins(self.monitor.box, self.learned.margins)
+        return self.monitor.box  # learning: whole monitor, the margins become part of the diff mask
+
+    def get_plans(self) -> list[CapturePlan]:
+        """One capture plan per tile, rebuilt only when geometry, margins, the grid or the mask change."""
+        if self.plans is None:
+            box = self.capture_box()
+            # Masked plans share the whole monitor's factor so their samples line up with the learned grid
+            factor = CapturePlan.factor_for(box[2] if self.mask_mode == "off" else self.monitor.width)
+            self.plans = [CapturePlan(tile_box, factor, VISUAL_FRAME_HISTORY) for tile_box in self.tiles.boxes(box)]
+            self.plan_masks = self._plan_masks(self.plans, factor)
+        return self.plans
+
+    def _plan_masks(self, plans: list[CapturePlan], factor: int) -> list:
+        if self.mask_mode == "off" or not plans or plans[0].ring is None:
+            return [None] * len(plans)
+        if self.learned is not None:
+            ignore = self.learned.ignore
+        else:
+            ignore = outside_mask(self.monitor, factor, apply_margins(self.monitor.box, self.margins))
+        return tile_masks(ignore, self.monitor, plans)
+
+    def _adopt_mask(self):
+        """Tk thread, at the start of a visual window: switches to a newly learned mask in "auto" mode."""
+        proposal = self.proposal
+        if (self.mask_mode != "auto" or self.learned is not None or proposal is None
+                or proposal.monitor != self.monitor):
+            return
+        self.learned = proposal
+        self.plans = None
+        logger.info("Applying the learned visual mask on %s: %s", self.monitor.name, proposal.summary())
+
+    def mask_status(self) -> dict:
+        proposal = self.proposal
+        learner = self._learner
+        status = {"mode": self.mask_mode, "applied": self.learned is not None,
+                  "windows": learner.windows if learner is not None else 0}
+        if proposal is not None:
+            status.update(proposal.summary())
+        return status
+
+    @span("capture_sample")
+    def capture(self, plan: CapturePlan):
+        """Takes a downscaled grayscale screenshot of the planned area to reduce CPU use."""
+        try:
+            if self.backend is None:
+                return None
+            return plan.capture(self.backend)
+        except Exception as e:
+            logger.debug("Visual sample failed on %s: %s", self.monitor.name, e)
+            return None
+
+    def _exposure_for(self, plans: list[CapturePlan]) -> ExposureMap | None:
+        """Worker thread: the exposure map laid out for ``plans``, reopened when the plans are rebuilt."""
+        if plans is not self._exposure_plans:
+            if self._exposure is not None:
+                self._exposure.close()
+                self._exposure = None
+            self._exposure_plans = plans
+            if self.exposure_dir is not None and plans and plans[0].ring is not None:
+                try:
+                    path = map_path(self.exposure_dir, self.monitor, plans[0].factor)
+                    self._exposure = ExposureMap(path, self.monitor, plans)
+                except (OSError, ValueError) as e:
+                    logger.warning("No exposure map for %s: %s", self.monitor.name, e)
+        return self._exposure
+
+    def _learner_for(self, plans: list[CapturePlan]) -> MaskLearner | None:
+        """Worker thread: the learner while a mask is being learned; None when masking is off or applied."""
+        monitor = self.monitor
+        if (self.mask_mode == "off" or self.mask_dir is None or self.learned is not None or not plans
+                or plans[0].ring is None or plans[0].factor != CapturePlan.factor_for(monitor.width)):
+            return None
+        learner = self._learner
+        if learner is None or learner.monitor != monitor:
+            if learner is not None:
+                learner.save()
+            learner = self._learner = MaskLearner(mask_path(self.mask_dir, monitor), monitor, plans[0].factor)
+            self.proposal = learner.result()
+            self._learner_plans = plans
+        elif plans is not self._learner_plans:
+            learner.restart()
+            self._learner_plans = plans
+        return learner
+
+    def _end_learning_window(self, learner: MaskLearner, learn: bool):
+        if not learner.end_window(learn):
+            return
+        proposal = learner.result()
+        if proposal is not None:
+            if self.proposal is None:
+                logger.info("Learned a visual mask for %s after %s idle periods: %s%s", self.monitor.name,
+                            learner.windows, proposal.summary(),
+                            "" if self.mask_mode == "auto" else " (visual_mask \"auto\" applies it)")
+            self.proposal = proposal
+        if learner.windows % VISUAL_MASK_SAVE_WINDOWS == 0:
+            learner.save()
+
+    @span("visual_sample")
+    def sample(self, tiles: TileGrid, plans: list[CapturePlan], epoch: int, force: bool, threshold: float,
+               started: float, masks: list | None = None) -> VisualResult:
+        """Worker thread: captures and diffs the next tile subset, feeding the exposure map and mask learner."""
+        self._sync_backend()
+        exposure = self._exposure_for(plans)
+        learner = self._learner_for(plans)
+        if self._sampled_epoch != epoch:
+            tiles.reset()
+            if exposure is not None:
+                exposure.restart()
+            if learner is not None:
+                # A window that ended in activity may have captured the user's work: only locks teach the mask
+                self._end_learning_window(learner, self._sampled_epoch == self.locked_epoch)
+            self._sampled_epoch = epoch
+        now = time.monotonic()
+        for index in tiles.next_subset(force):
+            snapshot = self.capture(plans[index])
+            if snapshot is None:
+                continue
+            if exposure is not None:
+                exposure.add(index, snapshot, now)
+            if learner is not None:
+                learner.observe(index, plans[index], snapshot)
+            mask = masks[index] if masks else None
+            if mask is not None:
+                snapshot[mask] = 0  # the baseline was masked the same way, so these pixels never differ
+            change_ratio = tiles.record(index, snapshot, threshold, plans[index].ring)
+            if change_ratio is None:
+                logger.debug("Visual baseline captured (%s, tile %s).", self.monitor.name, index)
+            elif logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Visual change (%s, tile %s): %.2f%% / %.2f%% (%.2f%% pixels changed)%s",
+                    self.monitor.name,
+                    index,
+                    change_ratio * 100,
+                    threshold * 100,
+                    tiles.changed_pixels[index] * 100,
+                    " - periodic, ignored" if tiles.periodic[index] else "",
+                )
+        if exposure is not None:
+            exposure.flush_if_due(now)
+        score = tiles.max_score()
+        if score is not None:
+            score = score / threshold if threshold else 0.0
+        return VisualResult(epoch, started, force, tiles.active(threshold), tiles.has_baseline, score)
+
+    def submit(self, epoch: int, force: bool, started: float, on_done: Callable) -> bool:
+        if epoch != self._submitted_epoch:
+            self._submitted_epoch = epoch
+            self._adopt_mask()
+        tiles, plans, masks, threshold = self.tiles, self.get_plans(), self.plan_masks, self.threshold
+        return self.worker.submit(
+            lambda: self.sample(tiles, plans, epoch, force, threshold, started, masks), on_done
+        )
+
+    def close(self, timeout: float = 0.0):
+        """Stops the worker; the backend, exposure map and learner are released on the worker thread once its
+        running capture is done, so they are never closed under it. Waits up to ``timeout`` for that (at exit).
+        """
+        self.worker.stop(self._release)
+        if timeout and not self.worker.join(timeout):
+            logger.debug("Visual sampler of %s still busy after %.1f s", self.monitor.name, timeout)
+
+    def _release(self):
+        """Worker thread, after its last job."""
+        if self.backend is not None:
+            self.backend.close()
+            self.backend = None
+        if self._exposure is not None:
+            self._exposure.close()
+            self._exposure = None
+        if self._learner is not None:
+            self._learner.save()
+            self._learner = None
@@ -0,0 +1,135 @@
+import logging
+
+logger = logging.getLogger(__name__)
+import ctypes
+import os
+import select
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Callable
+
+from .capture import _find_library
+
+# inotify(7) event bits; the directory is watched so atomic renames onto the file are seen
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+def _load_inotify():
+    path = _find_library("c")
+    libc = ctypes.CDLL(path, use_errno=True)
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+class SettingsWatcher:
+    """Calls ``on_change`` (from a background thread) when the watched file is rewritten.
+
+    Uses inotify on Linux so an idle watcher costs nothing; elsewhere it polls the file's mtime every
+    ``poll_interval`` seconds. Callers are expected to debounce: editors often write in several steps.
+    """
+
+    def __init__(self, path: Path, on_change: Callable[[], None], poll_interval: float = 2.0):
+        self.path = Path(path)
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._inotify_fd = -1
+        self._wake_r = self._wake_w = -1
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        target = self._poll_loop
+        if sys.platform.startswith("linux"):
+            try:
+                self._open_inotify()
+                target = self._inotify_loop
+            except (OSError, AttributeError) as e:
+                logger.debug("inotify unavailable, polling %s instead: %s", self.path, e)
+        self._stop.clear()
+        self._thread = threading.Thread(target=target, name="settings-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._wake_w >= 0:
+            os.write(self._wake_w, b"x")
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        for fd in (self._inotify_fd, self._wake_r, self._wake_w):
+            if fd >= 0:
+                os.close(fd)
+        self._inotify_fd = self._wake_r = self._wake_w = -1
+
+    def _open_inotify(self):
+        libc = _load_inotify()
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_MODIFY
+        if libc.inotify_add_watch(fd, os.fsencode(self.path.parent), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(errno, "inotify_add_watch failed")
+        self._inotify_fd = fd
+        self._wake_r, self._wake_w = os.pipe()
+
+    def _inotify_loop(self):
+        name = os.fsencode(self.path.name)
+        while not self._stop.is_set():
+            try:
+                ready, _, _ = select.select([self._inotify_fd, self._wake_r], [], [])
+            except (OSError, ValueError):
+                return
+            if self._wake_r in ready or self._stop.is_set():
+                return
+            try:
+                data = os.read(self._inotify_fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            if name in self._changed_names(data):
+                self._notify()
+
+    @staticmethod
+    def _changed_names(data: bytes) -> set[bytes]:
+        names = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _wd, _mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            names.add(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+        return names
+
+    def _poll_loop(self):
+        last = self._mtime()
+        while not self._stop.wait(self.poll_interval):
+            current = self._mtime()
+            if current != last:
+                last = current
+                self._notify()
+
+    def _mtime(self):
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _notify(self):
+        try:
+            self.on_change()
+        except Exception:
+            logger.exception("Settings change callback failed")
@@ -0,0 +1,63 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src import config  # noqa: E402
+from src.instance import SingleInstance  # noqa: E402
+
+
+class CtlHeadlessTest(unittest.TestCase):
+    """``black.py ctl`` must work without a display: over SSH, from cron, on a headless box."""
+
+    def setUp(self):
+        self.runtime = tempfile.TemporaryDirectory()
+        self.env = {key: value for key, value in os.environ.items()
+                    if key not in ("DISPLAY", "WAYLAND_DISPLAY")}
+        self.env["XDG_RUNTIME_DIR"] = self.runtime.name
+        self._saved_runtime = os.environ.get("XDG_RUNTIME_DIR")
+
+    def tearDown(self):
+        if self._saved_runtime is None:
+            os.environ.pop("XDG_RUNTIME_DIR", None)
+        else:
+            os.environ["XDG_RUNTIME_DIR"] = self._saved_runtime
+        self.runtime.cleanup()
+
+    def _ctl(self, *args: str) -> subprocess.CompletedProcess:
+        return subprocess.run([sys.executable, "black.py", "ctl", *args], cwd=ROOT, env=self.env,
+                              capture_output=True, text=True, timeout=30)
+
+    def test_reports_missing_instance_without_display(self):
+        result = self._ctl("status")
+        self.assertEqual(result.returncode, 1, result.stderr)
+        self.assertIn("not running", result.stderr)
+        self.assertNotIn("Traceback", result.stderr)
+
+    def test_talks_to_running_instance_without_display(self):
+        os.environ["XDG_RUNTIME_DIR"] = self.runtime.name  # the in-process owner uses the same endpoint
+        instance = SingleInstance(config.instance_name())
+        self.assertTrue(instance.acquire())
+        try:
+            instance.serve(lambda message, conn: {"ok": True, "result": message})
+            result = self._ctl("disable_auto_lock_for", "15")
+        finally:
+            instance.close()
+        self.assertEqual(result.returncode, 0, result.stderr)
+        reply = json.loads(result.stdout)
+        self.assertEqual(reply["result"], {"cmd": "disable_auto_lock_for", "minutes": 15})
+
+    def test_bad_usage_exits_with_usage_error(self):
+        result = self._ctl()
+        self.assertEqual(result.returncode, 2)
+        self.assertIn("usage", result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
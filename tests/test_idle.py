@@ -0,0 +1,111 @@
+import ctypes
+import os
+import shutil
+import subprocess
+import sys
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src import idle  # noqa: E402
+from src.capture import _find_library, _load_xlib  # noqa: E402
+from src.idle import XScreenSaverIdle, create_idle_source  # noqa: E402
+
+XVFB = shutil.which("Xvfb")
+
+
+def _start_xvfb(*args: str) -> tuple[subprocess.Popen, str]:
+    """Xvfb on the first free display number; returns the process and its ``:N`` name."""
+    read_fd, write_fd = os.pipe()
+    process = subprocess.Popen([XVFB, "-displayfd", str(write_fd), "-nolisten", "tcp", "-screen", "0", "640x480x24",
+                                *args], pass_fds=(write_fd,), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as fh:
+        number = fh.readline().strip()
+    if not number:
+        process.kill()
+        process.wait()
+        raise unittest.SkipTest("Xvfb did not start")
+    return process, f":{number}"
+
+
+class _XDisplayTest(unittest.TestCase):
+    """Runs against a private Xvfb when one is installed, else against ``$DISPLAY``; skips without either."""
+
+    xvfb_args: tuple[str, ...] = ()
+
+    def setUp(self):
+        if not sys.platform.startswith("linux") or not _find_library("X11") or not _find_library("Xss"):
+            self.skipTest("needs libX11 and libXss")
+        if XVFB:
+            process, display = _start_xvfb(*self.xvfb_args)
+            self.addCleanup(process.wait)
+            self.addCleanup(process.terminate)
+        elif os.environ.get("DISPLAY") and not self.xvfb_args:
+            display = os.environ["DISPLAY"]
+        else:
+            self.skipTest("needs Xvfb or an X display")
+        patcher = mock.patch.dict(os.environ, {"DISPLAY": display})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        os.environ.pop("XDG_SESSION_TYPE", None)
+
+
+class XScreenSaverIdleTest(_XDisplayTest):
+    """The MIT-SCREEN-SAVER counter grows while nothing happens and drops on a synthetic XTest event."""
+
+    def _fake_motion(self):
+        path = _find_library("Xtst")
+        if not path:
+            self.skipTest("needs libXtst for synthetic input")
+        xtst = ctypes.cdll.LoadLibrary(path)
+        xtst.XTestFakeRelativeMotionEvent.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_ulong]
+        xlib = _load_xlib()
+        xlib.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        display = xlib.XOpenDisplay(None)
+        self.assertTrue(display)
+        try:
+            xtst.XTestFakeRelativeMotionEvent(display, 5, 5, 0)
+            xlib.XSync(display, 0)
+        finally:
+            xlib.XCloseDisplay(display)
+
+    def test_idle_grows_and_resets_on_input(self):
+        source = create_idle_source()
+        self.assertIsInstance(source, XScreenSaverIdle)
+        self.addCleanup(source.close)
+        self._fake_motion()
+        start = source.idle_seconds()
+        time.sleep(0.5)
+        grown = source.idle_seconds()
+        self.assertGreaterEqual(grown - start, 0.4)
+        self._fake_motion()
+        self.assertLess(source.idle_seconds(), grown)
+        self.assertLess(source.idle_seconds(), 0.4)
+
+
+class MissingExtensionTest(_XDisplayTest):
+    """Without MIT-SCREEN-SAVER there is no native source, so the locker falls back to input events."""
+
+    xvfb_args = ("-extension", "MIT-SCREEN-SAVER")
+
+    def test_no_native_source_without_extension(self):
+        self.assertIsNone(create_idle_source())
+
+
+class FallbackTest(unittest.TestCase):
+    def test_no_native_source_when_extension_query_fails(self):
+        error = OSError("MIT-SCREEN-SAVER extension not available")
+        with mock.patch.object(idle, "_x11_available", return_value=True), \
+                mock.patch.object(idle, "XScreenSaverIdle", side_effect=error), \
+                mock.patch.object(idle.sys, "platform", "linux"), \
+                mock.patch.dict(os.environ, {"XDG_SESSION_TYPE": "x11"}):
+            self.assertIsNone(create_idle_source())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src import instance  # noqa: E402
+from src.instance import SingleInstance, claim_instance  # noqa: E402
+
+
+class ClaimInstanceTest(unittest.TestCase):
+    """A later launch must not terminate an owner that is only slow to answer."""
+
+    def setUp(self):
+        self.runtime = tempfile.TemporaryDirectory()
+        patcher = mock.patch.dict(os.environ, {"XDG_RUNTIME_DIR": self.runtime.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.runtime.cleanup)
+        self.owner = SingleInstance("claim-test")
+        self.assertTrue(self.owner.acquire())
+        self.addCleanup(self.owner.close)
+
+    def test_retries_busy_owner_instead_of_terminating_it(self):
+        received = []
+
+        def _handler(message, conn):
+            received.append(message)
+            if len(received) == 1:
+                conn.close()  # busy: the first request goes unanswered
+                return None
+            return {"ok": True}
+
+        self.owner.serve(_handler)
+        with mock.patch.object(instance, "HANDOFF_RETRY_DELAY", 0.01), \
+                mock.patch("src.utils.terminate_pid") as terminate:
+            self.assertIsNone(claim_instance("claim-test", ["profile", "60"]))
+        terminate.assert_not_called()
+        self.assertEqual(received[-1], {"cmd": "launch", "argv": ["profile", "60"]})
+
+    def test_does_not_signal_a_pid_that_is_not_running(self):
+        self.owner.lock_path.write_text("999999999")
+        with mock.patch("src.utils.terminate_pid") as terminate:
+            self.assertFalse(SingleInstance("claim-test").take_over())
+        terminate.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
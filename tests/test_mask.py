@@ -0,0 +1,72 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.capture import CapturePlan  # noqa: E402
+from src.config import VISUAL_MASK_MIN_WINDOWS  # noqa: E402
+from src.mask import MaskLearner  # noqa: E402
+from src.monitors import Monitor  # noqa: E402
+from src.utils import load_numpy  # noqa: E402
+
+np = load_numpy()
+FACTOR = 3
+MONITOR = Monitor("DP-1", 0, 0, 600, 300)  # 200 x 100 samples: the last block row overhangs by 4 rows
+
+
+@unittest.skipIf(np is None, "mask learning needs NumPy")
+class MaskLearnerTest(unittest.TestCase):
+    """Only locked windows teach the mask, and only regions that keep returning to known states are periodic."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "DP-1-600x300.npz"
+        self.plan = CapturePlan(MONITOR.box, FACTOR)
+        self.rng = np.random.default_rng(0)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _screen(self, window: int, tick: int):
+        """A desktop that differs per window, a taskbar with a two-state clock and a video that never repeats."""
+        frame = np.random.default_rng(window).integers(0, 256, (100, 200), dtype=np.uint8)
+        frame[90:] = 40  # taskbar
+        frame[92:100, 176:192] = 255 if tick % 2 else 0  # clock
+        frame[16:48, 16:80] = self.rng.integers(0, 256, (32, 64), dtype=np.uint8)  # video
+        return frame
+
+    def _window(self, learner: MaskLearner, window: int, learn: bool = True) -> bool:
+        for tick in range(4):
+            learner.observe(0, self.plan, self._screen(window, tick))
+        return learner.end_window(learn)
+
+    def test_windows_ending_in_activity_are_dropped(self):
+        learner = MaskLearner(self.path, MONITOR, FACTOR)
+        for window in range(VISUAL_MASK_MIN_WINDOWS):
+            self.assertFalse(self._window(learner, window, learn=False))
+        self.assertEqual(learner.windows, 0)
+        self.assertFalse(learner.seen.any())
+        self.assertTrue((learner.low == 255).all())
+        self.assertFalse(learner.state_count.any())
+
+    def test_learns_recurring_clock_but_not_video(self):
+        learner = MaskLearner(self.path, MONITOR, FACTOR)
+        for window in range(VISUAL_MASK_MIN_WINDOWS):
+            self.assertTrue(self._window(learner, window))
+        mask = learner.result()
+        self.assertIsNotNone(mask)
+        self.assertTrue(mask.ignore[92:100, 176:192].all())
+        self.assertFalse(mask.ignore[16:48, 16:80].any())
+        self.assertAlmostEqual(mask.margins["bottom"], 0.1)
+
+        learner.save()
+        reloaded = MaskLearner(self.path, MONITOR, FACTOR).result()
+        self.assertEqual(reloaded.windows, VISUAL_MASK_MIN_WINDOWS)
+        self.assertTrue((reloaded.ignore == mask.ignore).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
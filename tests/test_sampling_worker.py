@@ -0,0 +1,39 @@
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.visual import SamplingWorker  # noqa: E402
+
+
+class SamplingWorkerStopTest(unittest.TestCase):
+    """``stop`` must not strand callers waiting for results, nor release resources under a running job."""
+
+    def test_dropped_job_reports_none_and_cleanup_waits_for_running_job(self):
+        worker = SamplingWorker()
+        release = threading.Event()
+        started = threading.Event()
+        events = []
+
+        def _running():
+            started.set()
+            release.wait(5)
+            return "sampled"
+
+        self.assertTrue(worker.submit(_running, lambda result: events.append(("running", result))))
+        self.assertTrue(started.wait(5))
+        self.assertTrue(worker.submit(lambda: "never", lambda result: events.append(("queued", result))))
+
+        worker.stop(lambda: events.append("exit"))
+        self.assertEqual(events, [("queued", None)])  # without waiting for the running job
+
+        release.set()
+        self.assertTrue(worker.join(5))
+        self.assertEqual(events, [("queued", None), ("running", "sampled"), "exit"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.config import CURSOR_HIDE_NEVER, SettingsStore  # noqa: E402
+
+
+class SettingsReloadTest(unittest.TestCase):
+    """An external edit with a malformed value is rejected as a whole; the running values stay."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        patcher = mock.patch.dict(os.environ, {"APPDATA": self.directory.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.directory.cleanup)
+        path = Path(self.directory.name) / "black_screensaver" / "settings.json"
+        path.parent.mkdir()
+        path.write_text("{}", encoding="utf-8")  # an existing file skips system-language detection
+        self.store = SettingsStore()
+        self.assertEqual(self.store.path, path)
+        self.store.save()
+
+    def _edit(self, **values):
+        data = json.loads(self.store.path.read_text(encoding="utf-8"))
+        data.update(values)
+        self.store.path.write_text(json.dumps(data), encoding="utf-8")
+        return self.store.reload()
+
+    def test_rejects_malformed_reload_and_keeps_values(self):
+        before = self.store.to_dict()
+        for values in (
+            {"timeout_seconds": "30"},
+            {"timeout_seconds": 30, "visual_tile_grid": 3},
+            {"mouse_check_ms": 0},
+            {"cursor_hide_ms": 1.5},
+            {"cursor_hide_ms": -2},
+            {"pause_minutes": ["5"]},
+            {"visual_margins": {"top": 2}},
+        ):
+            with self.subTest(values=values):
+                self.assertEqual(self._edit(**values), set())
+                self.assertEqual(self.store.to_dict(), before)
+
+    def test_ignores_keys_outside_the_settings(self):
+        self.assertEqual(self._edit(reload=1, save=None, _save_timer=None, timeout_seconds=30), {"timeout_seconds"})
+        self.assertTrue(callable(self.store.reload))
+        self.assertTrue(callable(self.store.save))
+        self.assertEqual(self.store.timeout_seconds, 30)
+
+    def test_cursor_hide_keeps_zero_and_accepts_never(self):
+        self.assertEqual(self._edit(cursor_hide_ms=0), {"cursor_hide_ms"})
+        self.assertEqual(self.store.cursor_hide_ms, 0)
+        self.assertEqual(self._edit(cursor_hide_ms=CURSOR_HIDE_NEVER), {"cursor_hide_ms"})
+        self.assertEqual(self.store.cursor_hide_ms, CURSOR_HIDE_NEVER)
+
+
+if __name__ == "__main__":
+    unittest.main()
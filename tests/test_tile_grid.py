@@ -0,0 +1,75 @@
+import sys
+import tracemalloc
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.capture import FrameRing  # noqa: E402
+from src.utils import load_numpy  # noqa: E402
+from src.visual import TileGrid  # noqa: E402
+
+np = load_numpy()
+
+
+@unittest.skipIf(np is None, "frame rings need NumPy")
+class TileGridBaselineTest(unittest.TestCase):
+    """Baselines are ring slots: a slot overwritten since it was recorded is never compared against."""
+
+    def _capture(self, ring: FrameRing, value: int):
+        slot = ring.next_slot()
+        slot.fill(value)
+        return slot
+
+    def test_compares_with_previous_slot(self):
+        ring, tiles = FrameRing(2, 4, 4), TileGrid()
+        self.assertIsNone(tiles.record(0, self._capture(ring, 0), 0.01, ring))
+        self.assertGreater(tiles.record(0, self._capture(ring, 200), 0.01, ring), 0.01)
+        self.assertEqual(tiles.record(0, self._capture(ring, 200), 0.01, ring), 0.0)
+
+    def test_wrapped_baseline_is_not_compared(self):
+        ring, tiles = FrameRing(2, 4, 4), TileGrid()
+        tiles.record(0, self._capture(ring, 0), 0.01, ring)
+        self._capture(ring, 200)  # captured but never recorded: the ring wraps onto the baseline's slot
+        self.assertIsNone(tiles.record(0, self._capture(ring, 200), 0.01, ring))
+        self.assertTrue(tiles.has_baseline)
+
+
+@unittest.skipIf(np is None, "frame rings need NumPy")
+class FrameRingVarianceTest(unittest.TestCase):
+    """Per-pixel variance over the held slots, computed into reused buffers."""
+
+    def test_matches_numpy_over_held_frames_and_reuses_buffer(self):
+        ring = FrameRing(4, 3, 5)
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 256, (3, 5), dtype=np.uint8) for _ in range(6)]
+        np.copyto(ring.next_slot(), frames[0])
+        self.assertIsNone(ring.variance())
+        for frame in frames[1:3]:
+            np.copyto(ring.next_slot(), frame)
+        first = ring.variance()
+        np.testing.assert_allclose(first, np.var(np.stack(frames[:3]).astype(np.float64), axis=0), rtol=1e-4)
+        for frame in frames[3:]:
+            np.copyto(ring.next_slot(), frame)  # wraps: only the last four frames count
+        second = ring.variance()
+        self.assertIs(second, first)
+        self.assertEqual(second.dtype, np.float32)
+        np.testing.assert_allclose(second, np.var(np.stack(frames[2:]).astype(np.float64), axis=0), rtol=1e-4)
+
+    def test_steady_state_does_not_allocate_frame_sized_buffers(self):
+        ring = FrameRing(4, 180, 320)
+        for value in range(4):
+            ring.next_slot().fill(value)
+        ring.variance()
+        tracemalloc.start()
+        try:
+            ring.variance()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, 4096)
+
+
+if __name__ == "__main__":
+    unittest.main()
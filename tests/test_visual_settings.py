@@ -0,0 +1,46 @@
+import sys
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.config import VISUAL_SAMPLE_MARGINS, coerce_visual_settings  # noqa: E402
+
+
+class CoerceVisualSettingsTest(unittest.TestCase):
+    """Values from the control socket are checked before they reach the settings store."""
+
+    def coerce(self, **values):
+        return coerce_visual_settings(values, dict(VISUAL_SAMPLE_MARGINS))
+
+    def test_rejects_malformed_values(self):
+        for values in (
+            {"visual_monitors": "x"},
+            {"visual_monitors": {"HDMI-1": 5}},
+            {"visual_monitors": {"HDMI-1": {"threshold": "abc"}}},
+            {"visual_tile_grid": [0]},
+            {"visual_tile_grid": [0, 2]},
+            {"visual_tiles_per_check": True},
+            {"visual_threshold": "abc"},
+            {"visual_threshold": -0.1},
+            {"visual_margins": [1]},
+            {"visual_margins": {"top": 0.6, "bottom": 0.5}},
+            {"visual_margins": {"middle": 0.1}},
+            {"visual_monitor_enabled": "yes"},
+            {"visual_mask": "always"},
+        ):
+            with self.subTest(values=values), self.assertRaises(ValueError):
+                self.coerce(**values)
+
+    def test_completes_partial_margins_and_converts_numbers(self):
+        coerced = self.coerce(visual_margins={"top": 0}, visual_threshold=2, visual_tile_grid=(4, 3),
+                              visual_monitors={"HDMI-1": {"enabled": False, "threshold": 1}})
+        self.assertEqual(coerced["visual_margins"], {**VISUAL_SAMPLE_MARGINS, "top": 0.0})
+        self.assertEqual(coerced["visual_threshold"], 2.0)
+        self.assertEqual(coerced["visual_tile_grid"], [4, 3])
+        self.assertEqual(coerced["visual_monitors"], {"HDMI-1": {"enabled": False, "threshold": 1.0}})
+
+
+if __name__ == "__main__":
+    unittest.main()